@@ -1,6 +1,7 @@
 from fastapi import APIRouter, Depends, HTTPException
+from supabase import Client
 from ..core.security import get_current_user
-from ..core.database import get_supabase
+from ..core.database import get_supabase, execute
 from ..core.logging import get_logger
 from pydantic import BaseModel
 from typing import Optional
@@ -18,16 +19,17 @@ class ConversationUpdate(BaseModel):
 
 
 @router.get("")
-async def get_conversations(user_id: str = Depends(get_current_user)):
+async def get_conversations(
+    user_id: str = Depends(get_current_user),
+    supabase: Client = Depends(get_supabase)
+):
     """Get all conversations for user, ordered by last message."""
     logger.info(f"Fetching conversations for user {user_id[:8]}...")
 
     try:
-        supabase = get_supabase()
-
-        result = supabase.table("conversations").select("*").eq(
+        result = await execute(supabase.table("conversations").select("*").eq(
             "user_id", user_id
-        ).order("last_message_at", desc=True).execute()
+        ).order("last_message_at", desc=True))
 
         logger.info(f"Retrieved {len(result.data)} conversations")
         return result.data
@@ -39,18 +41,17 @@ async def get_conversations(user_id: str = Depends(get_current_user)):
 @router.post("")
 async def create_conversation(
     data: ConversationCreate,
-    user_id: str = Depends(get_current_user)
+    user_id: str = Depends(get_current_user),
+    supabase: Client = Depends(get_supabase)
 ):
     """Create a new conversation."""
     logger.info(f"Creating conversation for user {user_id[:8]}...")
 
     try:
-        supabase = get_supabase()
-
-        result = supabase.table("conversations").insert({
+        result = await execute(supabase.table("conversations").insert({
             "user_id": user_id,
             "title": data.title
-        }).execute()
+        }))
 
         logger.info(f"Conversation created: {result.data[0]['id'] if result.data else 'unknown'}")
         return result.data[0] if result.data else None
@@ -62,17 +63,16 @@ async def create_conversation(
 @router.get("/{conversation_id}")
 async def get_conversation(
     conversation_id: str,
-    user_id: str = Depends(get_current_user)
+    user_id: str = Depends(get_current_user),
+    supabase: Client = Depends(get_supabase)
 ):
     """Get a specific conversation."""
     logger.info(f"Fetching conversation {conversation_id[:8]}...")
 
     try:
-        supabase = get_supabase()
-
-        result = supabase.table("conversations").select("*").eq(
+        result = await execute(supabase.table("conversations").select("*").eq(
             "id", conversation_id
-        ).eq("user_id", user_id).single().execute()
+        ).eq("user_id", user_id).single())
 
         if not result.data:
             raise HTTPException(status_code=404, detail="Conversation not found")
@@ -88,25 +88,24 @@ async def get_conversation(
 @router.get("/{conversation_id}/messages")
 async def get_conversation_messages(
     conversation_id: str,
-    user_id: str = Depends(get_current_user)
+    user_id: str = Depends(get_current_user),
+    supabase: Client = Depends(get_supabase)
 ):
     """Get all messages for a conversation."""
     logger.info(f"Fetching messages for conversation {conversation_id[:8]}...")
 
     try:
-        supabase = get_supabase()
-
         # Verify ownership
-        conv = supabase.table("conversations").select("id").eq(
+        conv = await execute(supabase.table("conversations").select("id").eq(
             "id", conversation_id
-        ).eq("user_id", user_id).single().execute()
+        ).eq("user_id", user_id).single())
 
         if not conv.data:
             raise HTTPException(status_code=404, detail="Conversation not found")
 
-        messages = supabase.table("chat_messages").select("*").eq(
+        messages = await execute(supabase.table("chat_messages").select("*").eq(
             "conversation_id", conversation_id
-        ).order("created_at", desc=False).execute()
+        ).order("created_at", desc=False))
 
         logger.info(f"Retrieved {len(messages.data)} messages")
         return messages.data
@@ -121,17 +120,16 @@ async def get_conversation_messages(
 async def update_conversation(
     conversation_id: str,
     data: ConversationUpdate,
-    user_id: str = Depends(get_current_user)
+    user_id: str = Depends(get_current_user),
+    supabase: Client = Depends(get_supabase)
 ):
     """Update conversation title."""
     logger.info(f"Updating conversation {conversation_id[:8]}...")
 
     try:
-        supabase = get_supabase()
-
-        result = supabase.table("conversations").update({
+        result = await execute(supabase.table("conversations").update({
             "title": data.title
-        }).eq("id", conversation_id).eq("user_id", user_id).execute()
+        }).eq("id", conversation_id).eq("user_id", user_id))
 
         if not result.data:
             raise HTTPException(status_code=404, detail="Conversation not found")
@@ -148,18 +146,17 @@ async def update_conversation(
 @router.delete("/{conversation_id}")
 async def delete_conversation(
     conversation_id: str,
-    user_id: str = Depends(get_current_user)
+    user_id: str = Depends(get_current_user),
+    supabase: Client = Depends(get_supabase)
 ):
     """Delete a conversation and all its messages."""
     logger.info(f"Deleting conversation {conversation_id[:8]}...")
 
     try:
-        supabase = get_supabase()
-
         # Messages will be cascade deleted due to FK constraint
-        supabase.table("conversations").delete().eq(
+        await execute(supabase.table("conversations").delete().eq(
             "id", conversation_id
-        ).eq("user_id", user_id).execute()
+        ).eq("user_id", user_id))
 
         logger.info(f"Conversation deleted successfully")
         return {"message": "Conversation deleted"}
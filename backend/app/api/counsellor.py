@@ -1,10 +1,15 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException
+from fastapi.responses import StreamingResponse
+from starlette.background import BackgroundTask
+from supabase import Client
 from ..core.security import get_current_user
+from ..core.database import get_supabase
+from ..core.config import get_settings
+from ..core.llm_gateway import LLMGateway, get_llm_gateway, ai_error_response, llm_deadline
 from ..core.logging import get_logger
 from ..services.ai_counsellor import AICounsellor
 from ..schemas import ChatRequest, ChatResponse
-import httpx
-import openai
+import json
 
 router = APIRouter(prefix="/api/counsellor", tags=["counsellor"])
 logger = get_logger("api.counsellor")
@@ -15,14 +20,27 @@ class AIServiceError(Exception):
     pass
 
 
+def format_sse(event: str, data: dict) -> str:
+    """Encode one Server-Sent Event."""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
 @router.post("/chat", response_model=ChatResponse)
-async def chat(request: ChatRequest, user_id: str = Depends(get_current_user)):
+async def chat(
+    request: ChatRequest,
+    background_tasks: BackgroundTasks,
+    user_id: str = Depends(get_current_user),
+    supabase: Client = Depends(get_supabase),
+    llm: LLMGateway = Depends(get_llm_gateway)
+):
     """Chat with the AI counsellor."""
     logger.info(f"Chat request from user {user_id[:8]}...")
 
     try:
-        counsellor = AICounsellor()
-        result = counsellor.chat(user_id, request.message, request.conversation_id)
+        counsellor = AICounsellor(supabase, llm)
+        with llm_deadline(get_settings().llm_request_deadline):
+            result = await counsellor.chat(user_id, request.message, request.conversation_id)
+        background_tasks.add_task(counsellor.summarize_pending_history)
 
         logger.info(f"Chat response generated for user {user_id[:8]}...")
         return ChatResponse(
@@ -30,66 +48,43 @@ async def chat(request: ChatRequest, user_id: str = Depends(get_current_user)):
             actions=result.get("actions")
         )
 
-    except httpx.ConnectError as e:
-        logger.error(f"Connection error to AI service: {str(e)}")
-        raise HTTPException(
-            status_code=503,
-            detail={
-                "error": "service_unavailable",
-                "message": "AI service is currently starting up. Please wait a moment and try again.",
-                "retry_after": 30
-            }
-        )
+    except Exception as e:
+        status_code, detail = ai_error_response(e)
+        raise HTTPException(status_code=status_code, detail=detail)
 
-    except httpx.TimeoutException as e:
-        logger.error(f"Timeout connecting to AI service: {str(e)}")
-        raise HTTPException(
-            status_code=504,
-            detail={
-                "error": "gateway_timeout",
-                "message": "AI service is taking too long to respond. Please try again.",
-                "retry_after": 15
-            }
-        )
 
-    except openai.RateLimitError as e:
-        logger.warning(f"Rate limit exceeded: {str(e)}")
-        raise HTTPException(
-            status_code=429,
-            detail={
-                "error": "rate_limit",
-                "message": "Too many requests. Please wait a moment before trying again.",
-                "retry_after": 60
-            }
-        )
+@router.post("/chat/stream")
+async def chat_stream(
+    request: ChatRequest,
+    user_id: str = Depends(get_current_user),
+    supabase: Client = Depends(get_supabase),
+    llm: LLMGateway = Depends(get_llm_gateway)
+):
+    """
+    Chat with the AI counsellor, streamed as Server-Sent Events.
 
-    except openai.AuthenticationError as e:
-        logger.error(f"AI service authentication error: {str(e)}")
-        raise HTTPException(
-            status_code=500,
-            detail={
-                "error": "configuration_error",
-                "message": "AI service configuration error. Please contact support."
-            }
-        )
+    Events: `token` (content delta), `tool_start` / `tool_end` (per tool call),
+    `done` (final response and actions) or `error` (same payload as /chat errors).
+    """
+    logger.info(f"Streaming chat request from user {user_id[:8]}...")
+    counsellor = AICounsellor(supabase, llm)
 
-    except openai.APIError as e:
-        logger.error(f"OpenAI API error: {str(e)}")
-        raise HTTPException(
-            status_code=502,
-            detail={
-                "error": "ai_service_error",
-                "message": "AI service encountered an error. Please try again.",
-                "retry_after": 10
-            }
-        )
+    async def event_source():
+        try:
+            with llm_deadline(get_settings().llm_request_deadline):
+                async for event in counsellor.chat_stream(user_id, request.message, request.conversation_id):
+                    yield format_sse(event["event"], event["data"])
+            logger.info(f"Streamed chat response for user {user_id[:8]}...")
+        except Exception as e:
+            status_code, detail = ai_error_response(e)
+            yield format_sse("error", {"status": status_code, **detail})
 
-    except Exception as e:
-        logger.error(f"Unexpected error in chat endpoint: {type(e).__name__}: {str(e)}")
-        raise HTTPException(
-            status_code=500,
-            detail={
-                "error": "internal_error",
-                "message": "An unexpected error occurred. Please try again."
-            }
-        )
+    return StreamingResponse(
+        event_source(),
+        background=BackgroundTask(counsellor.summarize_pending_history),
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            "X-Accel-Buffering": "no"
+        }
+    )
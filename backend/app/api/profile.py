@@ -1,7 +1,10 @@
 from fastapi import APIRouter, Depends, HTTPException
+from supabase import Client
 from ..core.security import get_current_user
-from ..core.database import get_supabase
+from ..core.database import get_supabase, execute
 from ..core.logging import get_logger
+from ..services.context_cache import get_context_cache
+from ..services.recommendations import invalidate_recommendations
 from ..schemas import OnboardingData
 
 router = APIRouter(prefix="/api/profile", tags=["profile"])
@@ -9,18 +12,19 @@ logger = get_logger("api.profile")
 
 
 @router.get("")
-async def get_profile(user_id: str = Depends(get_current_user)):
+async def get_profile(
+    user_id: str = Depends(get_current_user),
+    supabase: Client = Depends(get_supabase)
+):
     """Get user profile and user_profile data."""
     logger.info(f"Fetching profile for user {user_id[:8]}...")
 
     try:
-        supabase = get_supabase()
-
         # Get profile
-        profile_result = supabase.table("profiles").select("*").eq("id", user_id).single().execute()
+        profile_result = await execute(supabase.table("profiles").select("*").eq("id", user_id).single())
 
         # Get user_profile
-        user_profile_result = supabase.table("user_profiles").select("*").eq("user_id", user_id).single().execute()
+        user_profile_result = await execute(supabase.table("user_profiles").select("*").eq("user_id", user_id).single())
 
         logger.info(f"Profile retrieved for user {user_id[:8]}...")
         return {
@@ -33,22 +37,27 @@ async def get_profile(user_id: str = Depends(get_current_user)):
 
 
 @router.put("")
-async def update_profile(data: OnboardingData, user_id: str = Depends(get_current_user)):
+async def update_profile(
+    data: OnboardingData,
+    user_id: str = Depends(get_current_user),
+    supabase: Client = Depends(get_supabase)
+):
     """Update user profile."""
     logger.info(f"Updating profile for user {user_id[:8]}...")
 
     try:
-        supabase = get_supabase()
-
         # Update user_profiles
         update_data = data.model_dump(exclude_none=True)
 
-        result = supabase.table("user_profiles").update(update_data).eq("user_id", user_id).execute()
+        result = await execute(supabase.table("user_profiles").update(update_data).eq("user_id", user_id))
 
         if not result.data:
             logger.warning(f"Profile not found for user {user_id[:8]}...")
             raise HTTPException(status_code=404, detail="Profile not found")
 
+        await get_context_cache().invalidate(user_id)
+        await invalidate_recommendations(supabase, user_id)
+
         logger.info(f"Profile updated for user {user_id[:8]}...")
         return {"message": "Profile updated", "data": result.data[0]}
     except HTTPException:
@@ -59,13 +68,15 @@ async def update_profile(data: OnboardingData, user_id: str = Depends(get_curren
 
 
 @router.post("/onboarding")
-async def save_onboarding(data: OnboardingData, user_id: str = Depends(get_current_user)):
+async def save_onboarding(
+    data: OnboardingData,
+    user_id: str = Depends(get_current_user),
+    supabase: Client = Depends(get_supabase)
+):
     """Save onboarding data and mark onboarding as completed."""
     logger.info(f"Saving onboarding data for user {user_id[:8]}...")
 
     try:
-        supabase = get_supabase()
-
         # Prepare data
         profile_data = {
             "user_id": user_id,
@@ -73,13 +84,16 @@ async def save_onboarding(data: OnboardingData, user_id: str = Depends(get_curre
         }
 
         # Upsert user_profile
-        supabase.table("user_profiles").upsert(profile_data, on_conflict="user_id").execute()
+        await execute(supabase.table("user_profiles").upsert(profile_data, on_conflict="user_id"))
 
         # Mark onboarding as completed and advance to stage 2
-        supabase.table("profiles").update({
+        await execute(supabase.table("profiles").update({
             "onboarding_completed": True,
             "current_stage": 2
-        }).eq("id", user_id).execute()
+        }).eq("id", user_id))
+
+        await get_context_cache().invalidate(user_id)
+        await invalidate_recommendations(supabase, user_id)
 
         logger.info(f"Onboarding completed for user {user_id[:8]}...")
         return {"message": "Onboarding completed"}
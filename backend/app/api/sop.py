@@ -1,17 +1,16 @@
 from fastapi import APIRouter, Depends, HTTPException
+from supabase import Client
 from ..core.security import get_current_user
-from ..core.database import get_supabase
+from ..core.database import get_supabase, execute
+from ..core.llm_gateway import LLMGateway, LLMGatewayError, get_llm_gateway, ai_error_response, llm_deadline
 from ..core.config import get_settings
 from ..core.logging import get_logger
-from openai import OpenAI
 from pydantic import BaseModel
 from typing import Optional
 
 router = APIRouter(prefix="/api/sop", tags=["sop"])
 logger = get_logger("api.sop")
 
-OPENROUTER_BASE_URL = "https://openrouter.ai/api/v1"
-
 SOP_GENERATION_PROMPT = """You are an expert admissions consultant helping a student write their Statement of Purpose (SOP) for graduate school applications.
 
 ## Student Profile:
@@ -52,16 +51,17 @@ class SOPUpdate(BaseModel):
 
 
 @router.get("")
-async def get_sops(user_id: str = Depends(get_current_user)):
+async def get_sops(
+    user_id: str = Depends(get_current_user),
+    supabase: Client = Depends(get_supabase)
+):
     """Get all SOPs for user."""
     logger.info(f"Fetching SOPs for user {user_id[:8]}...")
 
     try:
-        supabase = get_supabase()
-
-        result = supabase.table("sop_documents").select(
+        result = await execute(supabase.table("sop_documents").select(
             "*, university:universities(name, country)"
-        ).eq("user_id", user_id).order("updated_at", desc=True).execute()
+        ).eq("user_id", user_id).order("updated_at", desc=True))
 
         logger.info(f"Retrieved {len(result.data)} SOPs")
         return result.data
@@ -71,16 +71,18 @@ async def get_sops(user_id: str = Depends(get_current_user)):
 
 
 @router.get("/{sop_id}")
-async def get_sop(sop_id: str, user_id: str = Depends(get_current_user)):
+async def get_sop(
+    sop_id: str,
+    user_id: str = Depends(get_current_user),
+    supabase: Client = Depends(get_supabase)
+):
     """Get a specific SOP."""
     logger.info(f"Fetching SOP {sop_id[:8]}...")
 
     try:
-        supabase = get_supabase()
-
-        result = supabase.table("sop_documents").select(
+        result = await execute(supabase.table("sop_documents").select(
             "*, university:universities(name, country)"
-        ).eq("id", sop_id).eq("user_id", user_id).single().execute()
+        ).eq("id", sop_id).eq("user_id", user_id).single())
 
         if not result.data:
             raise HTTPException(status_code=404, detail="SOP not found")
@@ -96,19 +98,18 @@ async def get_sop(sop_id: str, user_id: str = Depends(get_current_user)):
 @router.post("/generate")
 async def generate_sop(
     data: SOPRequest,
-    user_id: str = Depends(get_current_user)
+    user_id: str = Depends(get_current_user),
+    supabase: Client = Depends(get_supabase),
+    llm: LLMGateway = Depends(get_llm_gateway)
 ):
     """Generate SOP using AI."""
     logger.info(f"Generating SOP for user {user_id[:8]}...")
 
     try:
-        supabase = get_supabase()
-        settings = get_settings()
-
         # Get user profile
-        profile = supabase.table("user_profiles").select("*").eq(
+        profile = await execute(supabase.table("user_profiles").select("*").eq(
             "user_id", user_id
-        ).single().execute()
+        ).single())
 
         if not profile.data:
             raise HTTPException(status_code=400, detail="Complete your profile first")
@@ -133,15 +134,13 @@ async def generate_sop(
         program = up.get('field_of_study', 'your chosen program')
 
         if data.university_id:
-            uni = supabase.table("universities").select("name, programs").eq(
+            uni = await execute(supabase.table("universities").select("name, programs").eq(
                 "id", data.university_id
-            ).single().execute()
+            ).single())
             if uni.data:
                 university_name = uni.data.get("name", university_name)
 
         # Generate SOP using GPT-4o via OpenRouter
-        client = OpenAI(api_key=settings.openrouter_api_key, base_url=OPENROUTER_BASE_URL)
-
         prompt = SOP_GENERATION_PROMPT.format(
             user_profile=user_profile_str,
             university_name=university_name,
@@ -153,32 +152,36 @@ async def generate_sop(
 
         logger.info(f"Calling OpenRouter API for SOP generation...")
 
-        response = client.chat.completions.create(
-            model="openai/gpt-4o",
-            messages=[
-                {"role": "system", "content": "You are an expert admissions consultant who writes compelling, personalized Statements of Purpose for graduate school applicants."},
-                {"role": "user", "content": prompt}
-            ],
-            temperature=0.7,
-            max_tokens=2000
-        )
+        with llm_deadline(get_settings().llm_request_deadline):
+            response = await llm.complete(
+                model="openai/gpt-4o",
+                messages=[
+                    {"role": "system", "content": "You are an expert admissions consultant who writes compelling, personalized Statements of Purpose for graduate school applicants."},
+                    {"role": "user", "content": prompt}
+                ],
+                temperature=0.7,
+                max_tokens=2000
+            )
 
         sop_content = response.choices[0].message.content
 
         # Save to database
-        result = supabase.table("sop_documents").insert({
+        result = await execute(supabase.table("sop_documents").insert({
             "user_id": user_id,
             "university_id": data.university_id,
             "title": f"SOP for {university_name}",
             "content": sop_content,
             "is_draft": True
-        }).execute()
+        }))
 
         logger.info(f"SOP generated and saved successfully")
         return result.data[0] if result.data else {"content": sop_content}
 
     except HTTPException:
         raise
+    except LLMGatewayError as e:
+        status_code, detail = ai_error_response(e)
+        raise HTTPException(status_code=status_code, detail=detail)
     except Exception as e:
         logger.error(f"Error generating SOP: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Failed to generate SOP: {str(e)}")
@@ -188,23 +191,22 @@ async def generate_sop(
 async def update_sop(
     sop_id: str,
     data: SOPUpdate,
-    user_id: str = Depends(get_current_user)
+    user_id: str = Depends(get_current_user),
+    supabase: Client = Depends(get_supabase)
 ):
     """Update SOP content."""
     logger.info(f"Updating SOP {sop_id[:8]}...")
 
     try:
-        supabase = get_supabase()
-
         update_data = {"content": data.content}
         if data.title is not None:
             update_data["title"] = data.title
         if data.is_draft is not None:
             update_data["is_draft"] = data.is_draft
 
-        result = supabase.table("sop_documents").update(update_data).eq(
+        result = await execute(supabase.table("sop_documents").update(update_data).eq(
             "id", sop_id
-        ).eq("user_id", user_id).execute()
+        ).eq("user_id", user_id))
 
         if not result.data:
             raise HTTPException(status_code=404, detail="SOP not found")
@@ -219,16 +221,18 @@ async def update_sop(
 
 
 @router.delete("/{sop_id}")
-async def delete_sop(sop_id: str, user_id: str = Depends(get_current_user)):
+async def delete_sop(
+    sop_id: str,
+    user_id: str = Depends(get_current_user),
+    supabase: Client = Depends(get_supabase)
+):
     """Delete an SOP."""
     logger.info(f"Deleting SOP {sop_id[:8]}...")
 
     try:
-        supabase = get_supabase()
-
-        supabase.table("sop_documents").delete().eq(
+        await execute(supabase.table("sop_documents").delete().eq(
             "id", sop_id
-        ).eq("user_id", user_id).execute()
+        ).eq("user_id", user_id))
 
         logger.info(f"SOP deleted successfully")
         return {"message": "SOP deleted"}
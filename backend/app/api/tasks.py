@@ -1,6 +1,7 @@
 from fastapi import APIRouter, Depends, HTTPException
+from supabase import Client
 from ..core.security import get_current_user
-from ..core.database import get_supabase
+from ..core.database import get_supabase, execute
 from ..core.guards import guard_create_task
 from ..core.logging import get_logger
 from ..schemas import TaskCreate, TaskUpdate
@@ -10,16 +11,17 @@ logger = get_logger("api.tasks")
 
 
 @router.get("")
-async def get_tasks(user_id: str = Depends(get_current_user)):
+async def get_tasks(
+    user_id: str = Depends(get_current_user),
+    supabase: Client = Depends(get_supabase)
+):
     """Get all tasks for user."""
     logger.info(f"Fetching tasks for user {user_id[:8]}...")
 
     try:
-        supabase = get_supabase()
-
-        result = supabase.table("tasks").select(
+        result = await execute(supabase.table("tasks").select(
             "*, university:universities(name, country)"
-        ).eq("user_id", user_id).order("due_date", desc=False).execute()
+        ).eq("user_id", user_id).order("due_date", desc=False))
 
         logger.info(f"Retrieved {len(result.data)} tasks for user {user_id[:8]}...")
         return result.data
@@ -29,20 +31,21 @@ async def get_tasks(user_id: str = Depends(get_current_user)):
 
 
 @router.get("/by-university")
-async def get_tasks_by_university(user_id: str = Depends(get_current_user)):
+async def get_tasks_by_university(
+    user_id: str = Depends(get_current_user),
+    supabase: Client = Depends(get_supabase)
+):
     """Get tasks grouped by locked university for dashboard display."""
     logger.info(f"Fetching tasks by university for user {user_id[:8]}...")
 
     try:
-        supabase = get_supabase()
-
         # Get locked universities
-        locked = supabase.table("shortlisted_universities").select(
+        locked = await execute(supabase.table("shortlisted_universities").select(
             "university_id, category, university:universities(id, name, country, ranking)"
-        ).eq("user_id", user_id).eq("is_locked", True).execute()
+        ).eq("user_id", user_id).eq("is_locked", True))
 
         # Get all tasks for user
-        tasks = supabase.table("tasks").select("*").eq("user_id", user_id).order("created_at", desc=False).execute()
+        tasks = await execute(supabase.table("tasks").select("*").eq("user_id", user_id).order("created_at", desc=False))
 
         # Group tasks by university
         result = []
@@ -67,15 +70,17 @@ async def get_tasks_by_university(user_id: str = Depends(get_current_user)):
 
 
 @router.post("")
-async def create_task(data: TaskCreate, user_id: str = Depends(get_current_user)):
+async def create_task(
+    data: TaskCreate,
+    user_id: str = Depends(get_current_user),
+    supabase: Client = Depends(get_supabase)
+):
     """Create a new task."""
     logger.info(f"Creating task '{data.title}' for user {user_id[:8]}...")
 
     try:
         # Apply guard
-        guard_create_task(user_id, data.university_id)
-
-        supabase = get_supabase()
+        await guard_create_task(supabase, user_id, data.university_id)
 
         task_data = {
             "user_id": user_id,
@@ -86,7 +91,7 @@ async def create_task(data: TaskCreate, user_id: str = Depends(get_current_user)
             "due_date": data.due_date.isoformat() if data.due_date else None
         }
 
-        result = supabase.table("tasks").insert(task_data).execute()
+        result = await execute(supabase.table("tasks").insert(task_data))
 
         logger.info(f"Task created: {result.data[0]['id'] if result.data else 'unknown'}")
         return {"message": "Task created", "data": result.data[0] if result.data else None}
@@ -98,15 +103,18 @@ async def create_task(data: TaskCreate, user_id: str = Depends(get_current_user)
 
 
 @router.put("/{task_id}")
-async def update_task(task_id: str, data: TaskUpdate, user_id: str = Depends(get_current_user)):
+async def update_task(
+    task_id: str,
+    data: TaskUpdate,
+    user_id: str = Depends(get_current_user),
+    supabase: Client = Depends(get_supabase)
+):
     """Update a task."""
     logger.info(f"Updating task {task_id} for user {user_id[:8]}...")
 
     try:
-        supabase = get_supabase()
-
         # Verify ownership
-        existing = supabase.table("tasks").select("*").eq("id", task_id).eq("user_id", user_id).single().execute()
+        existing = await execute(supabase.table("tasks").select("*").eq("id", task_id).eq("user_id", user_id).single())
 
         if not existing.data:
             logger.warning(f"Task {task_id} not found for user {user_id[:8]}...")
@@ -116,7 +124,7 @@ async def update_task(task_id: str, data: TaskUpdate, user_id: str = Depends(get
         if "due_date" in update_data and update_data["due_date"]:
             update_data["due_date"] = update_data["due_date"].isoformat()
 
-        result = supabase.table("tasks").update(update_data).eq("id", task_id).execute()
+        result = await execute(supabase.table("tasks").update(update_data).eq("id", task_id))
 
         logger.info(f"Task {task_id} updated successfully")
         return {"message": "Task updated", "data": result.data[0] if result.data else None}
@@ -128,21 +136,23 @@ async def update_task(task_id: str, data: TaskUpdate, user_id: str = Depends(get
 
 
 @router.delete("/{task_id}")
-async def delete_task(task_id: str, user_id: str = Depends(get_current_user)):
+async def delete_task(
+    task_id: str,
+    user_id: str = Depends(get_current_user),
+    supabase: Client = Depends(get_supabase)
+):
     """Delete a task."""
     logger.info(f"Deleting task {task_id} for user {user_id[:8]}...")
 
     try:
-        supabase = get_supabase()
-
         # Verify ownership
-        existing = supabase.table("tasks").select("*").eq("id", task_id).eq("user_id", user_id).single().execute()
+        existing = await execute(supabase.table("tasks").select("*").eq("id", task_id).eq("user_id", user_id).single())
 
         if not existing.data:
             logger.warning(f"Task {task_id} not found for user {user_id[:8]}...")
             raise HTTPException(status_code=404, detail="Task not found")
 
-        supabase.table("tasks").delete().eq("id", task_id).execute()
+        await execute(supabase.table("tasks").delete().eq("id", task_id))
 
         logger.info(f"Task {task_id} deleted successfully")
         return {"message": "Task deleted"}
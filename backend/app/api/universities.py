@@ -1,61 +1,114 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Query, Request, Response
+from supabase import Client
 from typing import Optional, List
-import httpx
+import asyncio
+import hashlib
 import uuid
 from ..core.security import get_current_user
-from ..core.database import get_supabase
-from ..core.guards import guard_shortlist, guard_lock
+from ..core.database import get_supabase, execute
+from ..core.guards import guard_shortlist, guard_lock, guard_bulk_shortlist, guard_bulk_lock
 from ..core.logging import get_logger
-from ..schemas import ShortlistRequest, ExternalShortlistRequest
+from ..services.context_cache import get_context_cache
+from ..services.external_search import get_external_search
+from ..services.shortlist import (
+    live_university_ids, lock_and_provision, lock_and_provision_many, shortlist_external, shortlist_fit_score,
+    shortlist_fit_scores, store_fit_score
+)
+from ..services.catalog import SORT_COLUMNS, get_catalog
+from ..services.recommendations import get_recommendations
+from ..schemas import ShortlistRequest, ExternalShortlistRequest, BulkShortlistRequest, BulkLockRequest
 
 router = APIRouter(prefix="/api/universities", tags=["universities"])
 logger = get_logger("api.universities")
 
-# External API for searching universities worldwide
-HIPO_API_URL = "http://universities.hipolabs.com/search"
+# Largest batch accepted by the bulk shortlist / lock endpoints
+MAX_BULK_ITEMS = 50
 
 
 @router.get("")
 async def get_universities(
+    request: Request,
+    response: Response,
     country: Optional[str] = None,
     max_tuition: Optional[int] = None,
     program: Optional[str] = None,
-    user_id: str = Depends(get_current_user)
+    sort: str = "ranking",
+    order: str = Query(default="asc", pattern="^(asc|desc)$"),
+    limit: Optional[int] = Query(default=None, ge=1, le=1000),
+    offset: int = Query(default=0, ge=0),
+    user_id: str = Depends(get_current_user),
+    supabase: Client = Depends(get_supabase)
 ):
-    """Get all universities with optional filters."""
-    logger.info(f"Fetching universities - filters: country={country}, max_tuition={max_tuition}")
+    """
+    Get universities with optional filters, served from the in-memory catalog.
+
+    The total match count is returned in X-Total-Count; responses carry an ETag
+    and answer 304 when If-None-Match still matches.
+    """
+    logger.info(f"Fetching universities - filters: country={country}, max_tuition={max_tuition}, program={program}")
+
+    if sort not in SORT_COLUMNS:
+        raise HTTPException(status_code=400, detail=f"sort must be one of: {', '.join(SORT_COLUMNS)}")
 
     try:
-        supabase = get_supabase()
+        catalog = await get_catalog().ensure_loaded(supabase)
+
+        # Same catalog version + same query = same body
+        query_key = f"{catalog.version}|{country}|{max_tuition}|{program}|{sort}|{order}|{limit}|{offset}"
+        etag = f'"{hashlib.sha1(query_key.encode()).hexdigest()[:20]}"'
+        if request.headers.get("if-none-match") == etag:
+            return Response(status_code=304, headers={"ETag": etag})
+
+        rows, total = catalog.query(
+            country=country,
+            max_tuition=max_tuition,
+            program=program,
+            sort=sort,
+            descending=order == "desc",
+            offset=offset,
+            limit=limit
+        )
 
-        query = supabase.table("universities").select("*")
+        response.headers["ETag"] = etag
+        response.headers["Cache-Control"] = "private, no-cache"
+        response.headers["X-Total-Count"] = str(total)
+        logger.info(f"Retrieved {len(rows)} of {total} universities")
+        return rows
+    except Exception as e:
+        logger.error(f"Error fetching universities: {str(e)}")
+        raise
 
-        if country:
-            query = query.eq("country", country)
 
-        if max_tuition:
-            query = query.lte("tuition_max", max_tuition)
+@router.get("/recommended")
+async def get_recommended_universities(
+    user_id: str = Depends(get_current_user),
+    supabase: Client = Depends(get_supabase)
+):
+    """Get the user's precomputed dream/target/safe recommendations, best fit first."""
+    logger.info(f"Fetching recommendations for user {user_id[:8]}...")
 
-        result = query.order("ranking", desc=False).execute()
+    try:
+        buckets = await get_recommendations(supabase, user_id)
 
-        logger.info(f"Retrieved {len(result.data)} universities")
-        return result.data
+        logger.info(f"Retrieved {sum(len(unis) for unis in buckets.values())} recommendations for user {user_id[:8]}...")
+        return buckets
     except Exception as e:
-        logger.error(f"Error fetching universities: {str(e)}")
+        logger.error(f"Error fetching recommendations for user {user_id[:8]}...: {str(e)}")
         raise
 
 
 @router.get("/shortlist")
-async def get_shortlist(user_id: str = Depends(get_current_user)):
+async def get_shortlist(
+    user_id: str = Depends(get_current_user),
+    supabase: Client = Depends(get_supabase)
+):
     """Get user's shortlisted universities."""
     logger.info(f"Fetching shortlist for user {user_id[:8]}...")
 
     try:
-        supabase = get_supabase()
-
-        result = supabase.table("shortlisted_universities").select(
+        result = await execute(supabase.table("shortlisted_universities").select(
             "*, university:universities(*)"
-        ).eq("user_id", user_id).execute()
+        ).eq("user_id", user_id))
 
         logger.info(f"Retrieved {len(result.data)} shortlisted universities for user {user_id[:8]}...")
         return result.data
@@ -65,38 +118,46 @@ async def get_shortlist(user_id: str = Depends(get_current_user)):
 
 
 @router.post("/shortlist")
-async def add_to_shortlist(data: ShortlistRequest, user_id: str = Depends(get_current_user)):
+async def add_to_shortlist(
+    data: ShortlistRequest,
+    user_id: str = Depends(get_current_user),
+    supabase: Client = Depends(get_supabase)
+):
     """Add a university to shortlist."""
     logger.info(f"Adding university {data.university_id} to shortlist for user {user_id[:8]}...")
 
     try:
         # Apply guard
-        guard_shortlist(user_id, data.university_id)
-
-        supabase = get_supabase()
-
-        # Check if already shortlisted
-        existing = supabase.table("shortlisted_universities").select("*").eq(
-            "user_id", user_id
-        ).eq("university_id", data.university_id).execute()
+        await guard_shortlist(supabase, user_id, data.university_id)
+
+        # Check if already shortlisted, scoring the fit in the meantime
+        existing, fit_score = await asyncio.gather(
+            execute(supabase.table("shortlisted_universities").select("*").eq(
+                "user_id", user_id
+            ).eq("university_id", data.university_id)),
+            shortlist_fit_score(supabase, user_id, data.university_id)
+        )
 
         if existing.data:
             # Update category
-            result = supabase.table("shortlisted_universities").update({
+            result = await execute(supabase.table("shortlisted_universities").update({
                 "category": data.category,
-                "ai_reasoning": data.reasoning
-            }).eq("id", existing.data[0]["id"]).execute()
+                "ai_reasoning": data.reasoning,
+                "fit_score": fit_score
+            }).eq("id", existing.data[0]["id"]))
             logger.info(f"Updated shortlist category for university {data.university_id}")
         else:
             # Insert new
-            result = supabase.table("shortlisted_universities").insert({
+            result = await execute(supabase.table("shortlisted_universities").insert({
                 "user_id": user_id,
                 "university_id": data.university_id,
                 "category": data.category,
-                "ai_reasoning": data.reasoning
-            }).execute()
+                "ai_reasoning": data.reasoning,
+                "fit_score": fit_score
+            }))
             logger.info(f"Added university {data.university_id} to shortlist")
 
+        await get_context_cache().invalidate(user_id)
         return {"message": "Added to shortlist", "data": result.data[0] if result.data else None}
     except HTTPException:
         raise
@@ -105,27 +166,101 @@ async def add_to_shortlist(data: ShortlistRequest, user_id: str = Depends(get_cu
         raise
 
 
+@router.post("/shortlist/bulk")
+async def bulk_add_to_shortlist(
+    data: BulkShortlistRequest,
+    background_tasks: BackgroundTasks,
+    user_id: str = Depends(get_current_user),
+    supabase: Client = Depends(get_supabase)
+):
+    """
+    Add several universities to the shortlist at once.
+    Guards run once for the batch and all rows are upserted in one statement;
+    the response has a result per item (a repeated university_id keeps its last entry).
+    """
+    if not data.items:
+        raise HTTPException(status_code=400, detail="No universities given")
+    if len(data.items) > MAX_BULK_ITEMS:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_BULK_ITEMS} universities per request")
+
+    logger.info(f"Bulk shortlisting {len(data.items)} universities for user {user_id[:8]}...")
+
+    try:
+        items = {item.university_id: item for item in data.items}
+        # Guard and fit scores together; ids without a fit score aren't in this worker's catalog
+        _, fit_scores = await asyncio.gather(
+            guard_bulk_shortlist(supabase, user_id),
+            shortlist_fit_scores(supabase, user_id, list(items))
+        )
+
+        # Universities created since the catalog was loaded (e.g. external shortlists) still exist;
+        # save them without a fit score and fill it in once the catalog has caught up
+        missing = [university_id for university_id in items if university_id not in fit_scores]
+        uncatalogued = await live_university_ids(supabase, missing) if missing else set()
+        if uncatalogued:
+            get_catalog().invalidate()
+        known = fit_scores.keys() | uncatalogued
+
+        rows = [
+            {
+                "user_id": user_id,
+                "university_id": university_id,
+                "category": item.category,
+                "ai_reasoning": item.reasoning,
+                "fit_score": fit_scores.get(university_id)
+            }
+            for university_id, item in items.items() if university_id in known
+        ]
+
+        saved = {}
+        if rows:
+            result = await execute(supabase.table("shortlisted_universities").upsert(
+                rows, on_conflict="user_id,university_id"
+            ))
+            saved = {row["university_id"]: row for row in result.data or []}
+            await get_context_cache().invalidate(user_id)
+            for university_id in uncatalogued:
+                background_tasks.add_task(store_fit_score, supabase, user_id, university_id)
+
+        results = [
+            {"university_id": university_id, "status": "shortlisted", "data": saved.get(university_id)}
+            if university_id in known else
+            {"university_id": university_id, "status": "not_found", "data": None}
+            for university_id in items
+        ]
+        logger.info(f"Bulk shortlisted {len(rows)} of {len(items)} universities")
+        return {"message": f"Added {len(rows)} universities to shortlist", "results": results}
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error bulk adding to shortlist: {str(e)}")
+        raise
+
+
 @router.delete("/shortlist/{university_id}")
-async def remove_from_shortlist(university_id: str, user_id: str = Depends(get_current_user)):
+async def remove_from_shortlist(
+    university_id: str,
+    user_id: str = Depends(get_current_user),
+    supabase: Client = Depends(get_supabase)
+):
     """Remove a university from shortlist."""
     logger.info(f"Removing university {university_id} from shortlist for user {user_id[:8]}...")
 
     try:
-        supabase = get_supabase()
-
         # Check if locked
-        existing = supabase.table("shortlisted_universities").select("*").eq(
+        existing = await execute(supabase.table("shortlisted_universities").select("*").eq(
             "user_id", user_id
-        ).eq("university_id", university_id).single().execute()
+        ).eq("university_id", university_id).single())
 
         if existing.data and existing.data.get("is_locked"):
             logger.warning(f"Attempted to remove locked university {university_id}")
             raise HTTPException(status_code=403, detail="Cannot remove locked university")
 
-        supabase.table("shortlisted_universities").delete().eq(
+        await execute(supabase.table("shortlisted_universities").delete().eq(
             "user_id", user_id
-        ).eq("university_id", university_id).execute()
+        ).eq("university_id", university_id))
 
+        await get_context_cache().invalidate(user_id)
         logger.info(f"Removed university {university_id} from shortlist")
         return {"message": "Removed from shortlist"}
     except HTTPException:
@@ -135,27 +270,77 @@ async def remove_from_shortlist(university_id: str, user_id: str = Depends(get_c
         raise
 
 
+@router.post("/lock/bulk")
+async def bulk_lock_universities(
+    data: BulkLockRequest,
+    user_id: str = Depends(get_current_user),
+    supabase: Client = Depends(get_supabase)
+):
+    """
+    Lock several shortlisted universities at once, creating their standard tasks.
+    One guard check and one RPC for the whole batch; the response has a result per distinct id.
+    """
+    if not data.university_ids:
+        raise HTTPException(status_code=400, detail="No universities given")
+    if len(data.university_ids) > MAX_BULK_ITEMS:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_BULK_ITEMS} universities per request")
+
+    logger.info(f"Bulk locking {len(data.university_ids)} universities for user {user_id[:8]}...")
+
+    try:
+        _, catalog = await asyncio.gather(
+            guard_bulk_lock(supabase, user_id),
+            get_catalog().ensure_loaded(supabase)
+        )
+
+        university_ids = list(dict.fromkeys(data.university_ids))
+        known = [uid for uid in university_ids if catalog.contains(uid)]
+        locked = {}
+        if known:
+            locked = {result["university_id"]: result for result in await lock_and_provision_many(supabase, user_id, known)}
+            await get_context_cache().invalidate(user_id)
+
+        results = [
+            locked.get(uid) or {"university_id": uid, "status": "not_found"}
+            for uid in university_ids
+        ]
+        locked_count = sum(1 for result in results if result["status"] == "locked")
+        logger.info(f"Bulk locked {locked_count} of {len(university_ids)} universities")
+        return {"message": f"Locked {locked_count} universities", "results": results}
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error bulk locking universities: {str(e)}")
+        raise
+
+
 @router.post("/lock/{university_id}")
-async def lock_university(university_id: str, user_id: str = Depends(get_current_user)):
+async def lock_university(
+    university_id: str,
+    user_id: str = Depends(get_current_user),
+    supabase: Client = Depends(get_supabase)
+):
     """Lock a shortlisted university for application."""
     logger.info(f"Locking university {university_id} for user {user_id[:8]}...")
 
     try:
         # Apply guard
-        guard_lock(user_id, university_id)
-
-        supabase = get_supabase()
+        await guard_lock(supabase, user_id, university_id)
 
-        result = supabase.table("shortlisted_universities").update({
-            "is_locked": True
-        }).eq("user_id", user_id).eq("university_id", university_id).execute()
+        # Same operation as the AI tool: lock and create standard tasks together
+        result = await lock_and_provision(supabase, user_id, university_id)
 
-        if not result.data:
+        if not result:
             logger.warning(f"University {university_id} not in shortlist")
             raise HTTPException(status_code=404, detail="University not in shortlist")
 
-        logger.info(f"University {university_id} locked successfully")
-        return {"message": "University locked", "data": result.data[0]}
+        await get_context_cache().invalidate(user_id)
+        logger.info(f"University {university_id} locked successfully ({result['tasks_created']} tasks created)")
+        return {
+            "message": "University locked",
+            "data": result["shortlist"],
+            "tasks_created": result["tasks_created"]
+        }
     except HTTPException:
         raise
     except Exception as e:
@@ -164,21 +349,24 @@ async def lock_university(university_id: str, user_id: str = Depends(get_current
 
 
 @router.post("/unlock/{university_id}")
-async def unlock_university(university_id: str, user_id: str = Depends(get_current_user)):
+async def unlock_university(
+    university_id: str,
+    user_id: str = Depends(get_current_user),
+    supabase: Client = Depends(get_supabase)
+):
     """Unlock a locked university."""
     logger.info(f"Unlocking university {university_id} for user {user_id[:8]}...")
 
     try:
-        supabase = get_supabase()
-
-        result = supabase.table("shortlisted_universities").update({
+        result = await execute(supabase.table("shortlisted_universities").update({
             "is_locked": False
-        }).eq("user_id", user_id).eq("university_id", university_id).execute()
+        }).eq("user_id", user_id).eq("university_id", university_id))
 
         if not result.data:
             logger.warning(f"University {university_id} not in shortlist")
             raise HTTPException(status_code=404, detail="University not in shortlist")
 
+        await get_context_cache().invalidate(user_id)
         logger.info(f"University {university_id} unlocked successfully")
         return {"message": "University unlocked", "data": result.data[0]}
     except HTTPException:
@@ -193,9 +381,10 @@ async def search_external_universities(
     name: Optional[str] = None,
     country: Optional[str] = None,
     limit: int = Query(default=20, le=100),
-    user_id: str = Depends(get_current_user)
+    user_id: str = Depends(get_current_user),
+    supabase: Client = Depends(get_supabase)
 ):
-    """Search universities from external Hipo API (large global dataset)."""
+    """Search universities from external Hipo API (large global dataset), cached with a local mirror fallback."""
     logger.info(f"Searching external universities - name={name}, country={country}")
 
     if not name and not country:
@@ -205,41 +394,11 @@ async def search_external_universities(
         )
 
     try:
-        params = {}
-        if name:
-            params["name"] = name
-        if country:
-            params["country"] = country
-        params["limit"] = limit
-
-        async with httpx.AsyncClient(timeout=10.0) as client:
-            response = await client.get(HIPO_API_URL, params=params)
-            response.raise_for_status()
-            universities = response.json()
-
-        # Transform to consistent format
-        results = []
-        for uni in universities[:limit]:
-            results.append({
-                "id": None,  # External universities don't have DB ID
-                "name": uni.get("name"),
-                "country": uni.get("country"),
-                "alpha_two_code": uni.get("alpha_two_code"),
-                "website": uni.get("web_pages", [None])[0],
-                "domains": uni.get("domains", []),
-                "state_province": uni.get("state-province"),
-                "is_external": True,  # Flag to indicate this is from external API
-            })
+        results = await get_external_search().search(supabase, name, country, limit)
 
         logger.info(f"Found {len(results)} external universities")
         return results
 
-    except httpx.TimeoutException:
-        logger.error("External API timeout")
-        raise HTTPException(status_code=504, detail="External university search timed out")
-    except httpx.HTTPError as e:
-        logger.error(f"External API error: {str(e)}")
-        raise HTTPException(status_code=502, detail="External university search failed")
     except Exception as e:
         logger.error(f"Error searching external universities: {str(e)}")
         raise
@@ -248,72 +407,33 @@ async def search_external_universities(
 @router.post("/shortlist-external")
 async def shortlist_external_university(
     data: ExternalShortlistRequest,
-    user_id: str = Depends(get_current_user)
+    background_tasks: BackgroundTasks,
+    user_id: str = Depends(get_current_user),
+    supabase: Client = Depends(get_supabase)
 ):
     """
     Shortlist an external university.
-    This creates the university in our DB first (if not exists), then shortlists it.
+    One RPC creates the university in our DB (if not exists) and upserts the shortlist row;
+    the unique (name_key, country) constraint keeps concurrent requests from duplicating it.
     """
     logger.info(f"Shortlisting external university: {data.name} for user {user_id[:8]}...")
 
     try:
-        supabase = get_supabase()
-
-        # Check if this external university already exists in our DB
-        existing_uni = supabase.table("universities").select("*").eq(
-            "name", data.name
-        ).eq("country", data.country).execute()
-
-        if existing_uni.data:
-            university_id = existing_uni.data[0]["id"]
-            logger.info(f"External university already exists in DB: {university_id}")
-        else:
-            # Create the external university in our DB
-            new_uni = supabase.table("universities").insert({
-                "name": data.name,
-                "country": data.country,
-                "website": data.website,
-                "is_external": True,  # Flag to distinguish from curated ones
-                "ranking": None,
-                "tuition_min": None,
-                "tuition_max": None,
-                "acceptance_rate": None,
-            }).execute()
-
-            if not new_uni.data:
-                raise HTTPException(status_code=500, detail="Failed to create university")
-
-            university_id = new_uni.data[0]["id"]
-            logger.info(f"Created external university in DB: {university_id}")
-
-        # Now shortlist it
-        existing_shortlist = supabase.table("shortlisted_universities").select("*").eq(
-            "user_id", user_id
-        ).eq("university_id", university_id).execute()
+        result = await shortlist_external(
+            supabase, user_id, data.name, data.country, data.category, data.website, data.reasoning
+        )
+        shortlist = result["shortlist"]
 
-        if existing_shortlist.data:
-            # Update category
-            result = supabase.table("shortlisted_universities").update({
-                "category": data.category,
-                "ai_reasoning": data.reasoning
-            }).eq("id", existing_shortlist.data[0]["id"]).execute()
-            logger.info(f"Updated shortlist for external university {university_id}")
-        else:
-            # Insert new shortlist
-            result = supabase.table("shortlisted_universities").insert({
-                "user_id": user_id,
-                "university_id": university_id,
-                "category": data.category,
-                "ai_reasoning": data.reasoning
-            }).execute()
-            logger.info(f"Added external university {university_id} to shortlist")
+        if result["university_created"]:
+            get_catalog().invalidate()
+            logger.info(f"Created external university in DB: {shortlist['university_id']}")
+        logger.info(f"Shortlisted external university {shortlist['university_id']}")
 
-        # Return with full university data
-        final_result = supabase.table("shortlisted_universities").select(
-            "*, university:universities(*)"
-        ).eq("user_id", user_id).eq("university_id", university_id).single().execute()
+        await get_context_cache().invalidate(user_id)
+        # fit_score needs the refreshed catalog; keep it off the response path
+        background_tasks.add_task(store_fit_score, supabase, user_id, shortlist["university_id"])
 
-        return {"message": "External university added to shortlist", "data": final_result.data}
+        return {"message": "External university added to shortlist", "data": shortlist}
 
     except HTTPException:
         raise
@@ -9,6 +9,78 @@ class Settings(BaseSettings):
     elevenlabs_api_key: str = ""
     openai_api_key: str = ""
 
+    # Supabase HTTP connection pool (one pool per worker process)
+    supabase_http2: bool = True
+    supabase_pool_max_connections: int = 50
+    supabase_pool_max_keepalive: int = 20
+    supabase_pool_keepalive_expiry: float = 30.0
+    supabase_timeout: float = 30.0
+
+    # Worker threads used to run blocking PostgREST calls off the event loop
+    db_max_workers: int = 32
+
+    # OpenRouter (OpenAI-compatible) LLM client, shared per worker process
+    openrouter_base_url: str = "https://openrouter.ai/api/v1"
+    llm_timeout: float = 60.0
+    llm_pool_max_connections: int = 100
+    llm_pool_max_keepalive: int = 20
+
+    # LLM gateway: deadlines, retries, hedging and circuit breaking
+    llm_call_timeout: float = 45.0
+    llm_request_deadline: float = 120.0
+    llm_max_retries: int = 2
+    llm_retry_base_delay: float = 0.5
+    llm_retry_max_delay: float = 4.0
+    llm_hedge_enabled: bool = False
+    llm_hedge_percentile: float = 95.0
+    llm_hedge_min_samples: int = 20
+    llm_breaker_failure_threshold: int = 5
+    llm_breaker_reset_timeout: float = 30.0
+
+    # Conversation history packed into the prompt; older turns go into a rolling summary
+    history_token_budget: int = 2000
+    history_fetch_limit: int = 50
+    summary_max_messages: int = 200
+    summary_model: str = "openai/gpt-4o-mini"
+
+    # Intent routing: planning turns use the large model, short/simple turns the fast one
+    planning_model: str = "openai/gpt-4o"
+    fast_model: str = "openai/gpt-4o-mini"
+    intent_routing_enabled: bool = True
+    intent_simple_max_words: int = 12
+
+    # Max tool calls from one model round executed at the same time
+    tool_call_concurrency: int = 4
+
+    # Per-user formatted chat context cache (in-process unless a Redis URL is given)
+    context_cache_ttl: int = 600
+    context_cache_size: int = 10000
+    context_cache_redis_url: str = ""
+
+    # In-memory universities catalog (also feeds the name index), reloaded on this interval
+    catalog_refresh_interval: int = 300
+    # Columnar catalog file (scripts/build_catalog_snapshot.py) that workers map read-only at startup
+    catalog_snapshot_path: str = ""
+
+    # External (Hipo) university search: live API behind a TTL cache, local mirror as fallback
+    hipo_timeout: float = 2.0
+    hipo_cache_ttl: int = 3600
+    hipo_cache_stale_ttl: int = 86400
+    hipo_cache_size: int = 2000
+    hipo_cooldown: float = 60.0
+
+    # Optional JSON file overriding the tasks created when a university is locked
+    task_templates_path: str = ""
+
+    # Auth: "local" verifies JWTs in-process (secret or JWKS), "remote" asks Supabase
+    auth_verification: str = "local"
+    supabase_jwt_secret: str = ""
+    supabase_jwt_audience: str = "authenticated"
+    auth_jwks_ttl: int = 600
+    auth_jwks_min_refresh_interval: int = 30
+    auth_token_cache_size: int = 10000
+    auth_token_cache_max_ttl: int = 300
+
     class Config:
         env_file = ".env"
 
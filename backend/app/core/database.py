@@ -1,7 +1,160 @@
+"""
+Process-wide Supabase client.
+
+A single client (and its pooled, keep-alive httpx session) is created per
+worker process, owned by the FastAPI lifespan and handed to routes through
+the `get_supabase` dependency.
+
+supabase-py is synchronous, so route handlers must not call `.execute()`
+directly. `execute()` / `run_sync()` run the blocking call on a bounded
+thread pool and keep timing metrics.
+"""
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Optional
+
+import httpx
 from supabase import create_client, Client
+from supabase.lib.client_options import SyncClientOptions
+
 from .config import get_settings
+from .logging import get_logger
 
+logger = get_logger("core.database")
 
-def get_supabase() -> Client:
+_client: Optional[Client] = None
+_http_client: Optional[httpx.Client] = None
+_executor: Optional[ThreadPoolExecutor] = None
+_lock = threading.Lock()
+
+
+class DBMetrics:
+    """Counters for offloaded database calls."""
+
+    def __init__(self):
+        self.calls = 0
+        self.errors = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.total_wait = 0.0
+        self.total_time = 0.0
+
+    def snapshot(self) -> dict:
+        completed = max(self.calls - self.in_flight, 1)
+        return {
+            "calls": self.calls,
+            "errors": self.errors,
+            "in_flight": self.in_flight,
+            "max_in_flight": self.max_in_flight,
+            "avg_queue_wait_ms": round(self.total_wait / completed * 1000, 2),
+            "avg_call_ms": round(self.total_time / completed * 1000, 2),
+            "max_workers": get_settings().db_max_workers,
+        }
+
+
+_metrics = DBMetrics()
+
+
+def _build_http_client() -> httpx.Client:
+    """Create the pooled HTTP session shared by PostgREST, auth and storage."""
     settings = get_settings()
-    return create_client(settings.supabase_url, settings.supabase_key)
+    return httpx.Client(
+        http2=settings.supabase_http2,
+        timeout=settings.supabase_timeout,
+        limits=httpx.Limits(
+            max_connections=settings.supabase_pool_max_connections,
+            max_keepalive_connections=settings.supabase_pool_max_keepalive,
+            keepalive_expiry=settings.supabase_pool_keepalive_expiry,
+        ),
+    )
+
+
+def init_supabase() -> Client:
+    """Create the shared Supabase client for this process (idempotent)."""
+    global _client, _http_client
+
+    with _lock:
+        if _client is None:
+            settings = get_settings()
+            _http_client = _build_http_client()
+            _client = create_client(
+                settings.supabase_url,
+                settings.supabase_key,
+                options=SyncClientOptions(httpx_client=_http_client),
+            )
+            logger.info(
+                f"Supabase client pool ready (http2={settings.supabase_http2}, "
+                f"max_connections={settings.supabase_pool_max_connections})"
+            )
+        return _client
+
+
+def close_supabase():
+    """Close the shared HTTP session and worker threads. Called on application shutdown."""
+    global _client, _http_client, _executor
+
+    with _lock:
+        if _executor is not None:
+            _executor.shutdown(wait=False)
+        if _http_client is not None:
+            _http_client.close()
+            logger.info("Supabase client pool closed")
+        _client = None
+        _http_client = None
+        _executor = None
+
+
+def get_supabase() -> Client:
+    """FastAPI dependency returning the pooled Supabase client."""
+    if _client is None:
+        return init_supabase()
+    return _client
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor
+
+    if _executor is None:
+        with _lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(
+                    max_workers=get_settings().db_max_workers,
+                    thread_name_prefix="db"
+                )
+    return _executor
+
+
+async def run_sync(fn: Callable, *args, **kwargs) -> Any:
+    """Run a blocking Supabase call on the DB thread pool without blocking the event loop."""
+    loop = asyncio.get_running_loop()
+    submitted = time.perf_counter()
+    _metrics.calls += 1
+    _metrics.in_flight += 1
+    _metrics.max_in_flight = max(_metrics.max_in_flight, _metrics.in_flight)
+
+    def call():
+        started = time.perf_counter()
+        _metrics.total_wait += started - submitted
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            _metrics.total_time += time.perf_counter() - started
+
+    try:
+        return await loop.run_in_executor(_get_executor(), call)
+    except Exception:
+        _metrics.errors += 1
+        raise
+    finally:
+        _metrics.in_flight -= 1
+
+
+async def execute(query) -> Any:
+    """Await a PostgREST query builder: `await execute(supabase.table(...).select(...))`."""
+    return await run_sync(query.execute)
+
+
+def get_db_metrics() -> dict:
+    return _metrics.snapshot()
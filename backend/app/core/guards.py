@@ -3,15 +3,14 @@ Decision Authority Boundary Guards
 Backend enforces all rules. AI cannot bypass guards.
 """
 from fastapi import HTTPException
-from .database import get_supabase
+from supabase import Client
+from .database import execute
 
 
-def guard_shortlist(user_id: str, university_id: str):
+async def guard_shortlist(supabase: Client, user_id: str, university_id: str):
     """Guard for shortlisting a university."""
-    supabase = get_supabase()
-
     # Check if user has completed onboarding
-    result = supabase.table("profiles").select("*").eq("id", user_id).single().execute()
+    result = await execute(supabase.table("profiles").select("*").eq("id", user_id).single())
     user = result.data
 
     if not user:
@@ -24,12 +23,10 @@ def guard_shortlist(user_id: str, university_id: str):
         raise HTTPException(status_code=403, detail="Not in discovery stage yet")
 
 
-def guard_lock(user_id: str, university_id: str):
+async def guard_lock(supabase: Client, user_id: str, university_id: str):
     """Guard for locking a university."""
-    supabase = get_supabase()
-
     # Check user stage
-    result = supabase.table("profiles").select("*").eq("id", user_id).single().execute()
+    result = await execute(supabase.table("profiles").select("*").eq("id", user_id).single())
     user = result.data
 
     if not user:
@@ -39,21 +36,40 @@ def guard_lock(user_id: str, university_id: str):
         raise HTTPException(status_code=403, detail="Not eligible to lock yet")
 
     # Check if university is shortlisted
-    shortlist = supabase.table("shortlisted_universities").select("*").eq("user_id", user_id).eq("university_id", university_id).execute()
+    shortlist = await execute(supabase.table("shortlisted_universities").select("*").eq("user_id", user_id).eq("university_id", university_id))
 
     if not shortlist.data:
         raise HTTPException(status_code=403, detail="Must shortlist before locking")
 
 
-def guard_create_task(user_id: str, university_id: str = None):
+async def guard_bulk_shortlist(supabase: Client, user_id: str):
+    """Guard for shortlisting a batch of universities (same rules, checked once)."""
+    await guard_shortlist(supabase, user_id, None)
+
+
+async def guard_bulk_lock(supabase: Client, user_id: str):
+    """Guard for locking a batch of universities.
+
+    Only the stage is checked here; the lock RPC reports universities that
+    are not shortlisted per item instead of failing the whole batch.
+    """
+    result = await execute(supabase.table("profiles").select("*").eq("id", user_id).single())
+    user = result.data
+
+    if not user:
+        raise HTTPException(status_code=404, detail="User not found")
+
+    if user.get("current_stage", 1) < 2:
+        raise HTTPException(status_code=403, detail="Not eligible to lock yet")
+
+
+async def guard_create_task(supabase: Client, user_id: str, university_id: str = None):
     """Guard for creating tasks."""
     if not university_id:
         return  # General tasks allowed
 
-    supabase = get_supabase()
-
     # Check if university is locked
-    locked = supabase.table("shortlisted_universities").select("*").eq("user_id", user_id).eq("university_id", university_id).eq("is_locked", True).execute()
+    locked = await execute(supabase.table("shortlisted_universities").select("*").eq("user_id", user_id).eq("university_id", university_id).eq("is_locked", True))
 
     if not locked.data:
         raise HTTPException(status_code=403, detail="Lock university before creating application tasks")
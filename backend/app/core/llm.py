@@ -0,0 +1,127 @@
+"""
+Process-wide async LLM client.
+
+One AsyncOpenAI client pointed at OpenRouter, with a pooled keep-alive
+httpx session, is created per worker in the FastAPI lifespan and shared
+by the counsellor and SOP routes through the LLM gateway
+(app.core.llm_gateway), which owns timeouts, retries and circuit breaking.
+
+Prompt-token usage is recorded per call, split into cached and uncached
+prompt tokens as reported by OpenRouter, so the effect of provider-side
+prompt caching on latency and time-to-first-token can be measured.
+"""
+from typing import Optional
+
+import httpx
+from openai import AsyncOpenAI
+
+from .config import get_settings
+from .logging import get_logger
+
+logger = get_logger("core.llm")
+
+_client: Optional[AsyncOpenAI] = None
+_http_client: Optional[httpx.AsyncClient] = None
+
+
+class LLMUsageMetrics:
+    """Token usage and latency, split by whether the prompt hit the provider cache."""
+
+    def __init__(self):
+        self.calls = 0
+        self.prompt_tokens = 0
+        self.cached_prompt_tokens = 0
+        self.completion_tokens = 0
+        self.by_cache = {
+            "cached": {"calls": 0, "latency": 0.0, "ttft_calls": 0, "ttft": 0.0},
+            "uncached": {"calls": 0, "latency": 0.0, "ttft_calls": 0, "ttft": 0.0},
+        }
+
+    def record(self, usage, latency: float, ttft: Optional[float] = None):
+        """Record one completion's usage; `ttft` is time to first token for streamed calls."""
+        self.calls += 1
+        if usage is None:
+            return
+
+        details = getattr(usage, "prompt_tokens_details", None)
+        cached = getattr(details, "cached_tokens", 0) or 0
+
+        self.prompt_tokens += usage.prompt_tokens or 0
+        self.cached_prompt_tokens += cached
+        self.completion_tokens += usage.completion_tokens or 0
+
+        bucket = self.by_cache["cached" if cached else "uncached"]
+        bucket["calls"] += 1
+        bucket["latency"] += latency
+        if ttft is not None:
+            bucket["ttft_calls"] += 1
+            bucket["ttft"] += ttft
+
+    def snapshot(self) -> dict:
+        def averages(bucket: dict) -> dict:
+            return {
+                "calls": bucket["calls"],
+                "avg_latency_ms": round(bucket["latency"] / bucket["calls"] * 1000, 1) if bucket["calls"] else None,
+                "avg_ttft_ms": round(bucket["ttft"] / bucket["ttft_calls"] * 1000, 1) if bucket["ttft_calls"] else None,
+            }
+
+        return {
+            "calls": self.calls,
+            "prompt_tokens": self.prompt_tokens,
+            "cached_prompt_tokens": self.cached_prompt_tokens,
+            "cached_prompt_ratio": round(self.cached_prompt_tokens / self.prompt_tokens, 3) if self.prompt_tokens else None,
+            "completion_tokens": self.completion_tokens,
+            "cached": averages(self.by_cache["cached"]),
+            "uncached": averages(self.by_cache["uncached"]),
+        }
+
+
+_usage = LLMUsageMetrics()
+
+
+def init_llm_client() -> AsyncOpenAI:
+    """Create the shared LLM client for this process (idempotent)."""
+    global _client, _http_client
+
+    if _client is None:
+        settings = get_settings()
+        if not settings.openrouter_api_key:
+            logger.warning("OPENROUTER_API_KEY is not set - AI requests will fail authentication")
+
+        _http_client = httpx.AsyncClient(
+            timeout=settings.llm_timeout,
+            limits=httpx.Limits(
+                max_connections=settings.llm_pool_max_connections,
+                max_keepalive_connections=settings.llm_pool_max_keepalive,
+            ),
+        )
+        _client = AsyncOpenAI(
+            api_key=settings.openrouter_api_key or "not-configured",
+            base_url=settings.openrouter_base_url,
+            http_client=_http_client,
+            max_retries=0  # retries are handled by the gateway
+        )
+        logger.info(f"LLM client ready ({settings.openrouter_base_url})")
+    return _client
+
+
+async def close_llm_client():
+    """Close the shared HTTP session. Called on application shutdown."""
+    global _client, _http_client
+
+    if _http_client is not None:
+        await _http_client.aclose()
+        logger.info("LLM client closed")
+    _client = None
+    _http_client = None
+
+
+def get_llm_client() -> AsyncOpenAI:
+    """Return the shared AsyncOpenAI client."""
+    if _client is None:
+        return init_llm_client()
+    return _client
+
+
+def get_llm_usage() -> LLMUsageMetrics:
+    return _usage
@@ -0,0 +1,378 @@
+"""
+Resilient gateway in front of the shared LLM client.
+
+Every OpenRouter call goes through `LLMGateway`, which adds:
+- a per-call timeout (LLM_CALL_TIMEOUT) and a per-request deadline set
+  with `llm_deadline()` that bounds every call and retry made inside it
+- retries of transient failures with full-jitter exponential backoff
+- optional hedging: a duplicate request once the call has run longer
+  than the observed latency percentile, first response wins
+- a circuit breaker that fails fast with LLMUnavailableError while the
+  provider is unhealthy
+
+Point OPENROUTER_BASE_URL at scripts/fake_openrouter.py to exercise all of
+this locally.
+"""
+import asyncio
+import math
+import random
+import time
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Optional
+
+import httpx
+import openai
+
+from .config import get_settings
+from .llm import get_llm_client, get_llm_usage
+from .logging import get_logger
+
+logger = get_logger("core.llm_gateway")
+
+# Failures that say nothing about the request itself and are worth retrying
+RETRYABLE_ERRORS = (
+    asyncio.TimeoutError,
+    openai.APIConnectionError,
+    openai.InternalServerError,
+    openai.RateLimitError,
+)
+
+_deadline: ContextVar[Optional[float]] = ContextVar("llm_deadline", default=None)
+
+
+class LLMGatewayError(Exception):
+    """Base class for failures raised by the gateway itself."""
+    pass
+
+
+class LLMUnavailableError(LLMGatewayError):
+    """The circuit breaker is open; the provider is considered unhealthy."""
+
+    def __init__(self, message: str, retry_after: int):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class LLMTimeoutError(LLMGatewayError):
+    """A call or the request deadline ran out."""
+    pass
+
+
+@contextmanager
+def llm_deadline(seconds: float):
+    """Bound all LLM calls made inside this block (one user request) by `seconds` in total."""
+    token = _deadline.set(time.monotonic() + seconds)
+    try:
+        yield
+    finally:
+        _deadline.reset(token)
+
+
+def ai_error_response(e: Exception) -> tuple[int, dict]:
+    """Map an AI service failure to an HTTP status and error payload."""
+    if isinstance(e, LLMUnavailableError):
+        logger.warning(f"AI service circuit open: {str(e)}")
+        return 503, {
+            "error": "service_unavailable",
+            "message": "AI service is temporarily unavailable. Please wait a moment and try again.",
+            "retry_after": e.retry_after
+        }
+
+    if isinstance(e, httpx.ConnectError):
+        logger.error(f"Connection error to AI service: {str(e)}")
+        return 503, {
+            "error": "service_unavailable",
+            "message": "AI service is currently starting up. Please wait a moment and try again.",
+            "retry_after": 30
+        }
+
+    if isinstance(e, (LLMTimeoutError, httpx.TimeoutException, openai.APITimeoutError)):
+        logger.error(f"Timeout connecting to AI service: {str(e)}")
+        return 504, {
+            "error": "gateway_timeout",
+            "message": "AI service is taking too long to respond. Please try again.",
+            "retry_after": 15
+        }
+
+    if isinstance(e, openai.RateLimitError):
+        logger.warning(f"Rate limit exceeded: {str(e)}")
+        return 429, {
+            "error": "rate_limit",
+            "message": "Too many requests. Please wait a moment before trying again.",
+            "retry_after": 60
+        }
+
+    if isinstance(e, openai.AuthenticationError):
+        logger.error(f"AI service authentication error: {str(e)}")
+        return 500, {
+            "error": "configuration_error",
+            "message": "AI service configuration error. Please contact support."
+        }
+
+    if isinstance(e, openai.APIError):
+        logger.error(f"OpenAI API error: {str(e)}")
+        return 502, {
+            "error": "ai_service_error",
+            "message": "AI service encountered an error. Please try again.",
+            "retry_after": 10
+        }
+
+    logger.error(f"Unexpected error in AI request: {type(e).__name__}: {str(e)}")
+    return 500, {
+        "error": "internal_error",
+        "message": "An unexpected error occurred. Please try again."
+    }
+
+
+class CircuitBreaker:
+    """Opens after consecutive provider failures; lets one probe through after the cooldown."""
+
+    def __init__(self, failure_threshold: int, reset_timeout: float):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = "closed"
+        self.failures = 0
+        self.opened_at = 0.0
+        self.probe_in_flight = False
+        self.short_circuits = 0
+
+    def before_call(self):
+        if self.state == "open":
+            remaining = self.reset_timeout - (time.monotonic() - self.opened_at)
+            if remaining > 0:
+                self.short_circuits += 1
+                raise LLMUnavailableError("LLM circuit breaker is open", retry_after=math.ceil(remaining))
+            self.state = "half_open"
+            self.probe_in_flight = False
+
+        if self.state == "half_open":
+            if self.probe_in_flight:
+                self.short_circuits += 1
+                raise LLMUnavailableError("LLM circuit breaker is probing", retry_after=math.ceil(self.reset_timeout))
+            self.probe_in_flight = True
+
+    def record_success(self):
+        if self.state != "closed":
+            logger.info("LLM circuit breaker closed")
+        self.state = "closed"
+        self.failures = 0
+        self.probe_in_flight = False
+
+    def record_failure(self):
+        self.failures += 1
+        if self.state == "half_open" or self.failures >= self.failure_threshold:
+            if self.state != "open":
+                logger.warning(f"LLM circuit breaker opened after {self.failures} failures")
+            self.state = "open"
+            self.opened_at = time.monotonic()
+            self.probe_in_flight = False
+
+    def record_cancelled(self):
+        """A call was cancelled before it finished; only a half-open probe needs settling."""
+        if self.state == "half_open" and self.probe_in_flight:
+            self.record_failure()
+
+
+class LatencyTracker:
+    """Rolling window of successful call latencies."""
+
+    def __init__(self, size: int = 200):
+        self.samples = deque(maxlen=size)
+
+    def add(self, seconds: float):
+        self.samples.append(seconds)
+
+    def percentile(self, p: float, min_samples: int) -> Optional[float]:
+        if len(self.samples) < min_samples:
+            return None
+        ordered = sorted(self.samples)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * p / 100))]
+
+
+class LLMGateway:
+    def __init__(self):
+        settings = get_settings()
+        self.breaker = CircuitBreaker(settings.llm_breaker_failure_threshold, settings.llm_breaker_reset_timeout)
+        self.latencies = LatencyTracker()
+        self.retries = 0
+        self.timeouts = 0
+        self.hedges = 0
+        self.hedge_wins = 0
+
+    def _call_timeout(self) -> float:
+        """Per-call timeout, shortened to whatever is left of the request deadline."""
+        timeout = get_settings().llm_call_timeout
+        deadline = _deadline.get()
+        if deadline is not None:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise LLMTimeoutError("LLM request deadline exceeded")
+            timeout = min(timeout, remaining)
+        return timeout
+
+    def _backoff(self, attempt: int) -> float:
+        settings = get_settings()
+        return random.uniform(0, min(settings.llm_retry_max_delay, settings.llm_retry_base_delay * 2 ** attempt))
+
+    async def _with_retries(self, open_call):
+        """Run `open_call(timeout)` under the breaker, retrying transient failures."""
+        settings = get_settings()
+        attempt = 0
+
+        while True:
+            timeout = self._call_timeout()
+            self.breaker.before_call()
+            try:
+                result = await open_call(timeout)
+            except RETRYABLE_ERRORS as e:
+                self.breaker.record_failure()
+                if isinstance(e, asyncio.TimeoutError):
+                    self.timeouts += 1
+
+                delay = self._backoff(attempt)
+                deadline = _deadline.get()
+                out_of_time = deadline is not None and time.monotonic() + delay >= deadline
+                if attempt >= settings.llm_max_retries or out_of_time:
+                    if isinstance(e, asyncio.TimeoutError):
+                        raise LLMTimeoutError("LLM call timed out") from e
+                    raise
+
+                attempt += 1
+                self.retries += 1
+                logger.warning(f"LLM call failed ({type(e).__name__}), retry {attempt} in {delay:.2f}s")
+                await asyncio.sleep(delay)
+                continue
+            except LLMGatewayError:
+                raise
+            except asyncio.CancelledError:
+                # A cancelled probe (client gone, outer timeout) proved nothing; reopen
+                # rather than leave every later call waiting on a probe that never ends
+                self.breaker.record_cancelled()
+                raise
+            except Exception:
+                # The provider answered (e.g. bad request); it is healthy
+                self.breaker.record_success()
+                raise
+
+            self.breaker.record_success()
+            return result
+
+    def _hedge_delay(self) -> Optional[float]:
+        settings = get_settings()
+        if not settings.llm_hedge_enabled:
+            return None
+        return self.latencies.percentile(settings.llm_hedge_percentile, settings.llm_hedge_min_samples)
+
+    async def _hedged(self, params: dict, delay: float):
+        """Start a backup request if the primary is still running after `delay`; first success wins."""
+        client = get_llm_client()
+        tasks = [asyncio.ensure_future(client.chat.completions.create(**params))]
+        try:
+            done, _ = await asyncio.wait(tasks, timeout=delay)
+            if done:
+                return tasks[0].result()
+
+            self.hedges += 1
+            tasks.append(asyncio.ensure_future(client.chat.completions.create(**params)))
+
+            pending = set(tasks)
+            error = None
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        if task is tasks[1]:
+                            self.hedge_wins += 1
+                        return task.result()
+                    error = task.exception()
+            raise error
+        finally:
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
+
+    async def complete(self, **params):
+        """Chat completion with timeouts, retries, optional hedging and the circuit breaker."""
+        async def open_call(timeout: float):
+            hedge_after = self._hedge_delay()
+            if hedge_after is not None and hedge_after < timeout:
+                return await asyncio.wait_for(self._hedged(params, hedge_after), timeout)
+            return await asyncio.wait_for(get_llm_client().chat.completions.create(**params), timeout)
+
+        started = time.perf_counter()
+        response = await self._with_retries(open_call)
+        latency = time.perf_counter() - started
+
+        self.latencies.add(latency)
+        get_llm_usage().record(response.usage, latency)
+        return response
+
+    async def stream(self, **params):
+        """
+        Streamed chat completion. Opening the stream is retried like complete();
+        afterwards each chunk must arrive within the call timeout / request deadline.
+        """
+        params = {**params, "stream": True, "stream_options": {"include_usage": True}}
+
+        async def open_call(timeout: float):
+            return await asyncio.wait_for(get_llm_client().chat.completions.create(**params), timeout)
+
+        started = time.perf_counter()
+        stream = await self._with_retries(open_call)
+
+        usage = None
+        first_token_at = None
+        iterator = stream.__aiter__()
+        while True:
+            try:
+                chunk = await asyncio.wait_for(iterator.__anext__(), self._call_timeout())
+            except StopAsyncIteration:
+                break
+            except asyncio.TimeoutError as e:
+                self.timeouts += 1
+                self.breaker.record_failure()
+                raise LLMTimeoutError("LLM stream stalled") from e
+
+            if chunk.usage:
+                usage = chunk.usage
+            if first_token_at is None and chunk.choices:
+                first_token_at = time.perf_counter()
+            yield chunk
+
+        finished_at = time.perf_counter()
+        get_llm_usage().record(usage, finished_at - started, ttft=(first_token_at or finished_at) - started)
+
+    def stats(self) -> dict:
+        settings = get_settings()
+        return {
+            "breaker_state": self.breaker.state,
+            "consecutive_failures": self.breaker.failures,
+            "short_circuits": self.breaker.short_circuits,
+            "retries": self.retries,
+            "timeouts": self.timeouts,
+            "hedges": self.hedges,
+            "hedge_wins": self.hedge_wins,
+            "p50_ms": _ms(self.latencies.percentile(50, 1)),
+            "p95_ms": _ms(self.latencies.percentile(95, 1)),
+            "hedge_after_ms": _ms(self._hedge_delay()),
+            "call_timeout_s": settings.llm_call_timeout,
+            "request_deadline_s": settings.llm_request_deadline,
+        }
+
+
+def _ms(seconds: Optional[float]) -> Optional[float]:
+    return round(seconds * 1000, 1) if seconds is not None else None
+
+
+_gateway: Optional[LLMGateway] = None
+
+
+def get_llm_gateway() -> LLMGateway:
+    """FastAPI dependency returning the process-wide LLM gateway."""
+    global _gateway
+
+    if _gateway is None:
+        _gateway = LLMGateway()
+    return _gateway
@@ -1,22 +1,196 @@
+import asyncio
+import time
+from collections import OrderedDict
+from typing import Optional
+
+import httpx
 from fastapi import HTTPException, Depends
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from .database import get_supabase
+from jose import jwt, JWTError
+from supabase import Client
+from .config import get_settings
+from .database import get_supabase, run_sync
+from .logging import get_logger
 
 security = HTTPBearer()
+logger = get_logger("core.security")
+
+HMAC_ALGORITHMS = {"HS256", "HS384", "HS512"}
+ASYMMETRIC_ALGORITHMS = {"RS256", "ES256"}
+
+
+class TokenCache:
+    """Bounded LRU of verified tokens. Entries expire with the token itself."""
+
+    def __init__(self, max_size: int):
+        self.max_size = max_size
+        self._entries: OrderedDict[str, tuple[str, float]] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, token: str) -> Optional[str]:
+        entry = self._entries.get(token)
+        if entry is None:
+            self.misses += 1
+            return None
+
+        user_id, expires_at = entry
+        if expires_at <= time.time():
+            del self._entries[token]
+            self.misses += 1
+            return None
+
+        self._entries.move_to_end(token)
+        self.hits += 1
+        return user_id
+
+    def put(self, token: str, user_id: str, expires_at: float):
+        if self.max_size <= 0:
+            return
+        self._entries[token] = (user_id, expires_at)
+        self._entries.move_to_end(token)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def stats(self) -> dict:
+        return {"size": len(self._entries), "hits": self.hits, "misses": self.misses}
+
+
+_token_cache = TokenCache(get_settings().auth_token_cache_size)
+_jwks: dict = {"keys": [], "fetched_at": 0.0, "attempted_at": 0.0}
+_jwks_lock = asyncio.Lock()
+_jwks_client: Optional[httpx.AsyncClient] = None
+
+
+def get_token_cache() -> TokenCache:
+    return _token_cache
+
+
+def _get_jwks_client() -> httpx.AsyncClient:
+    global _jwks_client
+
+    if _jwks_client is None:
+        _jwks_client = httpx.AsyncClient(timeout=5.0)
+    return _jwks_client
+
+
+async def close_auth_client():
+    global _jwks_client
+
+    if _jwks_client is not None:
+        await _jwks_client.aclose()
+        _jwks_client = None
 
 
-async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security)):
-    """Verify token using Supabase and return user ID."""
+async def _refresh_jwks():
+    """Fetch the JWKS, at most once per `auth_jwks_min_refresh_interval`; failures keep the old keys."""
+    settings = get_settings()
+    async with _jwks_lock:
+        if time.time() - _jwks["attempted_at"] < settings.auth_jwks_min_refresh_interval:
+            return
+        _jwks["attempted_at"] = time.time()
+
+        url = f"{settings.supabase_url.rstrip('/')}/auth/v1/.well-known/jwks.json"
+        try:
+            response = await _get_jwks_client().get(url)
+            response.raise_for_status()
+            _jwks["keys"] = response.json().get("keys", [])
+            _jwks["fetched_at"] = time.time()
+        except (httpx.HTTPError, ValueError, AttributeError) as e:
+            logger.warning(f"JWKS fetch failed ({type(e).__name__}), keeping {len(_jwks['keys'])} cached keys")
+
+
+async def _get_jwk(kid: str, force_refresh: bool = False) -> Optional[dict]:
+    """Look up a signing key from the project's JWKS endpoint (cached)."""
+    stale = time.time() - _jwks["fetched_at"] > get_settings().auth_jwks_ttl
+
+    if force_refresh or stale or not _jwks["keys"]:
+        await _refresh_jwks()
+
+    return next((k for k in _jwks["keys"] if k.get("kid") == kid), None)
+
+
+async def verify_token_locally(token: str) -> Optional[dict]:
+    """
+    Verify signature, expiry and audience of a Supabase JWT in-process.
+    Returns the claims, or None when no key material is available locally.
+    Raises JWTError for tokens that are invalid.
+    """
+    settings = get_settings()
+    header = jwt.get_unverified_header(token)
+    alg = header.get("alg")
+
+    if alg in HMAC_ALGORITHMS:
+        if not settings.supabase_jwt_secret:
+            return None
+        key = settings.supabase_jwt_secret
+    elif alg in ASYMMETRIC_ALGORITHMS:
+        kid = header.get("kid")
+        key = await _get_jwk(kid)
+        if key is None:
+            # Keys may have been rotated since the last fetch
+            key = await _get_jwk(kid, force_refresh=True)
+        if key is None:
+            if not _jwks["keys"] or _jwks["attempted_at"] > _jwks["fetched_at"]:
+                return None  # JWKS unavailable: Supabase verifies the token instead
+            raise JWTError("Unknown signing key")
+    else:
+        raise JWTError(f"Unsupported token algorithm: {alg}")
+
+    return jwt.decode(
+        token,
+        key,
+        algorithms=[alg],
+        audience=settings.supabase_jwt_audience,
+    )
+
+
+def verify_token_remotely(supabase: Client, token: str) -> Optional[str]:
+    """Verify a token by asking Supabase Auth. Returns the user ID."""
+    user_response = supabase.auth.get_user(token)
+
+    if not user_response or not user_response.user:
+        return None
+
+    return user_response.user.id
+
+
+async def get_current_user(
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    supabase: Client = Depends(get_supabase)
+):
+    """Verify token (locally when possible, else via Supabase) and return user ID."""
     token = credentials.credentials
 
+    user_id = _token_cache.get(token)
+    if user_id:
+        return user_id
+
+    settings = get_settings()
+
     try:
-        supabase = get_supabase()
-        # Use Supabase to verify the token
-        user_response = supabase.auth.get_user(token)
+        claims = None
+        if settings.auth_verification == "local":
+            claims = await verify_token_locally(token)
 
-        if not user_response or not user_response.user:
+        if claims is not None:
+            user_id = claims.get("sub")
+            expires_at = claims["exp"]
+        else:
+            # Remote fallback: no local key material or remote mode configured
+            user_id = await run_sync(verify_token_remotely, supabase, token)
+            expires_at = jwt.get_unverified_claims(token).get("exp", 0)
+
+        if not user_id:
             raise HTTPException(status_code=401, detail="Invalid token")
 
-        return user_response.user.id
-    except Exception:
+        # Never trust a cached token longer than the cap, so revocations catch up
+        expires_at = min(expires_at, time.time() + settings.auth_token_cache_max_ttl)
+        _token_cache.put(token, user_id, expires_at)
+
+        return user_id
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.debug(f"Token verification failed: {type(e).__name__}")
         raise HTTPException(status_code=401, detail="Invalid token")
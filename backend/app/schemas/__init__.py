@@ -31,6 +31,14 @@ class ShortlistRequest(BaseModel):
     reasoning: Optional[str] = None
 
 
+class BulkShortlistRequest(BaseModel):
+    items: List[ShortlistRequest]
+
+
+class BulkLockRequest(BaseModel):
+    university_ids: List[str]
+
+
 class TaskCreate(BaseModel):
     title: str
     description: Optional[str] = None
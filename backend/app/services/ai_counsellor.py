@@ -1,23 +1,35 @@
+import asyncio
 import json
-from openai import OpenAI
+import time
+from typing import Optional
+from supabase import Client
 from ..core.config import get_settings
-from ..core.database import get_supabase
-
-# OpenRouter configuration
-OPENROUTER_BASE_URL = "https://openrouter.ai/api/v1"
-MODEL = "openai/gpt-4o"
-
+from ..core.database import get_supabase, execute
+from ..core.llm_gateway import LLMGateway, get_llm_gateway
+from ..core.logging import get_logger
+from .catalog import get_catalog
+from .context_cache import get_context_cache
+from .history import load_history, update_rolling_summary
+from .intent_router import ROUTE_CREATE_TASKS, classify_message, get_route_metrics, planning_route
+from .recommendations import get_recommendations, trim_buckets
+from .shortlist import lock_and_provision, shortlist_fit_score
+from .task_templates import render_task_templates
+from .university_index import get_university_index
+
+logger = get_logger("services.ai_counsellor")
+
+MAX_TOOL_ROUNDS = 5  # Prevent infinite tool-call loops
+SEARCH_LIMIT = 5
+SEARCH_FIELDS = ("id", "name", "country", "ranking", "tuition_max", "acceptance_rate")
+
+# Prompt layout is cache-friendly: TOOLS and SYSTEM_PROMPT are identical for every
+# user and request, so providers can reuse that prefix. Everything per-user goes
+# into CONTEXT_PROMPT, sent as a separate message after it.
 SYSTEM_PROMPT = """
 You are an expert study-abroad counsellor guiding students through a strict, stage-based decision process.
 You are NOT a general chatbot. You are a decision guide.
 
-User Profile:
-{user_profile}
-
-Current Stage: {stage}
-
-Shortlisted Universities:
-{shortlist}
+The student's profile, current stage, shortlist and precomputed recommendations are provided in the next message.
 
 ====================
 NON-NEGOTIABLE RULES
@@ -35,7 +47,8 @@ WHEN USER ASKS FOR RECOMMENDATIONS
 ====================
 
 If the user asks "recommend universities" or similar:
-- ALWAYS search and recommend universities using search_universities tool
+- START from the precomputed Dream / Target / Safe recommendations - they are already scored against the profile (GPA, budget, countries)
+- Only call search_universities when the user asks for something those lists don't cover (a specific name, program or filter)
 - Evaluate their CURRENT shortlist - are these good choices? Why or why not?
 - Suggest alternatives or additions based on their profile
 - Use bullet points with bold university names
@@ -73,17 +86,14 @@ You can:
   - create_task
   - search_universities
 
-CRITICAL - UNIVERSITY ID WORKFLOW:
-- University IDs are UUIDs (e.g., "a1b2c3d4-e5f6-..."), NOT names like "Harvard"
-- You MUST call search_universities FIRST to find the university and get its actual UUID
-- ONLY THEN can you call shortlist_university or lock_university with that UUID
-- If a university is not found in search results, tell the user it's not in the database
-- NEVER guess or make up a university ID
+CRITICAL - UNIVERSITY NAMES AND IDS:
+- shortlist_university, lock_university and create_task accept university_name - pass the name directly, the server resolves it
+- Do NOT call search_universities just to look up an id
+- If a tool replies that a name is ambiguous or not found, tell the user (or retry with the exact name it suggests)
+- NEVER guess or make up a university ID - use university_id only when you already have it
 
-Example workflow when user says "shortlist Harvard":
-1. Call search_universities to find Harvard
-2. Get the UUID from the search results (e.g., "uuid-from-results")
-3. Call shortlist_university with that actual UUID
+Example when user says "shortlist Harvard":
+1. Call shortlist_university with university_name="Harvard" and the category
 
 CRITICAL - TASK CREATION RULES:
 - ALWAYS check the user's profile before creating tasks
@@ -96,13 +106,12 @@ CRITICAL - WHEN USER ASKS TO CREATE TASKS:
 - If user says "create tasks", "make a todo list", "add tasks", etc. - YOU MUST CALL create_task TOOL
 - DO NOT just describe tasks - ACTUALLY CREATE THEM by calling the create_task function
 - Create each task separately by calling create_task multiple times
-- For university-specific tasks, first search for the university to get its UUID, then use that university_id
+- For university-specific tasks, pass university_name on each create_task call
 - After creating tasks, confirm what you created: "I've created X tasks for you: [list them]"
 
 Example when user says "create tasks for Harvard":
-1. Call search_universities with name="Harvard" to get the UUID
-2. Call create_task for each task (SOP, test prep, application, etc.) with that university_id
-3. Confirm: "I've created 4 tasks for your Harvard application"
+1. Call create_task for each task (SOP, test prep, application, etc.) with university_name="Harvard"
+2. Confirm: "I've created 4 tasks for your Harvard application"
 
 IMPORTANT:
 - When an action makes sense, CALL THE TOOL instead of describing the action.
@@ -138,6 +147,19 @@ When listing universities, use this format:
 
 """
 
+CONTEXT_PROMPT = """
+User Profile:
+{user_profile}
+
+Current Stage: {stage}
+
+Shortlisted Universities:
+{shortlist}
+
+Recommended Universities (precomputed fit, not yet shortlisted):
+{recommendations}
+"""
+
 TOOLS = [
     {
         "type": "function",
@@ -147,11 +169,12 @@ TOOLS = [
             "parameters": {
                 "type": "object",
                 "properties": {
-                    "university_id": {"type": "string", "description": "UUID of the university"},
+                    "university_name": {"type": "string", "description": "Name of the university, e.g. \"MIT\" or \"University of Toronto\""},
+                    "university_id": {"type": "string", "description": "UUID of the university, if already known"},
                     "category": {"type": "string", "enum": ["dream", "target", "safe"]},
                     "reasoning": {"type": "string", "description": "Why this category fits"}
                 },
-                "required": ["university_id", "category", "reasoning"]
+                "required": ["category", "reasoning"]
             }
         }
     },
@@ -163,9 +186,9 @@ TOOLS = [
             "parameters": {
                 "type": "object",
                 "properties": {
-                    "university_id": {"type": "string", "description": "UUID of the university"}
-                },
-                "required": ["university_id"]
+                    "university_name": {"type": "string", "description": "Name of the university"},
+                    "university_id": {"type": "string", "description": "UUID of the university, if already known"}
+                }
             }
         }
     },
@@ -180,7 +203,8 @@ TOOLS = [
                     "title": {"type": "string"},
                     "description": {"type": "string"},
                     "category": {"type": "string", "enum": ["Exams", "Documents", "Applications", "Other"]},
-                    "university_id": {"type": "string", "description": "Optional: link to a specific university"}
+                    "university_name": {"type": "string", "description": "Optional: link to a specific university by name"},
+                    "university_id": {"type": "string", "description": "Optional: link to a specific university by UUID"}
                 },
                 "required": ["title"]
             }
@@ -190,11 +214,11 @@ TOOLS = [
         "type": "function",
         "function": {
             "name": "search_universities",
-            "description": "Search for universities matching criteria. Use this to find university UUIDs before shortlisting or locking.",
+            "description": "Search for universities matching criteria. Not needed just to look up an id - the other tools accept university_name.",
             "parameters": {
                 "type": "object",
                 "properties": {
-                    "name": {"type": "string", "description": "University name to search for (partial match)"},
+                    "name": {"type": "string", "description": "University name or short name to search for (typo-tolerant)"},
                     "country": {"type": "string"},
                     "max_tuition": {"type": "integer"},
                     "program": {"type": "string"}
@@ -206,26 +230,23 @@ TOOLS = [
 
 
 class AICounsellor:
-    def __init__(self):
-        settings = get_settings()
-        self.client = OpenAI(
-            api_key=settings.openrouter_api_key,
-            base_url=OPENROUTER_BASE_URL
+    def __init__(self, supabase: Client = None, llm: LLMGateway = None):
+        self.llm = llm or get_llm_gateway()
+        self.supabase = supabase or get_supabase()
+        self.pending_summary = None
+
+    async def get_user_context(self, user_id: str) -> dict:
+        """Get user's profile and current state (queries run concurrently)."""
+        profile, user_profile, shortlist = await asyncio.gather(
+            # Get profile
+            execute(self.supabase.table("profiles").select("*").eq("id", user_id).single()),
+            # Get user profile
+            execute(self.supabase.table("user_profiles").select("*").eq("user_id", user_id).single()),
+            # Get shortlist
+            execute(self.supabase.table("shortlisted_universities").select(
+                "*, university:universities(name, country, ranking)"
+            ).eq("user_id", user_id))
         )
-        self.supabase = get_supabase()
-
-    def get_user_context(self, user_id: str) -> dict:
-        """Get user's profile and current state."""
-        # Get profile
-        profile = self.supabase.table("profiles").select("*").eq("id", user_id).single().execute()
-
-        # Get user profile
-        user_profile = self.supabase.table("user_profiles").select("*").eq("user_id", user_id).single().execute()
-
-        # Get shortlist
-        shortlist = self.supabase.table("shortlisted_universities").select(
-            "*, university:universities(name, country, ranking)"
-        ).eq("user_id", user_id).execute()
 
         return {
             "profile": profile.data,
@@ -260,95 +281,97 @@ class AICounsellor:
 """
 
         shortlist_str = "\n".join([
-            f"- {s['university']['name']} ({s['category']}, {'Locked' if s['is_locked'] else 'Not locked'})"
+            f"- {s['university']['name']} ({s['category']}, {'Locked' if s['is_locked'] else 'Not locked'}"
+            f"{', fit ' + str(s['fit_score']) + '/100' if s.get('fit_score') is not None else ''})"
             for s in shortlist
         ]) if shortlist else "None yet"
 
         return user_profile_str, shortlist_str, profile.get("current_stage", 1)
 
-    def execute_function(self, user_id: str, name: str, args: dict) -> str:
+    def format_recommendations(self, context: dict, buckets: dict) -> str:
+        """Precomputed dream/target/safe buckets, excluding what's already shortlisted."""
+        shortlisted = {s["university_id"] for s in context.get("shortlist") or []}
+
+        sections = []
+        for category, universities in trim_buckets(buckets, shortlisted).items():
+            lines = [
+                f"- {uni['name']} ({uni['country']}) - fit {uni['fit_score']}/100, "
+                f"admit chance ~{uni['admit_chance']:.0%}"
+                + (f", tuition up to ${uni['tuition_max']:,}" if uni.get("tuition_max") else "")
+                + (f", rank #{uni['ranking']}" if uni.get("ranking") else "")
+                for uni in universities
+            ]
+            sections.append(f"{category.capitalize()}:\n" + ("\n".join(lines) if lines else "- None matching the profile"))
+        return "\n".join(sections)
+
+    async def execute_function(self, user_id: str, name: str, args: dict) -> str:
         """Execute a function call and return result."""
         try:
+            # run_tool_calls fills university_id from university_name; anything left is a miss
+            if args.get("university_name") and not args.get("university_id"):
+                if name in ("shortlist_university", "lock_university", "create_task"):
+                    return self.describe_unresolved(args["university_name"])
+
             if name == "shortlist_university":
-                self.supabase.table("shortlisted_universities").upsert({
+                fit_score = await shortlist_fit_score(self.supabase, user_id, args["university_id"])
+                await execute(self.supabase.table("shortlisted_universities").upsert({
                     "user_id": user_id,
                     "university_id": args["university_id"],
                     "category": args["category"],
-                    "ai_reasoning": args.get("reasoning")
-                }, on_conflict="user_id,university_id").execute()
-                return f"Added to shortlist as {args['category']}"
+                    "ai_reasoning": args.get("reasoning"),
+                    "fit_score": fit_score
+                }, on_conflict="user_id,university_id"))
+                await get_context_cache().invalidate(user_id)
+                if fit_score is None:
+                    return f"Added to shortlist as {args['category']}"
+                return f"Added to shortlist as {args['category']} (fit score {fit_score}/100)"
 
             elif name == "lock_university":
-                university_id = args["university_id"]
-
-                # Lock the university
-                self.supabase.table("shortlisted_universities").update({
-                    "is_locked": True
-                }).eq("user_id", user_id).eq("university_id", university_id).execute()
-
-                # Get university name for task titles
-                uni_result = self.supabase.table("universities").select("name").eq("id", university_id).single().execute()
-                uni_name = uni_result.data.get("name", "University") if uni_result.data else "University"
-
-                # Auto-create standard application tasks
-                standard_tasks = [
-                    {
-                        "user_id": user_id,
-                        "university_id": university_id,
-                        "title": f"Complete application for {uni_name}",
-                        "description": f"Fill out and submit the online application form for {uni_name}. Check their official admissions portal for deadlines.",
-                        "category": "Applications"
-                    },
-                    {
-                        "user_id": user_id,
-                        "university_id": university_id,
-                        "title": f"Gather documents for {uni_name}",
-                        "description": f"Collect all required documents: transcripts, test scores, passport copy, financial documents, etc.",
-                        "category": "Documents"
-                    },
-                    {
-                        "user_id": user_id,
-                        "university_id": university_id,
-                        "title": f"Write SOP for {uni_name}",
-                        "description": f"Draft and finalize your Statement of Purpose tailored to {uni_name}'s program requirements.",
-                        "category": "Documents"
-                    },
-                    {
-                        "user_id": user_id,
-                        "university_id": university_id,
-                        "title": f"Request recommendation letters for {uni_name}",
-                        "description": f"Contact your recommenders and provide them with the submission details for {uni_name}.",
-                        "category": "Documents"
-                    }
-                ]
+                # Lock, read the name and create the standard tasks in one round trip
+                locked = await lock_and_provision(self.supabase, user_id, args["university_id"])
+                if not locked:
+                    return "University is not in the shortlist. Shortlist it before locking."
+                await get_context_cache().invalidate(user_id)
 
-                for task in standard_tasks:
-                    self.supabase.table("tasks").insert(task).execute()
-
-                return f"University locked for application. Created 4 application tasks for {uni_name}."
+                uni_name = locked["university_name"]
+                if not locked["tasks_created"]:
+                    return f"{uni_name} is already locked for application."
+                return f"University locked for application. Created {locked['tasks_created']} application tasks for {uni_name}."
 
             elif name == "create_task":
-                self.supabase.table("tasks").insert({
+                await execute(self.supabase.table("tasks").insert({
                     "user_id": user_id,
                     "title": args["title"],
                     "description": args.get("description"),
                     "category": args.get("category", "Other"),
                     "university_id": args.get("university_id")
-                }).execute()
+                }))
                 return f"Created task: {args['title']}"
 
             elif name == "search_universities":
-                query = self.supabase.table("universities").select("id, name, country, ranking, tuition_max, acceptance_rate")
-
                 if args.get("name"):
-                    query = query.ilike("name", f"%{args['name']}%")
-                if args.get("country"):
-                    query = query.eq("country", args["country"])
-                if args.get("max_tuition"):
-                    query = query.lte("tuition_max", args["max_tuition"])
-
-                result = query.limit(5).execute()
-                universities = result.data
+                    # Ranked trigram/full-text/alias search (migrations/011_university_search.sql)
+                    result = await execute(self.supabase.rpc("search_universities_ranked", {
+                        "p_query": args["name"],
+                        "p_country": args.get("country"),
+                        "p_max_tuition": args.get("max_tuition"),
+                        "p_program": args.get("program"),
+                        "p_limit": SEARCH_LIMIT
+                    }))
+                    universities = [
+                        {field: uni[field] for field in SEARCH_FIELDS}
+                        for uni in result.data or []
+                    ]
+                else:
+                    # Filter-only searches are served from the in-memory catalog
+                    catalog = await get_catalog().ensure_loaded(self.supabase)
+                    rows, _ = catalog.query(
+                        country=args.get("country"),
+                        max_tuition=args.get("max_tuition"),
+                        program=args.get("program"),
+                        limit=SEARCH_LIMIT
+                    )
+                    universities = [{field: row.get(field) for field in SEARCH_FIELDS} for row in rows]
 
                 if not universities:
                     return "No universities found matching criteria. The university may not be in our database yet."
@@ -360,62 +383,256 @@ class AICounsellor:
         except Exception as e:
             return f"Error: {str(e)}"
 
-    def get_conversation_history(self, conversation_id: str, limit: int = 10) -> list:
-        """Load recent messages from a conversation."""
+    async def resolve_university_names(self, calls: list) -> list:
+        """Fill in university_id for calls that only name the university."""
+        if not any(args.get("university_name") and not args.get("university_id") for _, args in calls):
+            return calls
+
+        index = await get_university_index().ensure_fresh(self.supabase)
+        resolved = []
+        for name, args in calls:
+            if args.get("university_name") and not args.get("university_id"):
+                university = index.resolve(args["university_name"])
+                if university:
+                    args = {**args, "university_id": university["id"]}
+            resolved.append((name, args))
+        return resolved
+
+    def describe_unresolved(self, university_name: str) -> str:
+        """Tool result for a university name that didn't resolve to exactly one university."""
+        matches = get_university_index().candidates(university_name)
+        if not matches:
+            return (
+                f"No university named '{university_name}' found. "
+                "It may not be in our database yet - try search_universities."
+            )
+        options = ", ".join(f"{uni['name']} ({uni['country']})" for uni in matches[:5])
+        return (
+            f"'{university_name}' doesn't identify one university. Possible matches: {options}. "
+            "Ask the user which one they mean, then call again with its exact name."
+        )
+
+    async def run_tool_calls(self, user_id: str, calls: list, on_result=None) -> list:
+        """
+        Execute one round of tool calls concurrently and return results in call order.
+
+        Calls touching the same university (e.g. lock then create_task) keep the
+        model's order; everything else runs in parallel, bounded by
+        `tool_call_concurrency`. `on_result(index, result)` fires as each call finishes.
+        """
+        semaphore = asyncio.Semaphore(get_settings().tool_call_concurrency)
+        results = [None] * len(calls)
+        lookup_error = None
+        try:
+            calls = await self.resolve_university_names(calls)
+        except Exception as e:
+            # Calls that needed the lookup fail like any other tool error; the rest still run
+            logger.error(f"University name lookup failed: {str(e)}")
+            lookup_error = f"Error: {str(e)}"
+
+        chains = {}
+        for index, (_, args) in enumerate(calls):
+            key = args.get("university_id") or f"independent-{index}"
+            chains.setdefault(key, []).append(index)
+
+        async def run_chain(indexes: list):
+            for index in indexes:
+                name, args = calls[index]
+                if lookup_error and args.get("university_name") and not args.get("university_id"):
+                    result = lookup_error
+                else:
+                    async with semaphore:
+                        result = await self.execute_function(user_id, name, args)
+                results[index] = result
+                if on_result:
+                    on_result(index, result)
+
+        await asyncio.gather(*(run_chain(indexes) for indexes in chains.values()))
+        return results
+
+    async def get_conversation_history(self, conversation_id: str) -> list:
+        """Load the rolling summary plus the recent messages that fit the token budget."""
         if not conversation_id:
             return []
 
         try:
-            result = self.supabase.table("chat_messages").select(
-                "role, content"
-            ).eq("conversation_id", conversation_id).in_(
-                "role", ["user", "assistant"]
-            ).order(
-                "created_at", desc=True
-            ).limit(limit).execute()
-
-            # Reverse to get chronological order (oldest first)
-            messages = result.data[::-1] if result.data else []
-            # Only include messages with actual content
-            return [
-                {"role": m["role"], "content": m["content"]}
-                for m in messages
-                if m.get("content")
-            ]
+            history, summary_due = await load_history(self.supabase, conversation_id)
         except Exception:
             return []
 
-    def chat(self, user_id: str, message: str, conversation_id: str = None) -> dict:
-        """Process a chat message and return response."""
-        # Get context
-        context = self.get_user_context(user_id)
+        if summary_due:
+            self.pending_summary = conversation_id
+        return history
+
+    async def summarize_pending_history(self):
+        """Background task: fold messages that fell out of the budget into the summary."""
+        if self.pending_summary:
+            await update_rolling_summary(self.supabase, self.llm, self.pending_summary)
+            self.pending_summary = None
+
+    async def get_formatted_context(self, user_id: str) -> dict:
+        """Formatted profile/shortlist blocks and stage, served from the context cache when fresh."""
+        cache = get_context_cache()
+        cached = await cache.get(user_id)
+        if cached:
+            return cached
+
+        context, buckets = await asyncio.gather(
+            self.get_user_context(user_id),
+            self.load_recommendations(user_id)
+        )
         user_profile_str, shortlist_str, stage = self.format_context(context)
+        formatted = {
+            "user_profile": user_profile_str,
+            "shortlist": shortlist_str,
+            "stage": stage,
+            "recommendations": self.format_recommendations(context, buckets) if buckets is not None else "None available"
+        }
 
-        # Build system prompt
-        system_prompt = SYSTEM_PROMPT.format(
-            user_profile=user_profile_str,
-            stage=stage,
-            shortlist=shortlist_str
-        )
+        # Without recommendations, don't cache - the next message tries again
+        if buckets is not None:
+            await cache.set(user_id, formatted)
+        return formatted
 
-        # Start with system prompt
-        messages = [{"role": "system", "content": system_prompt}]
+    async def load_recommendations(self, user_id: str) -> Optional[dict]:
+        """The user's recommendation buckets, or None when they can't be read or computed."""
+        try:
+            return await get_recommendations(self.supabase, user_id)
+        except Exception as e:
+            logger.warning(f"Recommendations unavailable for user {user_id[:8]}...: {str(e)}")
+            return None
+
+    async def build_messages(self, user_id: str, message: str, conversation_id: str = None) -> list:
+        """Assemble system prompt, recent history and the new user message."""
+        # Profile, shortlist and history are independent - fetch them in one round trip of latency
+        context, history = await asyncio.gather(
+            self.get_formatted_context(user_id),
+            self.get_conversation_history(conversation_id)
+        )
 
-        # Load conversation history (last 10 messages, excluding the current one being sent)
-        history = self.get_conversation_history(conversation_id, limit=10)
+        # Static rules first (shared cacheable prefix), then this user's context
+        messages = [
+            {"role": "system", "content": SYSTEM_PROMPT},
+            {"role": "system", "content": CONTEXT_PROMPT.format(
+                user_profile=context["user_profile"],
+                stage=context["stage"],
+                shortlist=context["shortlist"],
+                recommendations=context.get("recommendations", "None available")
+            )}
+        ]
+
+        # Rolling summary and recent messages (excluding the current one being sent)
         if history:
             messages.extend(history)
 
         # Add current user message
         messages.append({"role": "user", "content": message})
 
-        # Call OpenRouter with GPT-4o - support multiple rounds of tool calls
+        return messages
+
+    async def create_standard_tasks(self, user_id: str, university: str) -> Optional[dict]:
+        """
+        Handle "create tasks for <university>" without an LLM round.
+
+        Inserts whichever standard tasks the locked university is still missing.
+        Returns None when the name doesn't match exactly one locked university,
+        so the message falls through to the model.
+        """
+        locked, index = await asyncio.gather(
+            execute(self.supabase.table("shortlisted_universities").select(
+                "university_id, university:universities(name)"
+            ).eq("user_id", user_id).eq("is_locked", True)),
+            get_university_index().ensure_fresh(self.supabase)
+        )
+
+        locked_names = {row["university_id"]: row["university"]["name"] for row in locked.data or []}
+        matches = [uni["id"] for uni in index.candidates(university) if uni["id"] in locked_names]
+        if len(matches) != 1:
+            return None
+
+        university_id = matches[0]
+        uni_name = locked_names[university_id]
+
+        existing = await execute(self.supabase.table("tasks").select("title").eq(
+            "user_id", user_id
+        ).eq("university_id", university_id))
+        existing_titles = {task["title"] for task in existing.data or []}
+
+        new_tasks = [
+            {**task, "user_id": user_id, "university_id": university_id}
+            for task in render_task_templates(uni_name)
+            if task["title"] not in existing_titles
+        ]
+        if not new_tasks:
+            return {
+                "response": f"All the standard application tasks for **{uni_name}** are already on your task list.",
+                "actions": []
+            }
+
+        await execute(self.supabase.table("tasks").insert(new_tasks))
+
+        task_lines = "\n".join(f"- {task['title']}" for task in new_tasks)
+        return {
+            "response": f"I've added {len(new_tasks)} tasks for your **{uni_name}** application:\n{task_lines}",
+            "actions": [
+                {
+                    "type": "create_task",
+                    "args": {
+                        "title": task["title"],
+                        "description": task["description"],
+                        "category": task["category"],
+                        "university_id": university_id
+                    },
+                    "result": f"Created task: {task['title']}"
+                }
+                for task in new_tasks
+            ]
+        }
+
+    async def route_message(self, user_id: str, message: str) -> tuple:
+        """
+        Classify the message and run local fast paths.
+
+        Returns (route, result); result is set when the message was answered
+        without the LLM.
+        """
+        route = classify_message(message)
+        if route.name == ROUTE_CREATE_TASKS:
+            result = await self.create_standard_tasks(user_id, route.university)
+            if result:
+                return route, result
+            logger.info(f"No locked university matches '{route.university}', using the model")
+            route = planning_route()
+        return route, None
+
+    def record_route(self, route, started: float):
+        """Log and record how long a routed message took end to end."""
+        latency = time.perf_counter() - started
+        get_route_metrics().record(route.name, latency)
+        logger.info(f"Route {route.name} ({route.model or 'local'}) finished in {latency * 1000:.0f}ms")
+
+    async def chat(self, user_id: str, message: str, conversation_id: str = None) -> dict:
+        """Process a chat message and return response."""
+        started = time.perf_counter()
+        route, result = await self.route_message(user_id, message)
+        if result:
+            self.record_route(route, started)
+            return result
+
+        result = await self.run_chat(user_id, message, conversation_id, route)
+        self.record_route(route, started)
+        return result
+
+    async def run_chat(self, user_id: str, message: str, conversation_id: str, route) -> dict:
+        """The LLM loop behind chat(), using the routed model."""
+        messages = await self.build_messages(user_id, message, conversation_id)
+
+        # Support multiple rounds of tool calls (none for routes without tools)
         actions = []
-        max_rounds = 5  # Prevent infinite loops
 
-        for _ in range(max_rounds):
-            response = self.client.chat.completions.create(
-                model=MODEL,
+        for _ in range(MAX_TOOL_ROUNDS if route.use_tools else 0):
+            response = await self.llm.complete(
+                model=route.model,
                 messages=messages,
                 tools=TOOLS,
                 tool_choice="auto"
@@ -431,12 +648,14 @@ class AICounsellor:
                 }
 
             # Process tool calls
-            tool_results = []
-            for tool_call in assistant_message.tool_calls:
-                func_name = tool_call.function.name
-                func_args = json.loads(tool_call.function.arguments)
+            calls = [
+                (tool_call.function.name, json.loads(tool_call.function.arguments))
+                for tool_call in assistant_message.tool_calls
+            ]
+            results = await self.run_tool_calls(user_id, calls)
 
-                result = self.execute_function(user_id, func_name, func_args)
+            tool_results = []
+            for tool_call, (func_name, func_args), result in zip(assistant_message.tool_calls, calls, results):
                 actions.append({
                     "type": func_name,
                     "args": func_args,
@@ -452,9 +671,9 @@ class AICounsellor:
             messages.append(assistant_message)
             messages.extend(tool_results)
 
-        # If we hit max rounds, get a final response without tools
-        final_response = self.client.chat.completions.create(
-            model=MODEL,
+        # If we hit max rounds (or the route has no tools), get a final response without tools
+        final_response = await self.llm.complete(
+            model=route.model,
             messages=messages
         )
 
@@ -462,3 +681,113 @@ class AICounsellor:
             "response": final_response.choices[0].message.content,
             "actions": actions
         }
+
+    async def chat_stream(self, user_id: str, message: str, conversation_id: str = None):
+        """
+        Process a chat message, yielding events as they happen:
+        `token` for each content delta, `tool_start` / `tool_end` around each
+        tool call, and a final `done` carrying the full response and actions.
+        """
+        started = time.perf_counter()
+        route, result = await self.route_message(user_id, message)
+        if result:
+            yield {"event": "token", "data": {"content": result["response"]}}
+            yield {"event": "done", "data": result}
+            self.record_route(route, started)
+            return
+
+        messages = await self.build_messages(user_id, message, conversation_id)
+        actions = []
+        tool_rounds = MAX_TOOL_ROUNDS if route.use_tools else 0
+
+        for round_number in range(tool_rounds + 1):
+            # Last round is a plain completion, same as chat()
+            params = {"model": route.model, "messages": messages}
+            if round_number < tool_rounds:
+                params.update(tools=TOOLS, tool_choice="auto")
+
+            content_parts = []
+            pending_calls = {}  # index -> {"id", "name", "arguments"}
+
+            async for chunk in self.llm.stream(**params):
+                if not chunk.choices:
+                    continue
+                delta = chunk.choices[0].delta
+
+                if delta.content:
+                    content_parts.append(delta.content)
+                    yield {"event": "token", "data": {"content": delta.content}}
+
+                # Tool call names and arguments arrive in fragments
+                for fragment in delta.tool_calls or []:
+                    call = pending_calls.setdefault(fragment.index, {"id": None, "name": "", "arguments": ""})
+                    if fragment.id:
+                        call["id"] = fragment.id
+                    if fragment.function and fragment.function.name:
+                        call["name"] += fragment.function.name
+                    if fragment.function and fragment.function.arguments:
+                        call["arguments"] += fragment.function.arguments
+
+            content = "".join(content_parts)
+
+            # If no tool calls, we're done
+            if not pending_calls:
+                yield {"event": "done", "data": {"response": content, "actions": actions}}
+                self.record_route(route, started)
+                return
+
+            tool_calls = [pending_calls[index] for index in sorted(pending_calls)]
+            messages.append({
+                "role": "assistant",
+                "content": content or None,
+                "tool_calls": [
+                    {
+                        "id": call["id"],
+                        "type": "function",
+                        "function": {"name": call["name"], "arguments": call["arguments"]}
+                    }
+                    for call in tool_calls
+                ]
+            })
+
+            calls = [(call["name"], json.loads(call["arguments"] or "{}")) for call in tool_calls]
+            for call, (func_name, func_args) in zip(tool_calls, calls):
+                yield {"event": "tool_start", "data": {"id": call["id"], "type": func_name, "args": func_args}}
+
+            # Run the round concurrently, reporting each call as it finishes
+            finished = asyncio.Queue()
+            round_task = asyncio.create_task(self.run_tool_calls(
+                user_id, calls, on_result=lambda index, result: finished.put_nowait((index, result))
+            ))
+            next_result = None
+            try:
+                reported = 0
+                while reported < len(calls):
+                    next_result = asyncio.ensure_future(finished.get())
+                    await asyncio.wait({next_result, round_task}, return_when=asyncio.FIRST_COMPLETED)
+                    if not next_result.done():
+                        # The round ended before reporting every call; re-raise its error
+                        next_result.cancel()
+                        round_task.result()
+                        continue
+                    index, result = next_result.result()
+                    reported += 1
+                    call = tool_calls[index]
+                    yield {"event": "tool_end", "data": {"id": call["id"], "type": call["name"], "result": result}}
+                results = await round_task
+            finally:
+                round_task.cancel()
+                if next_result:
+                    next_result.cancel()
+
+            for call, (func_name, func_args), result in zip(tool_calls, calls, results):
+                actions.append({
+                    "type": func_name,
+                    "args": func_args,
+                    "result": result
+                })
+                messages.append({
+                    "role": "tool",
+                    "tool_call_id": call["id"],
+                    "content": result
+                })
@@ -0,0 +1,312 @@
+"""
+In-process copy of the universities catalog.
+
+The table is small and mostly static (seeded by scripts/seed_universities.py),
+so it's loaded once at startup, refreshed on a timer or after a change, and
+GET /api/universities filters, sorts and paginates it in memory. Rows are kept
+in ranking order; secondary indexes map country, program and tuition to row
+positions so a filtered query only touches matching rows.
+
+With CATALOG_SNAPSHOT_PATH set, workers serve from a shared memory-mapped
+snapshot (see catalog_snapshot.py) and only the indexes are built per process.
+Refreshing then checks a cheap table marker (live row count, newest
+created_at / updated_at): when the table changed, one worker rebuilds the file
+under a lock and every worker re-maps it, so none falls back to a private copy.
+"""
+import asyncio
+import bisect
+import hashlib
+import json
+import time
+from typing import Optional
+
+from supabase import Client
+
+from ..core.config import get_settings
+from ..core.database import execute, run_sync
+from ..core.logging import get_logger
+from .catalog_snapshot import (
+    CatalogSnapshot, SnapshotRows, column_values, file_id, load_snapshot, rows_at, snapshot_lock, write_snapshot
+)
+
+logger = get_logger("services.catalog")
+
+PAGE_SIZE = 1000
+
+# Columns the API returns; search_vector, name_key and the ingestion bookkeeping stay in the table
+CATALOG_COLUMNS = (
+    "id, name, country, city, ranking, tuition_min, tuition_max, acceptance_rate, min_gpa, "
+    "programs, requirements, website, logo_url, data_source, is_external, created_at"
+)
+
+# sort parameter -> column
+SORT_COLUMNS = {
+    "ranking": "ranking",
+    "name": "name",
+    "tuition": "tuition_max",
+    "acceptance_rate": "acceptance_rate",
+}
+
+
+def nulls_last(value) -> tuple:
+    """Sort key putting missing values last, like Postgres' default NULLS LAST for ascending order."""
+    return (value is None, 0 if value is None else value)
+
+
+def catalog_order(rows: list) -> list:
+    return sorted(rows, key=lambda row: (nulls_last(row.get("ranking")), row.get("name") or ""))
+
+
+def catalog_version(rows: list) -> str:
+    return hashlib.sha1(json.dumps(rows, sort_keys=True, default=str).encode()).hexdigest()[:16]
+
+
+async def fetch_rows(supabase: Client) -> list:
+    """Every live university, paged."""
+    rows = []
+    while True:
+        # Soft-deleted universities (see scripts/seed_universities.py) stay out of the catalog
+        page = await execute(
+            supabase.table("universities").select(CATALOG_COLUMNS).is_("deleted_at", "null").order("id")
+            .range(len(rows), len(rows) + PAGE_SIZE - 1)
+        )
+        rows.extend(page.data or [])
+        if len(page.data or []) < PAGE_SIZE:
+            break
+    return rows
+
+
+async def table_marker(supabase: Client) -> dict:
+    """Cheap fingerprint of the table: changes whenever a row is added, updated or soft-deleted."""
+    live = await execute(supabase.table("universities").select("id", count="exact").is_("deleted_at", "null").limit(1))
+    created = await execute(
+        supabase.table("universities").select("created_at").order("created_at", desc=True, nullsfirst=False).limit(1)
+    )
+    updated = await execute(
+        supabase.table("universities").select("updated_at").order("updated_at", desc=True, nullsfirst=False).limit(1)
+    )
+    return {
+        "count": live.count,
+        "created_at": (created.data or [{}])[0].get("created_at"),
+        "updated_at": (updated.data or [{}])[0].get("updated_at"),
+    }
+
+
+def write_catalog_snapshot(path: str, rows: list, version: str, marker: dict = None):
+    """Write rows as a snapshot in catalog order, with the fit-scoring matrix precomputed."""
+    from .fit_scoring import CatalogMatrix  # fit_scoring imports this module
+
+    rows = catalog_order(rows)
+    write_snapshot(path, rows, version, marker, {"fit": CatalogMatrix(rows).snapshot_arrays()})
+
+
+class UniversityCatalog:
+    """Catalog rows plus the indexes used to query them."""
+
+    def __init__(self):
+        self.rows = []  # list of dicts, or SnapshotRows when served from a snapshot
+        self.version = None
+        self.snapshot = None
+        self._ids = set()
+        self._by_country = {}
+        self._by_program = {}
+        self._tuition_values = []  # sorted tuition_max values...
+        self._tuition_positions = []  # ...and the row position for each
+        self._sort_orders = {}
+        self._loaded_at = 0.0
+        self._stale = True
+        self._refresh_lock = asyncio.Lock()
+        self.refreshes = 0
+
+    def build(self, rows: list):
+        """Replace the catalog contents and rebuild every index."""
+        self._index(catalog_order(rows))
+        self.snapshot = None
+
+    def load_snapshot(self, snapshot: CatalogSnapshot):
+        """Serve from a mapped snapshot; its rows are already in catalog order and stay in the mapping."""
+        self._index(SnapshotRows(snapshot))
+        self.snapshot = snapshot
+        self.version = snapshot.version
+        logger.info(f"Catalog loaded from snapshot: {snapshot.count} universities (version {snapshot.version})")
+
+    def _index(self, rows):
+        by_country, by_program, tuition = {}, {}, []
+
+        for position, country in enumerate(column_values(rows, "country")):
+            by_country.setdefault((country or "").lower(), []).append(position)
+        for position, programs in enumerate(column_values(rows, "programs")):
+            for program in programs or []:
+                by_program.setdefault(program.lower(), set()).add(position)
+        for position, tuition_max in enumerate(column_values(rows, "tuition_max")):
+            if tuition_max is not None:
+                tuition.append((tuition_max, position))
+
+        tuition.sort()
+        self.rows = rows
+        self._ids = set(column_values(rows, "id"))
+        self._by_country = by_country
+        self._by_program = by_program
+        self._tuition_values = [value for value, _ in tuition]
+        self._tuition_positions = [position for _, position in tuition]
+        self._sort_orders = {"ranking": list(range(len(rows)))}
+        self._loaded_at = time.monotonic()
+        self._stale = False
+
+    async def refresh(self, supabase: Client) -> bool:
+        """Reload (from the snapshot when one is configured); returns True when the contents changed."""
+        if get_settings().catalog_snapshot_path:
+            return await self.refresh_snapshot(supabase)
+        return await self.load_database(supabase)
+
+    async def load_database(self, supabase: Client) -> bool:
+        """Load the table into this process; returns True when the contents changed."""
+        rows = await fetch_rows(supabase)
+        version = catalog_version(rows)
+        self.refreshes += 1
+        if version == self.version:
+            self._mark_fresh()
+            return False
+
+        self.build(rows)
+        self.version = version
+        logger.info(f"Catalog loaded: {len(rows)} universities (version {version})")
+        return True
+
+    async def refresh_snapshot(self, supabase: Client) -> bool:
+        """
+        Keep serving from the shared snapshot: re-map it when another worker
+        replaced the file, rebuild it when the table changed since it was written.
+        """
+        path = get_settings().catalog_snapshot_path
+        changed = False
+        if self.snapshot is None or file_id(path) != self.snapshot.file_id:
+            snapshot = load_snapshot(path)
+            if snapshot:
+                changed = snapshot.version != self.version
+                self.load_snapshot(snapshot)
+
+        marker = await table_marker(supabase)
+        self.refreshes += 1
+        if self.snapshot is not None and self.snapshot.marker == marker:
+            self._mark_fresh()
+            return changed
+
+        with snapshot_lock(path) as acquired:
+            if acquired:
+                # Rows read after the marker: a change during the load triggers another rebuild
+                rows = await fetch_rows(supabase)
+                await run_sync(write_catalog_snapshot, path, rows, catalog_version(rows), marker)
+                snapshot = load_snapshot(path)
+                if snapshot:
+                    changed = changed or snapshot.version != self.version
+                    self.load_snapshot(snapshot)
+                    return changed
+
+        if self.snapshot is None:
+            # Nothing mapped and the file can't be built here yet; serve a private copy meanwhile
+            return await self.load_database(supabase)
+        # Another worker is rebuilding; keep the current mapping until its file lands
+        self._mark_fresh()
+        return changed
+
+    def _mark_fresh(self):
+        self._loaded_at = time.monotonic()
+        self._stale = False
+
+    def invalidate(self):
+        """Mark the catalog stale so the next read reloads it."""
+        self._stale = True
+
+    def is_fresh(self) -> bool:
+        return not self._stale and time.monotonic() - self._loaded_at < get_settings().catalog_refresh_interval * 2
+
+    async def ensure_loaded(self, supabase: Client) -> "UniversityCatalog":
+        """Load or reload when stale; concurrent callers share one reload."""
+        if self.is_fresh():
+            return self
+
+        async with self._refresh_lock:
+            if not self.is_fresh():
+                await self.refresh(supabase)
+        return self
+
+    def contains(self, university_id: str) -> bool:
+        return university_id in self._ids
+
+    def _program_positions(self, program: str) -> set:
+        """Rows offering a program - exact name first, otherwise any program containing the text."""
+        program = program.lower()
+        if program in self._by_program:
+            return self._by_program[program]
+        return set().union(*(
+            positions for name, positions in self._by_program.items() if program in name
+        ))
+
+    def _sort_order(self, sort: str) -> list:
+        if sort not in self._sort_orders:
+            values = column_values(self.rows, SORT_COLUMNS[sort])
+            self._sort_orders[sort] = sorted(range(len(self.rows)), key=lambda position: nulls_last(values[position]))
+        return self._sort_orders[sort]
+
+    def query(
+        self,
+        country: Optional[str] = None,
+        max_tuition: Optional[int] = None,
+        program: Optional[str] = None,
+        sort: str = "ranking",
+        descending: bool = False,
+        offset: int = 0,
+        limit: Optional[int] = None
+    ) -> tuple[list, int]:
+        """Filtered, sorted page of rows and the total number of matches."""
+        candidate_sets = []
+        if country:
+            candidate_sets.append(set(self._by_country.get(country.lower(), [])))
+        if max_tuition:
+            cutoff = bisect.bisect_right(self._tuition_values, max_tuition)
+            candidate_sets.append(set(self._tuition_positions[:cutoff]))
+        if program:
+            candidate_sets.append(self._program_positions(program))
+
+        order = self._sort_order(sort)
+        if descending:
+            order = order[::-1]
+
+        if candidate_sets:
+            matches = set.intersection(*candidate_sets) if len(candidate_sets) > 1 else candidate_sets[0]
+            positions = [position for position in order if position in matches] if matches else []
+        else:
+            positions = order
+
+        page = positions[offset:offset + limit] if limit is not None else positions[offset:]
+        return rows_at(self.rows, page), len(positions)
+
+    def stats(self) -> dict:
+        return {
+            "universities": len(self.rows),
+            "version": self.version,
+            "source": "snapshot" if self.snapshot else "database",
+            "countries": len(self._by_country),
+            "programs": len(self._by_program),
+            "refreshes": self.refreshes,
+            "age_seconds": round(time.monotonic() - self._loaded_at, 1) if self._loaded_at else None,
+        }
+
+
+_catalog = UniversityCatalog()
+
+
+def get_catalog() -> UniversityCatalog:
+    return _catalog
+
+
+async def run_catalog_refresher(supabase: Client):
+    """Background loop reloading the catalog every `catalog_refresh_interval` seconds."""
+    interval = get_settings().catalog_refresh_interval
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            await get_catalog().refresh(supabase)
+        except Exception as e:
+            logger.error(f"Catalog refresh failed: {str(e)}")
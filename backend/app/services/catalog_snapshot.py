@@ -0,0 +1,379 @@
+"""
+Columnar, memory-mapped snapshot of the universities catalog.
+
+The catalog writes the table to one file (see catalog.py and
+scripts/build_catalog_snapshot.py); every worker maps it read-only, so the
+data lives once in the OS page cache instead of once per process, and a
+worker starts serving without a database round trip.
+
+Layout: an 8-byte magic, the header length, a JSON header (version, row
+count, fields and where each array starts), then 64-byte aligned arrays.
+Every field of the rows is stored as a typed column:
+
+- float:    float64, NaN for NULL (ranking, tuition, acceptance rate, GPA...)
+- bool:     int8, -1 for NULL
+- category: int32 codes into a string table, -1 for NULL (country...)
+- string:   a UTF-8 blob plus int64 byte and character offsets (id, name...)
+- list:     CSR - int64 row offsets into int32 codes of a string table (programs)
+- json:     one JSON document per row, for anything else
+
+Derived arrays (e.g. the fit-scoring matrix) can be stored alongside under a
+key, so workers map those too instead of recomputing them.
+
+Rows are stored in catalog (ranking) order. SnapshotRows is a read-only
+sequence over the file; rows_at() decodes rows a column at a time - a page
+reads just its own bytes, a large selection decodes each text column once.
+Only the most recently served rows are kept decoded (a small LRU), so a
+worker never builds its own full copy of the catalog.
+"""
+import fcntl
+import json
+import mmap
+import os
+from collections import OrderedDict
+from collections.abc import Sequence
+from contextlib import contextmanager
+from typing import Optional
+
+import numpy as np
+
+from ..core.logging import get_logger
+
+logger = get_logger("services.catalog_snapshot")
+
+MAGIC = b"UNICAT02"
+ALIGNMENT = 64
+# Selections larger than this share of the rows decode whole text columns at once
+BULK_FRACTION = 8
+# Decoded rows kept per worker (a couple of the largest pages)
+ROW_CACHE_SIZE = 2048
+
+
+def _offsets(lengths: list) -> np.ndarray:
+    offsets = np.zeros(len(lengths) + 1, dtype=np.int64)
+    offsets[1:] = np.cumsum(lengths)
+    return offsets
+
+
+def _string_table(values: list) -> tuple[np.ndarray, np.ndarray]:
+    encoded = [(value or "").encode("utf-8") for value in values]
+    return np.frombuffer(b"".join(encoded), dtype=np.uint8), _offsets([len(value) for value in encoded])
+
+
+def _encode(values: list) -> tuple[np.ndarray, list]:
+    """Dictionary-encode values: codes per row (-1 for None) plus the distinct values."""
+    vocabulary = {}
+    codes = np.array(
+        [-1 if value is None else vocabulary.setdefault(value, len(vocabulary)) for value in values], dtype=np.int32
+    )
+    return codes, list(vocabulary)
+
+
+def _kind(values: list) -> str:
+    present = [value for value in values if value is not None]
+    if not present:
+        return "category"
+    if all(isinstance(value, bool) for value in present):
+        return "bool"
+    if all(isinstance(value, (int, float)) and not isinstance(value, bool) for value in present):
+        return "float"
+    if all(isinstance(value, str) for value in present):
+        # Repetitive text (countries) is dictionary-encoded, unique text (ids, names) is not
+        return "category" if len(set(present)) * 4 <= len(values) else "string"
+    if all(isinstance(value, list) and all(isinstance(item, str) for item in value) for value in present):
+        return "list"
+    return "json"
+
+
+def _field_arrays(name: str, kind: str, values: list) -> dict:
+    if kind == "float":
+        return {f"{name}.values": np.array([np.nan if value is None else value for value in values], dtype=np.float64)}
+    if kind == "bool":
+        return {f"{name}.values": np.array([-1 if value is None else int(value) for value in values], dtype=np.int8)}
+    if kind == "category":
+        codes, vocabulary = _encode(values)
+        data, offsets = _string_table(vocabulary)
+        return {f"{name}.codes": codes, f"{name}.vocab.data": data, f"{name}.vocab.offsets": offsets}
+    if kind == "list":
+        codes, vocabulary = _encode([item for value in values for item in value or []])
+        data, vocab_offsets = _string_table(vocabulary)
+        return {
+            f"{name}.codes": codes,
+            f"{name}.offsets": _offsets([len(value or []) for value in values]),
+            f"{name}.null": np.array([value is None for value in values], dtype=np.bool_),
+            f"{name}.vocab.data": data,
+            f"{name}.vocab.offsets": vocab_offsets,
+        }
+    if kind == "json":
+        values = [None if value is None else json.dumps(value, default=str) for value in values]
+    data, offsets = _string_table(values)
+    return {
+        f"{name}.data": data,
+        f"{name}.offsets": offsets,
+        f"{name}.chars": _offsets([len(value or "") for value in values]),
+        f"{name}.null": np.array([value is None for value in values], dtype=np.bool_),
+    }
+
+
+def write_snapshot(path: str, rows: list, version: str, marker: dict = None, derived: dict = None):
+    """
+    Write catalog rows (already in catalog order) to `path`, replacing it atomically.
+
+    `marker` records the table state the rows were read at; `derived` maps a
+    group name to {"key", "arrays", "meta"} precomputed from the rows.
+    """
+    names = list(dict.fromkeys(name for row in rows for name in row))
+    fields, arrays = [], {}
+    for name in names:
+        values = [row.get(name) for row in rows]
+        kind = _kind(values)
+        field = {"name": name, "kind": kind}
+        if kind == "float":
+            field["int"] = all(isinstance(value, int) for value in values if value is not None)
+        fields.append(field)
+        arrays.update(_field_arrays(name, kind, values))
+
+    derived_header = {}
+    for group, spec in (derived or {}).items():
+        derived_header[group] = {"key": spec["key"], "meta": spec.get("meta") or {}, "arrays": list(spec["arrays"])}
+        for name, array in spec["arrays"].items():
+            arrays[f"derived.{group}.{name}"] = np.ascontiguousarray(array)
+
+    # Offsets are relative to the end of the header, so the header can describe itself
+    columns, offset = {}, 0
+    for name, array in arrays.items():
+        offset = -(-offset // ALIGNMENT) * ALIGNMENT
+        columns[name] = {"dtype": array.dtype.str, "length": len(array), "offset": offset}
+        offset += array.nbytes
+
+    header = json.dumps({
+        "version": version,
+        "count": len(rows),
+        "marker": marker,
+        "fields": fields,
+        "derived": derived_header,
+        "columns": columns,
+    }, default=str).encode("utf-8")
+    data_start = -(-(len(MAGIC) + 8 + len(header)) // ALIGNMENT) * ALIGNMENT
+
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(MAGIC)
+        f.write(len(header).to_bytes(8, "little"))
+        f.write(header)
+        for name, array in arrays.items():
+            f.seek(data_start + columns[name]["offset"])
+            f.write(array.tobytes())
+        f.truncate(data_start + offset)
+    os.replace(tmp, path)
+
+
+def file_id(path: str) -> Optional[tuple]:
+    """Identity of the file at `path` (changes when a new snapshot replaces it), or None if missing."""
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return stat.st_ino, stat.st_mtime_ns
+
+
+@contextmanager
+def snapshot_lock(path: str):
+    """Non-blocking exclusive lock next to the snapshot; yields whether this process got it."""
+    with open(f"{path}.lock", "a") as f:
+        try:
+            fcntl.flock(f, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            yield False
+            return
+        try:
+            yield True
+        finally:
+            fcntl.flock(f, fcntl.LOCK_UN)
+
+
+class CatalogSnapshot:
+    """Read-only view of a snapshot file; arrays are zero-copy views of the mapping."""
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, "rb") as f:
+            stat = os.fstat(f.fileno())
+            self.file_id = (stat.st_ino, stat.st_mtime_ns)
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        if self._mmap[:len(MAGIC)] != MAGIC:
+            raise ValueError(f"{path} is not a catalog snapshot (or was written by another version)")
+        header_length = int.from_bytes(self._mmap[len(MAGIC):len(MAGIC) + 8], "little")
+        header_end = len(MAGIC) + 8 + header_length
+        header = json.loads(self._mmap[len(MAGIC) + 8:header_end])
+
+        self.version = header["version"]
+        self.count = header["count"]
+        self.marker = header["marker"]
+        self.size = len(self._mmap)
+        self._fields = {field["name"]: field for field in header["fields"]}
+        self._derived = header["derived"]
+
+        data_start = -(-header_end // ALIGNMENT) * ALIGNMENT
+        self._starts = {name: data_start + spec["offset"] for name, spec in header["columns"].items()}
+        self._arrays = {
+            name: np.frombuffer(self._mmap, dtype=np.dtype(spec["dtype"]), count=spec["length"], offset=self._starts[name])
+            for name, spec in header["columns"].items()
+        }
+
+        self._rows: OrderedDict[int, dict] = OrderedDict()  # recently decoded rows, oldest first
+
+        # String tables of category and list fields are small; decode them once
+        self._vocab = {
+            name: self._strings(f"{name}.vocab", range(len(self._arrays[f"{name}.vocab.offsets"]) - 1))
+            for name, field in self._fields.items() if field["kind"] in ("category", "list")
+        }
+
+    def _strings(self, name: str, positions) -> list:
+        offsets, base = self._arrays[f"{name}.offsets"], self._starts[f"{name}.data"]
+        starts, ends = offsets[:-1], offsets[1:]
+        if not isinstance(positions, range):
+            starts, ends = starts[positions], ends[positions]
+        return [
+            self._mmap[base + start:base + end].decode("utf-8")
+            for start, end in zip(starts.tolist(), ends.tolist())
+        ]
+
+    def _text(self, name: str, positions: Optional[np.ndarray]) -> list:
+        """Strings of a text column; large selections decode the blob once and slice it by character offsets."""
+        if positions is not None and len(positions) * BULK_FRACTION < self.count:
+            return self._strings(name, positions)
+
+        base, size = self._starts[f"{name}.data"], len(self._arrays[f"{name}.data"])
+        text = self._mmap[base:base + size].decode("utf-8")
+        chars = self._arrays[f"{name}.chars"]
+        starts, ends = chars[:-1], chars[1:]
+        if positions is not None:
+            starts, ends = starts[positions], ends[positions]
+        return [text[start:end] for start, end in zip(starts.tolist(), ends.tolist())]
+
+    def _decode(self, name: str, positions: Optional[np.ndarray]) -> list:
+        """Values of one field for `positions` (every row when None)."""
+        field = self._fields.get(name)
+        if field is None:
+            return [None] * (self.count if positions is None else len(positions))
+
+        def pick(array: np.ndarray) -> list:
+            return (array if positions is None else array[positions]).tolist()
+
+        kind = field["kind"]
+        if kind == "float":
+            cast = int if field["int"] else float
+            return [None if value != value else cast(value) for value in pick(self._arrays[f"{name}.values"])]
+        if kind == "bool":
+            return [None if value < 0 else bool(value) for value in pick(self._arrays[f"{name}.values"])]
+        if kind == "category":
+            vocab = self._vocab[name]
+            return [None if code < 0 else vocab[code] for code in pick(self._arrays[f"{name}.codes"])]
+        if kind == "list":
+            vocab, codes = self._vocab[name], self._arrays[f"{name}.codes"]
+            offsets = self._arrays[f"{name}.offsets"]
+            starts, ends, nulls = pick(offsets[:-1]), pick(offsets[1:]), pick(self._arrays[f"{name}.null"])
+            if positions is not None and len(positions) * BULK_FRACTION < self.count:
+                return [
+                    None if null else [vocab[code] for code in codes[start:end].tolist()]
+                    for start, end, null in zip(starts, ends, nulls)
+                ]
+            items = [vocab[code] for code in codes.tolist()]
+            return [None if null else items[start:end] for start, end, null in zip(starts, ends, nulls)]
+
+        values = self._text(name, positions)
+        nulls = pick(self._arrays[f"{name}.null"])
+        if kind == "json":
+            return [None if null else json.loads(value) for value, null in zip(values, nulls)]
+        return [None if null else value for value, null in zip(values, nulls)]
+
+    def column(self, name: str) -> list:
+        """Every row's value for one field, decoded straight from the arrays."""
+        return self._decode(name, None)
+
+    def numeric(self, name: str) -> Optional[np.ndarray]:
+        """float64 values of a numeric field, NaN for NULL (read-only), or None if it isn't stored as one."""
+        field = self._fields.get(name)
+        if field is None:
+            return np.full(self.count, np.nan)
+        return self._arrays[f"{name}.values"] if field["kind"] == "float" else None
+
+    def rows_at(self, positions) -> list:
+        """Row dicts at the given positions; rows not decoded recently are decoded a column at a time."""
+        positions = list(positions)
+        cache = self._rows
+        found = {position: cache[position] for position in positions if position in cache}
+        missing = list(dict.fromkeys(position for position in positions if position not in found))
+        if missing:
+            names = list(self._fields)
+            columns = [self._decode(name, np.array(missing, dtype=np.int64)) for name in names]
+            found.update((position, dict(zip(names, values))) for position, values in zip(missing, zip(*columns)))
+
+        # Keep the rows of small selections; a whole-catalog listing would just evict everything
+        if len(found) <= ROW_CACHE_SIZE:
+            for position, row in found.items():
+                cache[position] = row
+                cache.move_to_end(position)
+            while len(cache) > ROW_CACHE_SIZE:
+                cache.popitem(last=False)
+        return [found[position] for position in positions]
+
+    def row(self, index: int) -> dict:
+        """The catalog row at a position, as the database returned it."""
+        return self.rows_at([index])[0]
+
+    def derived(self, group: str, key: str) -> Optional[tuple[dict, dict]]:
+        """(arrays, meta) stored for `group`, or None when missing or computed under another key."""
+        spec = self._derived.get(group)
+        if not spec or spec["key"] != key:
+            return None
+        return {name: self._arrays[f"derived.{group}.{name}"] for name in spec["arrays"]}, spec["meta"]
+
+
+class SnapshotRows(Sequence):
+    """Catalog rows backed by a snapshot; row dicts are built on access, only recent ones kept."""
+
+    def __init__(self, snapshot: CatalogSnapshot):
+        self.snapshot = snapshot
+
+    def __len__(self) -> int:
+        return self.snapshot.count
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return self.snapshot.rows_at(range(*index.indices(len(self))))
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("catalog row index out of range")
+        return self.snapshot.row(index)
+
+
+def column_values(rows, column: str) -> list:
+    """One column of catalog rows; snapshot-backed rows are read from the arrays without building dicts."""
+    if isinstance(rows, SnapshotRows):
+        return rows.snapshot.column(column)
+    return [row.get(column) for row in rows]
+
+
+def rows_at(rows, positions: list) -> list:
+    """The rows at `positions`; snapshot-backed rows are decoded in one batch."""
+    if isinstance(rows, SnapshotRows):
+        return rows.snapshot.rows_at(positions)
+    return [rows[position] for position in positions]
+
+
+def load_snapshot(path: str) -> Optional[CatalogSnapshot]:
+    """Open a snapshot, or None (logged) when it's missing or unreadable."""
+    if not path or not os.path.exists(path):
+        return None
+    try:
+        snapshot = CatalogSnapshot(path)
+    except Exception as e:
+        logger.warning(f"Could not open catalog snapshot {path}: {str(e)}")
+        return None
+
+    logger.info(f"Catalog snapshot mapped: {snapshot.count} universities, {snapshot.size / 1024:.0f} KB (version {snapshot.version})")
+    return snapshot
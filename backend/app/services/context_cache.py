@@ -0,0 +1,143 @@
+"""
+Per-user cache of the formatted chat context (profile block, shortlist block, stage).
+
+Entries are invalidated whenever a route or AI tool changes the user's
+profile or shortlist, with a TTL as a safety net. By default the cache is
+in-process; set CONTEXT_CACHE_REDIS_URL (requires the `redis` package) to
+share it - and its invalidations - across workers.
+"""
+import json
+import time
+from collections import OrderedDict
+from typing import Optional
+
+from ..core.config import get_settings
+from ..core.logging import get_logger
+
+logger = get_logger("services.context_cache")
+
+
+class MemoryBackend:
+    """Bounded LRU held in this worker process."""
+
+    def __init__(self, max_size: int):
+        self.max_size = max_size
+        self._entries: OrderedDict[str, dict] = OrderedDict()
+
+    async def get(self, key: str) -> Optional[dict]:
+        entry = self._entries.get(key)
+        if entry is not None:
+            self._entries.move_to_end(key)
+        return entry
+
+    async def set(self, key: str, entry: dict, ttl: int):
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    async def delete(self, key: str):
+        self._entries.pop(key, None)
+
+    def size(self) -> Optional[int]:
+        return len(self._entries)
+
+
+class RedisBackend:
+    """Shared cache for multi-worker deployments."""
+
+    def __init__(self, url: str):
+        import redis.asyncio as redis
+
+        self._redis = redis.from_url(url)
+
+    async def get(self, key: str) -> Optional[dict]:
+        raw = await self._redis.get(f"chat-context:{key}")
+        return json.loads(raw) if raw else None
+
+    async def set(self, key: str, entry: dict, ttl: int):
+        await self._redis.set(f"chat-context:{key}", json.dumps(entry), ex=ttl)
+
+    async def delete(self, key: str):
+        await self._redis.delete(f"chat-context:{key}")
+
+    def size(self) -> Optional[int]:
+        return None
+
+
+class ContextCache:
+    def __init__(self, backend, ttl: int):
+        self.backend = backend
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self.errors = 0
+        self.total_hit_age = 0.0
+        self.max_hit_age = 0.0
+
+    async def get(self, user_id: str) -> Optional[dict]:
+        """Return the cached context for a user, or None."""
+        try:
+            entry = await self.backend.get(user_id)
+        except Exception as e:
+            self.errors += 1
+            logger.warning(f"Context cache read failed: {str(e)}")
+            return None
+
+        age = time.time() - entry["cached_at"] if entry else None
+        if entry is None or age > self.ttl:
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        self.total_hit_age += age
+        self.max_hit_age = max(self.max_hit_age, age)
+        return entry["context"]
+
+    async def set(self, user_id: str, context: dict):
+        try:
+            await self.backend.set(user_id, {"context": context, "cached_at": time.time()}, self.ttl)
+        except Exception as e:
+            self.errors += 1
+            logger.warning(f"Context cache write failed: {str(e)}")
+
+    async def invalidate(self, user_id: str):
+        """Drop a user's cached context after their profile or shortlist changed."""
+        self.invalidations += 1
+        try:
+            await self.backend.delete(user_id)
+        except Exception as e:
+            self.errors += 1
+            logger.warning(f"Context cache invalidation failed: {str(e)}")
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "backend": type(self.backend).__name__,
+            "size": self.backend.size(),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else None,
+            "invalidations": self.invalidations,
+            "errors": self.errors,
+            "avg_hit_age_s": round(self.total_hit_age / self.hits, 2) if self.hits else None,
+            "max_hit_age_s": round(self.max_hit_age, 2),
+            "ttl_s": self.ttl,
+        }
+
+
+_cache: Optional[ContextCache] = None
+
+
+def get_context_cache() -> ContextCache:
+    global _cache
+
+    if _cache is None:
+        settings = get_settings()
+        if settings.context_cache_redis_url:
+            backend = RedisBackend(settings.context_cache_redis_url)
+        else:
+            backend = MemoryBackend(settings.context_cache_size)
+        _cache = ContextCache(backend, settings.context_cache_ttl)
+    return _cache
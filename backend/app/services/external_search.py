@@ -0,0 +1,186 @@
+"""
+External (Hipo) university search with caching and a local mirror.
+
+Lookups go: TTL cache -> live Hipo API over a shared keep-alive client ->
+mirror table (migrations/013_external_universities_mirror.sql). Stale cache
+entries are served immediately while a background refresh runs
+(stale-while-revalidate). When the live API times out, errors or returns a
+malformed body, the mirror answers and live calls are skipped for
+`hipo_cooldown` seconds.
+"""
+import asyncio
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional
+
+import httpx
+from supabase import Client
+
+from ..core.config import get_settings
+from ..core.database import execute
+from ..core.logging import get_logger
+
+logger = get_logger("services.external_search")
+
+HIPO_API_URL = "http://universities.hipolabs.com/search"
+
+# A broken upstream: transport/HTTP errors, or a body that isn't the expected JSON list
+UPSTREAM_ERRORS = (httpx.HTTPError, ValueError, KeyError, TypeError)
+
+_http_client: Optional[httpx.AsyncClient] = None
+
+
+def init_hipo_client() -> httpx.AsyncClient:
+    """Create the shared Hipo HTTP client (called from the app lifespan)."""
+    global _http_client
+
+    settings = get_settings()
+    _http_client = httpx.AsyncClient(
+        timeout=httpx.Timeout(settings.hipo_timeout, connect=min(settings.hipo_timeout, 2.0)),
+        limits=httpx.Limits(max_connections=20, max_keepalive_connections=10),
+    )
+    return _http_client
+
+
+async def close_hipo_client():
+    global _http_client
+
+    if _http_client is not None:
+        await _http_client.aclose()
+        _http_client = None
+
+
+def get_hipo_client() -> httpx.AsyncClient:
+    if _http_client is None:
+        return init_hipo_client()
+    return _http_client
+
+
+def to_result(uni: dict) -> dict:
+    """Hipo API or mirror row -> search-external response item."""
+    return {
+        "id": None,  # External universities don't have DB ID
+        "name": uni.get("name"),
+        "country": uni.get("country"),
+        "alpha_two_code": uni.get("alpha_two_code"),
+        "website": (uni.get("web_pages") or [None])[0],
+        "domains": uni.get("domains") or [],
+        "state_province": uni.get("state-province", uni.get("state_province")),
+        "is_external": True,  # Flag to indicate this is from external API
+    }
+
+
+class ExternalSearchCache:
+    """LRU of search results with a fresh TTL and a longer stale-while-revalidate window."""
+
+    def __init__(self):
+        self._entries = OrderedDict()  # key -> (results, fetched_at)
+        self._lock = threading.Lock()
+        self._refreshing = {}
+        self._upstream_down_until = 0.0
+        self.counts = {"fresh": 0, "stale": 0, "miss": 0, "live": 0, "mirror": 0, "upstream_errors": 0}
+
+    def _get(self, key: tuple) -> Optional[tuple]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry:
+                self._entries.move_to_end(key)
+            return entry
+
+    def _set(self, key: tuple, results: list):
+        with self._lock:
+            self._entries[key] = (results, time.monotonic())
+            self._entries.move_to_end(key)
+            while len(self._entries) > get_settings().hipo_cache_size:
+                self._entries.popitem(last=False)
+
+    def _count(self, name: str):
+        with self._lock:
+            self.counts[name] += 1
+
+    def upstream_available(self) -> bool:
+        return time.monotonic() >= self._upstream_down_until
+
+    async def fetch_live(self, name: Optional[str], country: Optional[str], limit: int) -> list:
+        params = {"limit": limit}
+        if name:
+            params["name"] = name
+        if country:
+            params["country"] = country
+
+        try:
+            response = await get_hipo_client().get(HIPO_API_URL, params=params)
+            response.raise_for_status()
+            data = response.json()
+            if not isinstance(data, list) or not all(isinstance(uni, dict) for uni in data):
+                raise ValueError(f"Unexpected Hipo response: {type(data).__name__}")
+            results = [to_result(uni) for uni in data[:limit]]
+        except UPSTREAM_ERRORS:
+            self._count("upstream_errors")
+            self._upstream_down_until = time.monotonic() + get_settings().hipo_cooldown
+            raise
+
+        self._count("live")
+        return results
+
+    async def fetch_mirror(self, supabase: Client, name: Optional[str], country: Optional[str], limit: int) -> list:
+        result = await execute(supabase.rpc("search_external_universities", {
+            "p_name": name,
+            "p_country": country,
+            "p_limit": limit
+        }))
+        self._count("mirror")
+        return [to_result(uni) for uni in result.data or []]
+
+    async def _refresh(self, key: tuple, name: Optional[str], country: Optional[str], limit: int):
+        try:
+            self._set(key, await self.fetch_live(name, country, limit))
+        except Exception as e:
+            logger.warning(f"Background refresh of external search failed: {str(e)}")
+        finally:
+            self._refreshing.pop(key, None)
+
+    async def search(self, supabase: Client, name: Optional[str], country: Optional[str], limit: int) -> list:
+        settings = get_settings()
+        key = ((name or "").strip().lower(), (country or "").strip().lower(), limit)
+
+        entry = self._get(key)
+        if entry:
+            results, fetched_at = entry
+            age = time.monotonic() - fetched_at
+            if age < settings.hipo_cache_ttl:
+                self._count("fresh")
+                return results
+            if age < settings.hipo_cache_ttl + settings.hipo_cache_stale_ttl:
+                self._count("stale")
+                if key not in self._refreshing and self.upstream_available():
+                    self._refreshing[key] = asyncio.create_task(self._refresh(key, name, country, limit))
+                return results
+
+        self._count("miss")
+        if self.upstream_available():
+            try:
+                results = await self.fetch_live(name, country, limit)
+                self._set(key, results)
+                return results
+            except UPSTREAM_ERRORS as e:
+                logger.warning(f"Hipo API unavailable ({type(e).__name__}: {str(e)}), using the local mirror")
+
+        # Mirror answers are not cached so the live API takes over once it recovers
+        return await self.fetch_mirror(supabase, name, country, limit)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                **self.counts,
+                "entries": len(self._entries),
+                "upstream_available": self.upstream_available(),
+            }
+
+
+_cache = ExternalSearchCache()
+
+
+def get_external_search() -> ExternalSearchCache:
+    return _cache
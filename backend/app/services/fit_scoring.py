@@ -0,0 +1,254 @@
+"""
+Vectorized university fit scoring.
+
+Scores the whole catalog against one user profile in a single NumPy pass
+(well under a millisecond for ~30k universities, see scripts/bench_fit_scoring.py):
+
+- admit chance: the university's acceptance rate, shifted up or down by how
+  far the student's GPA (on a 4.0 scale) is above or below `min_gpa`
+- budget fit: `budget_max` against `tuition_min` / `tuition_max`
+- country fit: in the student's preferred countries or not
+- prestige: log-scaled ranking
+
+fit_score (0-100) is a weighted blend of these. The category comes from the
+admit chance alone: dream < 30% <= target < 60% <= safe.
+"""
+import hashlib
+import json
+import math
+import threading
+from typing import Optional
+
+import numpy as np
+
+from .catalog import UniversityCatalog
+from .catalog_snapshot import SnapshotRows, column_values, rows_at
+
+DREAM_MAX_CHANCE = 0.30
+SAFE_MIN_CHANCE = 0.60
+MIN_BUDGET_FIT = 0.25  # below this a university is left out of the buckets
+
+WEIGHTS = {"chance": 0.35, "budget": 0.30, "country": 0.20, "prestige": 0.15}
+
+# Neutral values for missing catalog data
+DEFAULT_ACCEPTANCE = 0.30
+DEFAULT_BUDGET_FIT = 0.5
+DEFAULT_PRESTIGE = 0.2
+GPA_WEIGHT = 3.0  # logit shift per GPA point above/below min_gpa
+
+# Per-university arrays of CatalogMatrix, stored in catalog snapshots so workers map them
+MATRIX_ARRAYS = (
+    "has_min_gpa", "min_gpa", "acceptance_logit", "has_tuition",
+    "tuition_low", "tuition_high", "tuition_inv_span", "prestige_points", "country",
+)
+# Snapshot arrays computed with other constants are ignored and recomputed
+MATRIX_KEY = hashlib.sha1(json.dumps(
+    [1, MATRIX_ARRAYS, WEIGHTS, DEFAULT_ACCEPTANCE, DEFAULT_PRESTIGE], sort_keys=True
+).encode()).hexdigest()[:16]
+
+
+def as_float(values: list) -> np.ndarray:
+    return np.array([np.nan if value is None else float(value) for value in values], dtype=np.float64)
+
+
+def numeric_column(rows, column: str) -> np.ndarray:
+    """float64 column, NaN for missing; snapshot-backed rows hand over their mapped array."""
+    if isinstance(rows, SnapshotRows):
+        values = rows.snapshot.numeric(column)
+        if values is not None:
+            return values
+    return as_float(column_values(rows, column))
+
+
+class CatalogMatrix:
+    """
+    Catalog columns as NumPy arrays, built once per catalog version.
+
+    Everything that doesn't depend on the user is precomputed here (missing
+    values filled, logits, tuition spans) so scoring is a handful of float32
+    array operations. A catalog snapshot carries these arrays already; they
+    are used straight from the mapping instead of being copied per worker.
+    """
+
+    def __init__(self, rows: list, version: str = None):
+        self.version = version
+        self.rows = rows
+        self.ids = column_values(rows, "id")
+        self.positions = {uid: position for position, uid in enumerate(self.ids)}
+
+        stored = rows.snapshot.derived("fit", MATRIX_KEY) if isinstance(rows, SnapshotRows) else None
+        if stored:
+            arrays, meta = stored
+            for name in MATRIX_ARRAYS:
+                setattr(self, name, arrays[name])
+            self.country_codes = meta["country_codes"]
+        else:
+            self._compute(rows)
+
+    def _compute(self, rows):
+        min_gpa = numeric_column(rows, "min_gpa")
+        self.has_min_gpa = (~np.isnan(min_gpa)).astype(np.float32)
+        self.min_gpa = np.nan_to_num(min_gpa).astype(np.float32)
+
+        acceptance = numeric_column(rows, "acceptance_rate") / 100
+        acceptance = np.clip(np.where(np.isnan(acceptance), DEFAULT_ACCEPTANCE, acceptance), 0.01, 0.99)
+        self.acceptance_logit = np.log(acceptance / (1 - acceptance)).astype(np.float32)
+
+        tuition_min = numeric_column(rows, "tuition_min")
+        tuition_max = numeric_column(rows, "tuition_max")
+        low = np.where(np.isnan(tuition_min), tuition_max, tuition_min)
+        high = np.where(np.isnan(tuition_max), low, tuition_max)
+        self.has_tuition = ~np.isnan(low)
+        self.tuition_low = np.nan_to_num(low).astype(np.float32)
+        self.tuition_high = np.nan_to_num(high).astype(np.float32)
+        self.tuition_inv_span = (1 / np.maximum(self.tuition_high - self.tuition_low, 1.0)).astype(np.float32)
+
+        ranking = numeric_column(rows, "ranking")
+        worst = np.nanmax(ranking) if np.any(~np.isnan(ranking)) else 1.0
+        prestige = 1 - np.log(np.maximum(np.nan_to_num(ranking, nan=1.0), 1)) / math.log(worst + 1)
+        prestige = np.where(np.isnan(ranking), DEFAULT_PRESTIGE, prestige)
+        self.prestige_points = (100 * WEIGHTS["prestige"] * prestige).astype(np.float32)
+
+        self.country_codes = {}
+        self.country = np.array(
+            [
+                self.country_codes.setdefault((country or "").lower(), len(self.country_codes))
+                for country in column_values(rows, "country")
+            ],
+            dtype=np.int32
+        )
+
+    def snapshot_arrays(self) -> dict:
+        """The precomputed arrays, in the form write_snapshot() stores as derived data."""
+        return {
+            "key": MATRIX_KEY,
+            "arrays": {name: getattr(self, name) for name in MATRIX_ARRAYS},
+            "meta": {"country_codes": self.country_codes},
+        }
+
+
+_matrix = None
+_matrix_lock = threading.Lock()
+
+
+def get_catalog_matrix(catalog: UniversityCatalog) -> CatalogMatrix:
+    """Matrix for the catalog's current version (rebuilt only when it changes)."""
+    global _matrix
+
+    if _matrix is None or _matrix.version != catalog.version:
+        with _matrix_lock:
+            if _matrix is None or _matrix.version != catalog.version:
+                _matrix = CatalogMatrix(catalog.rows, catalog.version)
+    return _matrix
+
+
+def score_profile(matrix: CatalogMatrix, user_profile: dict) -> dict:
+    """Per-university arrays: fit_score (0-100), chance, budget fit and country fit."""
+    up = user_profile or {}
+
+    # Admit chance: acceptance rate shifted by the GPA margin over min_gpa
+    logit = matrix.acceptance_logit
+    if up.get("gpa") is not None:
+        gpa = float(up["gpa"]) / float(up.get("gpa_scale") or 4.0) * 4.0
+        margin = np.clip(gpa - matrix.min_gpa, -2.0, 2.0) * matrix.has_min_gpa
+        logit = logit + GPA_WEIGHT * margin
+    chance = 1 / (1 + np.exp(-logit))
+
+    # Budget: 1 when the top of the tuition range fits, tapering to 0 below tuition_min
+    budget = float(up.get("budget_max") or 50000)
+    low = matrix.tuition_low
+    budget_fit = np.where(
+        budget >= low,
+        np.minimum(0.5 + 0.5 * (budget - low) * matrix.tuition_inv_span, 1.0),
+        np.maximum(0.0, (2 * budget - low) / (2 * max(budget, 1.0)))
+    )
+    budget_fit[budget >= matrix.tuition_high] = 1.0
+    budget_fit[~matrix.has_tuition] = DEFAULT_BUDGET_FIT
+
+    # Country: preferred countries only, or anywhere when none are set
+    preferred = [country.lower() for country in up.get("preferred_countries") or []]
+    if preferred:
+        lookup = np.zeros(len(matrix.country_codes), dtype=np.float32)
+        lookup[[matrix.country_codes[country] for country in preferred if country in matrix.country_codes]] = 1.0
+        country_fit = lookup[matrix.country]
+    else:
+        country_fit = np.ones(len(matrix.ids), dtype=np.float32)
+
+    fit = (
+        100 * (WEIGHTS["chance"] * chance + WEIGHTS["budget"] * budget_fit + WEIGHTS["country"] * country_fit)
+        + matrix.prestige_points
+    )
+    return {"fit_score": fit, "chance": chance, "budget_fit": budget_fit, "country_fit": country_fit}
+
+
+def category_for(chance: float) -> str:
+    if chance < DREAM_MAX_CHANCE:
+        return "dream"
+    if chance < SAFE_MIN_CHANCE:
+        return "target"
+    return "safe"
+
+
+def recommend(
+    matrix: CatalogMatrix,
+    user_profile: dict,
+    per_bucket: int = 3,
+    exclude_ids: Optional[set] = None
+) -> dict:
+    """Top universities per dream/target/safe bucket, best fit first."""
+    scores = score_profile(matrix, user_profile)
+    fit, chance = scores["fit_score"], scores["chance"]
+
+    eligible = (scores["budget_fit"] >= MIN_BUDGET_FIT) & (scores["country_fit"] > 0)
+    if exclude_ids:
+        excluded = [matrix.positions[uid] for uid in exclude_ids if uid in matrix.positions]
+        eligible[excluded] = False
+
+    bucket_masks = {
+        "dream": eligible & (chance < DREAM_MAX_CHANCE),
+        "target": eligible & (chance >= DREAM_MAX_CHANCE) & (chance < SAFE_MIN_CHANCE),
+        "safe": eligible & (chance >= SAFE_MIN_CHANCE),
+    }
+
+    buckets = {}
+    for category, mask in bucket_masks.items():
+        candidates = np.flatnonzero(mask)
+        if len(candidates) > per_bucket:
+            # Partial selection instead of sorting the whole bucket
+            candidates = candidates[np.argpartition(-fit[candidates], per_bucket)[:per_bucket]]
+        candidates = candidates[np.argsort(-fit[candidates], kind="stable")]
+
+        buckets[category] = [
+            {
+                "id": matrix.ids[position],
+                "name": row["name"],
+                "country": row.get("country"),
+                "ranking": row.get("ranking"),
+                "tuition_max": row.get("tuition_max"),
+                "fit_score": int(round(fit[position])),
+                "admit_chance": round(float(chance[position]), 2),
+            }
+            for position, row in zip(candidates.tolist(), rows_at(matrix.rows, candidates.tolist()))
+        ]
+    return buckets
+
+
+def fit_for(matrix: CatalogMatrix, user_profile: dict, university_id: str) -> Optional[dict]:
+    """fit_score and suggested category for one university, or None if it's not in the catalog."""
+    position = matrix.positions.get(university_id)
+    if position is None:
+        return None
+
+    scores = score_profile(matrix, user_profile)
+    chance = float(scores["chance"][position])
+    return {"fit_score": int(round(scores["fit_score"][position])), "category": category_for(chance)}
+
+
+def fit_scores_for(matrix: CatalogMatrix, user_profile: dict, university_ids: list) -> dict:
+    """university_id -> fit_score for the ids that are in the catalog, scored in one pass."""
+    positions = {uid: matrix.positions[uid] for uid in university_ids if uid in matrix.positions}
+    if not positions:
+        return {}
+
+    fit = score_profile(matrix, user_profile)["fit_score"]
+    return {uid: int(round(fit[position])) for uid, position in positions.items()}
@@ -0,0 +1,164 @@
+"""
+Token-budgeted conversation history with a rolling summary.
+
+The prompt carries as many recent messages as fit in HISTORY_TOKEN_BUDGET.
+Anything older is folded into `conversations.summary` by a background task
+after the response has been sent, so summarising never adds request latency.
+"""
+import asyncio
+from datetime import datetime
+from typing import Optional
+
+from supabase import Client
+
+from ..core.config import get_settings
+from ..core.database import execute
+from ..core.llm_gateway import LLMGateway
+from ..core.logging import get_logger
+
+logger = get_logger("services.history")
+
+try:
+    import tiktoken
+
+    _encoding = tiktoken.get_encoding("o200k_base")
+except Exception:  # tiktoken is optional
+    _encoding = None
+
+# Rough per-message overhead of the chat format (role, separators)
+MESSAGE_OVERHEAD_TOKENS = 4
+
+SUMMARY_PROMPT = """You maintain a running summary of a conversation between a student and a study-abroad counsellor.
+
+Existing summary:
+{summary}
+
+Newer messages to fold in:
+{transcript}
+
+Write the updated summary in under 200 words. Keep the student's decisions, preferences,
+constraints, universities discussed and open questions. Drop greetings and small talk."""
+
+_summarizing: set = set()
+
+
+def count_tokens(text: str) -> int:
+    """Count tokens with tiktoken when installed, else estimate ~4 characters per token."""
+    if not text:
+        return 0
+    if _encoding is not None:
+        return len(_encoding.encode(text))
+    return len(text) // 4 + 1
+
+
+def pack_messages(messages: list, budget: int) -> tuple[list, list]:
+    """
+    Split chronological messages into (kept, dropped): the newest messages that
+    fit in `budget` tokens are kept, everything older is dropped.
+    """
+    used = 0
+    cut = len(messages)
+    for index in range(len(messages) - 1, -1, -1):
+        cost = count_tokens(messages[index]["content"]) + MESSAGE_OVERHEAD_TOKENS
+        if used + cost > budget:
+            break
+        used += cost
+        cut = index
+    return messages[cut:], messages[:cut]
+
+
+def _parse_timestamp(value: Optional[str]) -> Optional[datetime]:
+    return datetime.fromisoformat(value.replace("Z", "+00:00")) if value else None
+
+
+async def _fetch_conversation(supabase: Client, conversation_id: str) -> dict:
+    result = await execute(supabase.table("conversations").select(
+        "summary, summary_through"
+    ).eq("id", conversation_id).limit(1))
+    return result.data[0] if result.data else {}
+
+
+async def load_history(supabase: Client, conversation_id: str) -> tuple[list, bool]:
+    """
+    Return (prompt messages, summary_due). The rolling summary, if any, leads as a
+    system message; summary_due is True when older messages fell outside the
+    budget and are not yet covered by the summary.
+    """
+    settings = get_settings()
+
+    conversation, recent = await asyncio.gather(
+        _fetch_conversation(supabase, conversation_id),
+        execute(supabase.table("chat_messages").select(
+            "role, content, created_at"
+        ).eq("conversation_id", conversation_id).in_(
+            "role", ["user", "assistant"]
+        ).order(
+            "created_at", desc=True
+        ).limit(settings.history_fetch_limit))
+    )
+
+    # Reverse to get chronological order (oldest first), only messages with content
+    messages = [m for m in (recent.data or [])[::-1] if m.get("content")]
+    kept, dropped = pack_messages(messages, settings.history_token_budget)
+
+    summary_through = _parse_timestamp(conversation.get("summary_through"))
+    summary_due = any(
+        summary_through is None or _parse_timestamp(m["created_at"]) > summary_through
+        for m in dropped
+    )
+
+    history = []
+    if conversation.get("summary"):
+        history.append({
+            "role": "system",
+            "content": f"Summary of the earlier conversation:\n{conversation['summary']}"
+        })
+    history.extend({"role": m["role"], "content": m["content"]} for m in kept)
+
+    return history, summary_due
+
+
+async def update_rolling_summary(supabase: Client, llm: LLMGateway, conversation_id: str):
+    """Fold messages that no longer fit the budget into the conversation summary."""
+    if conversation_id in _summarizing:
+        return
+
+    _summarizing.add(conversation_id)
+    settings = get_settings()
+
+    try:
+        conversation = await _fetch_conversation(supabase, conversation_id)
+
+        query = supabase.table("chat_messages").select(
+            "role, content, created_at"
+        ).eq("conversation_id", conversation_id).in_("role", ["user", "assistant"])
+        if conversation.get("summary_through"):
+            query = query.gt("created_at", conversation["summary_through"])
+        result = await execute(query.order("created_at", desc=False).limit(settings.summary_max_messages))
+
+        messages = [m for m in result.data or [] if m.get("content")]
+        _, dropped = pack_messages(messages, settings.history_token_budget)
+        if not dropped:
+            return
+
+        transcript = "\n".join(f"{m['role'].title()}: {m['content']}" for m in dropped)
+        response = await llm.complete(
+            model=settings.summary_model,
+            messages=[{"role": "user", "content": SUMMARY_PROMPT.format(
+                summary=conversation.get("summary") or "(none yet)",
+                transcript=transcript
+            )}],
+            temperature=0.2,
+            max_tokens=400
+        )
+
+        await execute(supabase.table("conversations").update({
+            "summary": response.choices[0].message.content,
+            "summary_through": dropped[-1]["created_at"]
+        }).eq("id", conversation_id))
+
+        logger.info(f"Folded {len(dropped)} messages into summary of conversation {conversation_id[:8]}...")
+    except Exception as e:
+        logger.error(f"Error updating summary for conversation {conversation_id[:8]}...: {str(e)}")
+    finally:
+        _summarizing.discard(conversation_id)
@@ -0,0 +1,111 @@
+"""
+Local intent routing in front of the counsellor's LLM loop.
+
+Acknowledgements and short questions go to the fast model, planning and
+recommendation turns to the large model, and deterministic commands (creating
+the standard tasks for a locked university) are handled without an LLM round.
+"""
+import re
+import threading
+from typing import NamedTuple, Optional
+
+from ..core.config import get_settings
+from ..core.logging import get_logger
+
+logger = get_logger("services.intent_router")
+
+ROUTE_ACKNOWLEDGEMENT = "acknowledgement"
+ROUTE_SIMPLE = "simple"
+ROUTE_PLANNING = "planning"
+ROUTE_CREATE_TASKS = "create_tasks"
+
+# Whole-message small talk. Affirmatives like "yes" / "ok" / "go ahead" are left
+# out on purpose - they usually confirm a pending action and need the tools.
+ACKNOWLEDGEMENT_PATTERN = re.compile(
+    r"^(?:thanks?(?: you)?(?: so much| a lot)?|thx|ty|cheers|got it|cool|great|nice|"
+    r"awesome|perfect|noted|understood|bye|goodbye|see you|hi|hello|hey|"
+    r"good (?:morning|afternoon|evening|night))(?: you)?[\s!.,:)🙏👍]*$",
+    re.IGNORECASE
+)
+
+# "create tasks for Harvard", "please add the standard tasks for MIT"
+CREATE_TASKS_PATTERN = re.compile(
+    r"^(?:please\s+)?(?:can you\s+)?(?:create|make|add|generate|set up)\s+"
+    r"(?:the\s+|my\s+)?(?:standard\s+|application\s+)?(?:tasks?|to-?dos?|todo list)\s+"
+    r"(?:for|at)\s+(?P<university>.+?)(?:\s+please)?[\s.!?]*$",
+    re.IGNORECASE
+)
+
+# Anything that needs judgement over the profile or shortlist goes to the large model
+PLANNING_PATTERN = re.compile(
+    r"\b(?:recommend|suggest|shortlist|lock|compare|chances?|evaluate|assess|plan|"
+    r"strategy|strateg|should i|which (?:universit|school|college|country|program)|"
+    r"best|fit|dream|target|safe|profile|budget|scholarship|sop|statement of purpose|"
+    r"timeline|roadmap|tasks?|todo|weak|strong|improve)",
+    re.IGNORECASE
+)
+
+
+class Route(NamedTuple):
+    name: str
+    model: Optional[str]  # None for locally handled commands
+    use_tools: bool = True
+    university: Optional[str] = None
+
+
+class RouteMetrics:
+    """Per-route request counts and latency."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._routes = {}
+
+    def record(self, route: str, latency: float):
+        with self._lock:
+            stats = self._routes.setdefault(route, {"requests": 0, "total_latency": 0.0, "max_latency": 0.0})
+            stats["requests"] += 1
+            stats["total_latency"] += latency
+            stats["max_latency"] = max(stats["max_latency"], latency)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                route: {
+                    "requests": stats["requests"],
+                    "avg_latency_ms": round(stats["total_latency"] / stats["requests"] * 1000, 1),
+                    "max_latency_ms": round(stats["max_latency"] * 1000, 1),
+                }
+                for route, stats in self._routes.items()
+            }
+
+
+_route_metrics = RouteMetrics()
+
+
+def get_route_metrics() -> RouteMetrics:
+    return _route_metrics
+
+
+def planning_route() -> Route:
+    """The default route: large model with the full tool set."""
+    return Route(ROUTE_PLANNING, get_settings().planning_model)
+
+
+def classify_message(message: str) -> Route:
+    """Pick a route for one user message using local rules only."""
+    settings = get_settings()
+    text = message.strip()
+
+    if not settings.intent_routing_enabled:
+        route = planning_route()
+    elif ACKNOWLEDGEMENT_PATTERN.match(text):
+        route = Route(ROUTE_ACKNOWLEDGEMENT, settings.fast_model, use_tools=False)
+    elif match := CREATE_TASKS_PATTERN.match(text):
+        route = Route(ROUTE_CREATE_TASKS, None, university=match.group("university").strip())
+    elif PLANNING_PATTERN.search(text) or len(text.split()) > settings.intent_simple_max_words:
+        route = planning_route()
+    else:
+        route = Route(ROUTE_SIMPLE, settings.fast_model)
+
+    logger.info(f"Intent route: {route.name} -> {route.model or 'local'}")
+    return route
@@ -0,0 +1,79 @@
+"""
+Precomputed university recommendations.
+
+scripts/precompute_recommendations.py fills the recommendations table for every
+onboarded user; chat and GET /api/universities/recommended read a user's row in
+one query. A row missing (deleted when the profile changes) or computed against
+an older catalog is recomputed on read and written back.
+"""
+import asyncio
+from typing import Optional
+
+from supabase import Client
+
+from ..core.database import execute
+from ..core.logging import get_logger
+from .catalog import get_catalog
+from .fit_scoring import CatalogMatrix, get_catalog_matrix, recommend
+
+logger = get_logger("services.recommendations")
+
+# Stored per bucket; readers drop already-shortlisted universities and show fewer
+STORED_PER_BUCKET = 10
+
+PROFILE_FIELDS = "user_id, gpa, gpa_scale, budget_max, preferred_countries, updated_at"
+
+
+def build_recommendation_row(matrix: CatalogMatrix, user_profile: dict) -> dict:
+    """recommendations table row for one user profile."""
+    return {
+        "user_id": user_profile["user_id"],
+        "buckets": recommend(matrix, user_profile, per_bucket=STORED_PER_BUCKET),
+        "profile_updated_at": user_profile.get("updated_at"),
+        "catalog_version": matrix.version,
+    }
+
+
+def trim_buckets(buckets: dict, exclude_ids: Optional[set] = None, per_bucket: int = 3) -> dict:
+    """Top `per_bucket` of each bucket, skipping excluded (e.g. shortlisted) universities."""
+    exclude_ids = exclude_ids or set()
+    return {
+        category: [uni for uni in universities if uni["id"] not in exclude_ids][:per_bucket]
+        for category, universities in buckets.items()
+    }
+
+
+async def get_recommendations(supabase: Client, user_id: str, user_profile: dict = None) -> dict:
+    """A user's stored buckets, recomputed and stored again if missing or out of date."""
+    stored, catalog = await asyncio.gather(
+        execute(supabase.table("recommendations").select(
+            "buckets, catalog_version"
+        ).eq("user_id", user_id).limit(1)),
+        get_catalog().ensure_loaded(supabase)
+    )
+
+    if stored.data and stored.data[0]["catalog_version"] == catalog.version:
+        return stored.data[0]["buckets"]
+
+    if user_profile is None:
+        profile = await execute(supabase.table("user_profiles").select(PROFILE_FIELDS).eq("user_id", user_id).limit(1))
+        user_profile = profile.data[0] if profile.data else {}
+
+    row = build_recommendation_row(get_catalog_matrix(catalog), {**user_profile, "user_id": user_id})
+    try:
+        await execute(supabase.table("recommendations").upsert(row, on_conflict="user_id"))
+    except Exception as e:
+        # Still answer from the live computation
+        logger.warning(f"Could not store recommendations for user {user_id[:8]}...: {str(e)}")
+
+    logger.info(f"Recomputed recommendations for user {user_id[:8]}...")
+    return row["buckets"]
+
+
+async def invalidate_recommendations(supabase: Client, user_id: str):
+    """Drop a user's stored recommendations after their profile changes (best effort)."""
+    try:
+        await execute(supabase.table("recommendations").delete().eq("user_id", user_id))
+    except Exception as e:
+        # The profile change is saved either way; the old buckets stay until the next recompute
+        logger.warning(f"Could not invalidate recommendations for user {user_id[:8]}...: {str(e)}")
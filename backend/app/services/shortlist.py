@@ -0,0 +1,123 @@
+"""
+Shortlist and lock operations shared by the REST routes and the AI counsellor.
+"""
+import asyncio
+import uuid
+from typing import Optional
+
+from supabase import Client
+
+from ..core.database import execute
+from .catalog import get_catalog
+from .context_cache import get_context_cache
+from .fit_scoring import fit_for, fit_scores_for, get_catalog_matrix
+from .task_templates import get_task_templates
+
+
+async def lock_and_provision(supabase: Client, user_id: str, university_id: str) -> Optional[dict]:
+    """
+    Lock a shortlisted university and create its standard tasks in one RPC.
+
+    Returns {"shortlist", "university_name", "tasks_created"}, or None when the
+    university is not in the user's shortlist.
+    """
+    result = await execute(supabase.rpc("lock_and_provision_university", {
+        "p_user_id": user_id,
+        "p_university_id": university_id,
+        "p_task_templates": get_task_templates()
+    }))
+    return result.data or None
+
+
+async def shortlist_fit_scores(supabase: Client, user_id: str, university_ids: list) -> dict:
+    """university_id -> fit_score for the given ids; ids missing from the catalog are left out."""
+    user_profile, catalog = await asyncio.gather(
+        execute(supabase.table("user_profiles").select(
+            "gpa, gpa_scale, budget_max, preferred_countries"
+        ).eq("user_id", user_id).limit(1)),
+        get_catalog().ensure_loaded(supabase)
+    )
+
+    return fit_scores_for(get_catalog_matrix(catalog), (user_profile.data or [{}])[0], university_ids)
+
+
+async def live_university_ids(supabase: Client, university_ids: list) -> set:
+    """The ids that are in the universities table and not soft-deleted, whether or not the catalog has them yet."""
+    valid = []
+    for university_id in university_ids:
+        try:
+            uuid.UUID(university_id)
+        except ValueError:
+            continue
+        valid.append(university_id)
+    if not valid:
+        return set()
+
+    result = await execute(supabase.table("universities").select("id").in_("id", valid).is_("deleted_at", "null"))
+    return {row["id"] for row in result.data or []}
+
+
+async def shortlist_fit_score(supabase: Client, user_id: str, university_id: str) -> Optional[int]:
+    """fit_score to store on a shortlist row, or None when the university isn't in the catalog yet."""
+    user_profile, catalog = await asyncio.gather(
+        execute(supabase.table("user_profiles").select(
+            "gpa, gpa_scale, budget_max, preferred_countries"
+        ).eq("user_id", user_id).limit(1)),
+        get_catalog().ensure_loaded(supabase)
+    )
+
+    fit = fit_for(get_catalog_matrix(catalog), (user_profile.data or [{}])[0], university_id)
+    return fit["fit_score"] if fit else None
+
+
+async def lock_and_provision_many(supabase: Client, user_id: str, university_ids: list) -> list:
+    """
+    Lock several shortlisted universities and create their standard tasks in one RPC.
+
+    Returns one entry per distinct id: {"university_id", "status"} plus the
+    lock_and_provision fields when status is "locked".
+    """
+    result = await execute(supabase.rpc("lock_and_provision_universities", {
+        "p_user_id": user_id,
+        "p_university_ids": university_ids,
+        "p_task_templates": get_task_templates()
+    }))
+    return result.data or []
+
+
+async def shortlist_external(
+    supabase: Client,
+    user_id: str,
+    name: str,
+    country: str,
+    category: str,
+    website: Optional[str] = None,
+    reasoning: Optional[str] = None
+) -> dict:
+    """
+    Upsert an external university and the user's shortlist row in one RPC.
+
+    Returns {"shortlist": <row with "university" embedded>, "university_created": bool}.
+    """
+    result = await execute(supabase.rpc("shortlist_external_university", {
+        "p_user_id": user_id,
+        "p_name": name,
+        "p_country": country,
+        "p_category": category,
+        "p_website": website,
+        "p_reasoning": reasoning
+    }))
+    return result.data
+
+
+async def store_fit_score(supabase: Client, user_id: str, university_id: str):
+    """Write fit_score onto an existing shortlist row, once the university is in the catalog."""
+    fit_score = await shortlist_fit_score(supabase, user_id, university_id)
+    if fit_score is None:
+        return
+
+    await execute(supabase.table("shortlisted_universities").update({
+        "fit_score": fit_score
+    }).eq("user_id", user_id).eq("university_id", university_id))
+    # Context cached since the shortlist was saved still has no fit score
+    await get_context_cache().invalidate(user_id)
@@ -0,0 +1,63 @@
+"""
+Standard application tasks created when a university is locked.
+
+Defaults live here; set TASK_TEMPLATES_PATH to a JSON file containing a list
+of {"title", "description", "category"} objects to override them.
+"{university}" is replaced with the university name.
+"""
+import json
+from functools import lru_cache
+
+from ..core.config import get_settings
+from ..core.logging import get_logger
+
+logger = get_logger("services.task_templates")
+
+DEFAULT_TASK_TEMPLATES = [
+    {
+        "title": "Complete application for {university}",
+        "description": "Fill out and submit the online application form for {university}. Check their official admissions portal for deadlines.",
+        "category": "Applications"
+    },
+    {
+        "title": "Gather documents for {university}",
+        "description": "Collect all required documents: transcripts, test scores, passport copy, financial documents, etc.",
+        "category": "Documents"
+    },
+    {
+        "title": "Write SOP for {university}",
+        "description": "Draft and finalize your Statement of Purpose tailored to {university}'s program requirements.",
+        "category": "Documents"
+    },
+    {
+        "title": "Request recommendation letters for {university}",
+        "description": "Contact your recommenders and provide them with the submission details for {university}.",
+        "category": "Documents"
+    }
+]
+
+
+@lru_cache()
+def get_task_templates() -> list:
+    """Return the configured task templates (file override or defaults)."""
+    path = get_settings().task_templates_path
+    if not path:
+        return DEFAULT_TASK_TEMPLATES
+
+    with open(path) as f:
+        templates = json.load(f)
+
+    logger.info(f"Loaded {len(templates)} task templates from {path}")
+    return templates
+
+
+def render_task_templates(university_name: str) -> list:
+    """Task templates with the university name filled in."""
+    return [
+        {
+            "title": template["title"].replace("{university}", university_name),
+            "description": template.get("description", "").replace("{university}", university_name),
+            "category": template.get("category", "Other")
+        }
+        for template in get_task_templates()
+    ]
@@ -0,0 +1,175 @@
+"""
+In-memory name index over the universities catalog.
+
+Lets the counsellor's tools accept a university name ("MIT", "TU Munich")
+and resolve it to an id locally instead of spending an LLM round on
+search_universities. Matching goes exact name -> alias (university_aliases)
+-> acronym -> core name -> shared words -> fuzzy (difflib). Only the first
+three are trusted to resolve, and only when one university wins; looser
+matches are handed back as candidates for the model to pick from.
+"""
+import difflib
+import re
+import unicodedata
+from typing import Optional
+
+from supabase import Client
+
+from ..core.database import execute
+from ..core.logging import get_logger
+from .catalog import PAGE_SIZE, get_catalog
+from .catalog_snapshot import column_values
+
+logger = get_logger("services.university_index")
+
+FUZZY_CUTOFF = 0.85
+
+# Words that don't identify a university on their own
+GENERIC_WORDS = {
+    "the", "of", "at", "in", "and", "for", "de", "university", "universitat",
+    "universite", "universidad", "college", "institute", "school", "uni"
+}
+# Left out when building acronyms ("University of California, Los Angeles" -> "ucla")
+ACRONYM_SKIP = {"the", "of", "at", "in", "and", "for", "de"}
+
+
+def normalize(name: str) -> str:
+    """Lowercase, strip accents and punctuation, collapse whitespace."""
+    name = unicodedata.normalize("NFKD", name).encode("ascii", "ignore").decode()
+    name = name.lower().replace("&", " and ").replace("'", "").replace("\u2019", "")
+    name = re.sub(r"[^a-z0-9]+", " ", name)
+    return " ".join(name.split())
+
+
+def core_words(normalized: str) -> tuple:
+    """Distinctive words of a normalized name ("harvard university" -> ("harvard",))."""
+    return tuple(word for word in normalized.split() if word not in GENERIC_WORDS)
+
+
+def acronym(normalized: str) -> str:
+    words = [word for word in normalized.split() if word not in ACRONYM_SKIP]
+    return "".join(word[0] for word in words) if len(words) > 1 else ""
+
+
+class UniversityIndex:
+    """Name -> university lookup tables, rebuilt whenever the catalog version changes."""
+
+    def __init__(self):
+        self.rows = []  # catalog rows; the lookup tables hold positions into them
+        self._by_name = {}
+        self._by_alias = {}
+        self._by_acronym = {}
+        self._by_core = {}
+        self._by_word = {}
+        self.version = None
+
+    def build(self, rows: list, version: str = None, aliases: list = ()):
+        """Replace the index contents with the given university rows and their aliases."""
+        by_name, by_alias, by_acronym, by_core, by_word = {}, {}, {}, {}, {}
+
+        for position, name in enumerate(column_values(rows, "name")):
+            normalized = normalize(name)
+            core = core_words(normalized)
+            by_name.setdefault(normalized, []).append(position)
+            if initials := acronym(normalized):
+                by_acronym.setdefault(initials, []).append(position)
+            if core:
+                by_core.setdefault(" ".join(core), []).append(position)
+            for word in set(core):
+                by_word.setdefault(word, set()).add(position)
+
+        positions = {uid: position for position, uid in enumerate(column_values(rows, "id"))}
+        for alias in aliases:
+            if alias["university_id"] in positions:
+                by_alias.setdefault(normalize(alias["alias"]), []).append(positions[alias["university_id"]])
+
+        self.rows = rows
+        self._by_name, self._by_alias, self._by_acronym = by_name, by_alias, by_acronym
+        self._by_core, self._by_word = by_core, by_word
+        self.version = version
+        logger.info(f"University index built with {len(rows)} universities and {len(aliases)} aliases")
+
+    async def ensure_fresh(self, supabase: Client) -> "UniversityIndex":
+        """Make sure the catalog is loaded and rebuild the index if it has changed."""
+        catalog = await get_catalog().ensure_loaded(supabase)
+        if catalog.version != self.version:
+            self.build(catalog.rows, catalog.version, await load_aliases(supabase))
+        return self
+
+    def _lookup(self, name: str) -> tuple[list, bool]:
+        """Positions matching a name, and whether they came from an exact name, alias or acronym hit."""
+        normalized = normalize(name)
+        core = core_words(normalized)
+
+        positions = (
+            self._by_name.get(normalized)
+            or self._by_alias.get(normalized)
+            or self._by_acronym.get(normalized.replace(" ", ""))
+        )
+        if positions:
+            return positions, True
+
+        positions = self._by_core.get(" ".join(core))
+        if not positions and core:
+            # Every distinctive word must appear in the name
+            matching = set.intersection(*(self._by_word.get(word, set()) for word in core))
+            positions = list(matching)
+        if not positions:
+            close = difflib.get_close_matches(normalized, self._by_name.keys(), n=3, cutoff=FUZZY_CUTOFF)
+            positions = [position for match in close for position in self._by_name[match]]
+        return positions or [], False
+
+    def _rows(self, positions: list) -> list:
+        # Ranked (curated) universities before unranked ones, then by rank
+        return sorted(
+            (self.rows[position] for position in dict.fromkeys(positions)),
+            key=lambda uni: (uni.get("ranking") is None, uni.get("ranking") or 0, uni["name"])
+        )
+
+    def candidates(self, name: str) -> list:
+        """Possible matches for a name, best first."""
+        positions, _ = self._lookup(name)
+        return self._rows(positions)
+
+    def resolve(self, name: str) -> Optional[dict]:
+        """
+        The single university a name refers to, or None when missing, ambiguous
+        or only a loose match ("Penn" sharing a word with "Penn State University").
+        """
+        positions, exact = self._lookup(name)
+        if not exact:
+            return None
+        matches = self._rows(positions)
+        if len(matches) == 1:
+            return matches[0]
+        # Several hits but only one curated (ranked) university - that's the one people mean
+        ranked = [uni for uni in matches if uni.get("ranking") is not None]
+        if len(ranked) == 1:
+            return ranked[0]
+        return None
+
+    def stats(self) -> dict:
+        return {"universities": len(self.rows), "aliases": len(self._by_alias), "version": self.version}
+
+
+async def load_aliases(supabase: Client) -> list:
+    """Every university_aliases row; an unreadable table only costs alias matching."""
+    aliases = []
+    try:
+        while True:
+            page = await execute(supabase.table("university_aliases").select("university_id, alias").order("id").range(
+                len(aliases), len(aliases) + PAGE_SIZE - 1
+            ))
+            aliases.extend(page.data or [])
+            if len(page.data or []) < PAGE_SIZE:
+                return aliases
+    except Exception as e:
+        logger.warning(f"Could not load university aliases: {str(e)}")
+        return []
+
+
+_index = UniversityIndex()
+
+
+def get_university_index() -> UniversityIndex:
+    return _index
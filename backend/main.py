@@ -2,21 +2,70 @@ from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
 from dotenv import load_dotenv
+from contextlib import asynccontextmanager
+import asyncio
 import traceback
 
 load_dotenv()
 
+from app.core.config import get_settings
 from app.core.logging import setup_logging, get_logger
+from app.core.database import init_supabase, close_supabase, get_db_metrics
+from app.core.llm import init_llm_client, close_llm_client, get_llm_usage
+from app.core.llm_gateway import get_llm_gateway
+from app.core.security import close_auth_client, get_token_cache
+from app.services.catalog import get_catalog, run_catalog_refresher
+from app.services.catalog_snapshot import load_snapshot
+from app.services.context_cache import get_context_cache
+from app.services.external_search import init_hipo_client, close_hipo_client, get_external_search
+from app.services.intent_router import get_route_metrics
+from app.services.university_index import get_university_index
 from app.api import profile, universities, tasks, counsellor, conversations, sop, tts, stt
 
 # Initialize logging
 setup_logging()
 logger = get_logger("main")
 
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Create shared clients on startup and release them on shutdown."""
+    logger.info("=" * 50)
+    logger.info("AI Counsellor API starting up...")
+    logger.info("=" * 50)
+
+    supabase = init_supabase()
+    init_llm_client()
+    init_hipo_client()
+
+    # Warm the universities catalog from the shared snapshot if there is one, else from the
+    # database (building the snapshot when one is configured); requests retry the load if
+    # this fails. With a snapshot the refresher re-maps or rebuilds the file, never a private copy
+    snapshot = load_snapshot(get_settings().catalog_snapshot_path)
+    if snapshot:
+        get_catalog().load_snapshot(snapshot)
+    else:
+        try:
+            await get_catalog().refresh(supabase)
+        except Exception as e:
+            logger.error(f"Initial catalog load failed: {str(e)}")
+    catalog_refresher = asyncio.create_task(run_catalog_refresher(supabase))
+
+    yield
+
+    logger.info("AI Counsellor API shutting down...")
+    catalog_refresher.cancel()
+    await close_llm_client()
+    await close_hipo_client()
+    await close_auth_client()
+    close_supabase()
+
+
 app = FastAPI(
     title="AI Counsellor API",
     description="Backend API for AI Study Abroad Counsellor",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 # CORS middleware - allow your frontend domains
@@ -109,18 +158,20 @@ async def health():
     return {"status": "healthy", "service": "ai-counsellor-api"}
 
 
-@app.on_event("startup")
-async def startup_event():
-    """Log application startup."""
-    logger.info("=" * 50)
-    logger.info("AI Counsellor API starting up...")
-    logger.info("=" * 50)
-
-
-@app.on_event("shutdown")
-async def shutdown_event():
-    """Log application shutdown."""
-    logger.info("AI Counsellor API shutting down...")
+@app.get("/metrics")
+async def metrics():
+    """Runtime metrics for this worker process."""
+    return {
+        "database": get_db_metrics(),
+        "auth_token_cache": get_token_cache().stats(),
+        "context_cache": get_context_cache().stats(),
+        "llm": get_llm_usage().snapshot(),
+        "llm_gateway": get_llm_gateway().stats(),
+        "intent_routes": get_route_metrics().snapshot(),
+        "catalog": get_catalog().stats(),
+        "external_search": get_external_search().stats(),
+        "university_index": get_university_index().stats(),
+    }
 
 
 if __name__ == "__main__":
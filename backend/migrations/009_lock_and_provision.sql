@@ -0,0 +1,56 @@
+-- Lock a shortlisted university and create its standard application tasks
+-- in a single round trip / transaction.
+--
+-- p_task_templates is a JSON array of {title, description, category};
+-- "{university}" in title/description is replaced with the university name.
+-- Tasks are only created when the university was not already locked, so
+-- repeated lock calls do not duplicate them.
+-- Returns NULL when the university is not in the user's shortlist.
+CREATE OR REPLACE FUNCTION lock_and_provision_university(
+  p_user_id UUID,
+  p_university_id UUID,
+  p_task_templates JSONB DEFAULT '[]'::jsonb
+)
+RETURNS JSONB AS $$
+DECLARE
+    v_was_locked BOOLEAN;
+    v_shortlist shortlisted_universities%ROWTYPE;
+    v_name TEXT;
+    v_tasks_created INTEGER := 0;
+BEGIN
+    SELECT is_locked INTO v_was_locked
+    FROM shortlisted_universities
+    WHERE user_id = p_user_id AND university_id = p_university_id
+    FOR UPDATE;
+
+    IF NOT FOUND THEN
+        RETURN NULL;
+    END IF;
+
+    UPDATE shortlisted_universities SET is_locked = true
+    WHERE user_id = p_user_id AND university_id = p_university_id
+    RETURNING * INTO v_shortlist;
+
+    SELECT COALESCE(name, 'University') INTO v_name
+    FROM universities WHERE id = p_university_id;
+
+    IF NOT COALESCE(v_was_locked, false) THEN
+        INSERT INTO tasks (user_id, university_id, title, description, category)
+        SELECT
+            p_user_id,
+            p_university_id,
+            replace(t->>'title', '{university}', v_name),
+            replace(t->>'description', '{university}', v_name),
+            t->>'category'
+        FROM jsonb_array_elements(p_task_templates) AS t;
+
+        GET DIAGNOSTICS v_tasks_created = ROW_COUNT;
+    END IF;
+
+    RETURN jsonb_build_object(
+        'shortlist', to_jsonb(v_shortlist),
+        'university_name', v_name,
+        'tasks_created', v_tasks_created
+    );
+END;
+$$ LANGUAGE plpgsql;
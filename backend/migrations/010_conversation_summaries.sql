@@ -0,0 +1,10 @@
+-- Rolling summary of older chat turns, maintained in the background so the
+-- prompt only carries the summary plus the most recent messages.
+ALTER TABLE conversations ADD COLUMN IF NOT EXISTS summary TEXT;
+
+-- created_at of the newest message folded into the summary
+ALTER TABLE conversations ADD COLUMN IF NOT EXISTS summary_through TIMESTAMPTZ;
+
+-- History is read newest-first per conversation
+CREATE INDEX IF NOT EXISTS idx_chat_messages_conversation_created
+  ON chat_messages(conversation_id, created_at DESC);
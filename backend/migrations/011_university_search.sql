@@ -0,0 +1,90 @@
+-- Ranked, typo-tolerant university search.
+-- Replaces ilike '%name%' lookups (which can't use an index) with trigram and
+-- full-text matching over names plus an alias table ("UCL", "TU Munich", ...).
+-- Aliases are seeded by scripts/seed_universities.py.
+
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+
+ALTER TABLE universities ADD COLUMN IF NOT EXISTS search_vector tsvector
+    GENERATED ALWAYS AS (
+        to_tsvector('simple', coalesce(name, '') || ' ' || coalesce(city, ''))
+    ) STORED;
+
+CREATE INDEX IF NOT EXISTS idx_universities_name_trgm ON universities USING gin (lower(name) gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS idx_universities_search_vector ON universities USING gin (search_vector);
+
+CREATE TABLE IF NOT EXISTS university_aliases (
+  id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
+  university_id UUID REFERENCES universities(id) ON DELETE CASCADE,
+  alias TEXT NOT NULL,
+  source TEXT,
+  created_at TIMESTAMPTZ DEFAULT now(),
+  UNIQUE(university_id, alias)
+);
+
+CREATE INDEX IF NOT EXISTS idx_university_aliases_alias ON university_aliases (lower(alias));
+CREATE INDEX IF NOT EXISTS idx_university_aliases_alias_trgm ON university_aliases USING gin (lower(alias) gin_trgm_ops);
+
+ALTER TABLE university_aliases ENABLE ROW LEVEL SECURITY;
+CREATE POLICY "Anyone can view university aliases" ON university_aliases
+  FOR SELECT USING (true);
+
+-- Best matches for a free-text query, optionally filtered like the catalog.
+-- score is 1.0 for an exact name/alias hit, otherwise the best of trigram
+-- similarity, word similarity and full-text rank.
+CREATE OR REPLACE FUNCTION search_universities_ranked(
+    p_query TEXT,
+    p_country TEXT DEFAULT NULL,
+    p_max_tuition INTEGER DEFAULT NULL,
+    p_program TEXT DEFAULT NULL,
+    p_limit INTEGER DEFAULT 5
+)
+RETURNS TABLE (
+    id UUID,
+    name TEXT,
+    country TEXT,
+    ranking INTEGER,
+    tuition_max INTEGER,
+    acceptance_rate DECIMAL(5,2),
+    score REAL
+)
+LANGUAGE sql
+STABLE
+AS $$
+    WITH q AS (
+        SELECT lower(trim(p_query)) AS text, websearch_to_tsquery('simple', p_query) AS ts
+    ),
+    alias_hits AS (
+        SELECT a.university_id,
+               CASE WHEN lower(a.alias) = q.text THEN 1.0 ELSE similarity(lower(a.alias), q.text) END AS score
+        FROM university_aliases a, q
+        WHERE lower(a.alias) = q.text OR lower(a.alias) % q.text
+    ),
+    name_hits AS (
+        SELECT u.id AS university_id,
+               CASE WHEN lower(u.name) = q.text THEN 1.0
+                    ELSE greatest(
+                        similarity(lower(u.name), q.text),
+                        word_similarity(q.text, lower(u.name)),
+                        ts_rank(u.search_vector, q.ts)
+                    )
+               END AS score
+        FROM universities u, q
+        WHERE lower(u.name) % q.text OR q.text <% lower(u.name) OR u.search_vector @@ q.ts
+    ),
+    hits AS (
+        SELECT university_id, max(score) AS score
+        FROM (SELECT * FROM alias_hits UNION ALL SELECT * FROM name_hits) matched
+        GROUP BY university_id
+    )
+    SELECT u.id, u.name, u.country, u.ranking, u.tuition_max, u.acceptance_rate, h.score::REAL
+    FROM hits h
+    JOIN universities u ON u.id = h.university_id
+    WHERE (p_country IS NULL OR lower(u.country) = lower(p_country))
+      AND (p_max_tuition IS NULL OR u.tuition_max <= p_max_tuition)
+      AND (p_program IS NULL OR EXISTS (
+            SELECT 1 FROM unnest(u.programs) AS program WHERE program ILIKE '%' || p_program || '%'
+          ))
+    ORDER BY h.score DESC, u.ranking ASC NULLS LAST
+    LIMIT p_limit;
+$$;
@@ -0,0 +1,19 @@
+-- Precomputed university recommendations, one row per onboarded user.
+-- Written by scripts/precompute_recommendations.py (and on demand by the API);
+-- read by chat and GET /api/universities/recommended in a single query.
+CREATE TABLE IF NOT EXISTS recommendations (
+  user_id UUID PRIMARY KEY REFERENCES profiles(id) ON DELETE CASCADE,
+  buckets JSONB NOT NULL,            -- {"dream": [...], "target": [...], "safe": [...]}, best fit first
+  profile_updated_at TIMESTAMPTZ,    -- user_profiles.updated_at the buckets were computed from
+  catalog_version TEXT,              -- universities catalog hash the buckets were computed from
+  computed_at TIMESTAMPTZ DEFAULT now()
+);
+
+CREATE INDEX IF NOT EXISTS idx_recommendations_catalog_version ON recommendations(catalog_version);
+
+-- The batch job pages through onboarded users by id
+CREATE INDEX IF NOT EXISTS idx_profiles_onboarded ON profiles(id) WHERE onboarding_completed;
+
+ALTER TABLE recommendations ENABLE ROW LEVEL SECURITY;
+CREATE POLICY "Users can view own recommendations" ON recommendations
+  FOR SELECT USING (auth.uid() = user_id);
@@ -0,0 +1,43 @@
+-- Local mirror of the Hipo universities dataset (universities.hipolabs.com),
+-- imported by scripts/import_hipo_dump.py. search-external falls back to it
+-- when the live API is slow or down.
+-- Needs pg_trgm (migrations/011_university_search.sql).
+CREATE TABLE IF NOT EXISTS external_universities (
+  id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
+  name TEXT NOT NULL,
+  country TEXT NOT NULL,
+  alpha_two_code TEXT,
+  state_province TEXT,
+  domains TEXT[] DEFAULT '{}',
+  web_pages TEXT[] DEFAULT '{}',
+  imported_at TIMESTAMPTZ DEFAULT now(),
+  UNIQUE(name, country)
+);
+
+CREATE INDEX IF NOT EXISTS idx_external_universities_name_trgm
+  ON external_universities USING gin (name gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS idx_external_universities_country
+  ON external_universities (lower(country));
+
+ALTER TABLE external_universities ENABLE ROW LEVEL SECURITY;
+CREATE POLICY "Anyone can view external universities" ON external_universities
+  FOR SELECT USING (true);
+
+-- Same semantics as the Hipo API (name substring, case-insensitive country),
+-- closest names first.
+CREATE OR REPLACE FUNCTION search_external_universities(
+    p_name TEXT DEFAULT NULL,
+    p_country TEXT DEFAULT NULL,
+    p_limit INTEGER DEFAULT 20
+)
+RETURNS SETOF external_universities
+LANGUAGE sql
+STABLE
+AS $$
+    SELECT *
+    FROM external_universities
+    WHERE (p_name IS NULL OR name ILIKE '%' || p_name || '%')
+      AND (p_country IS NULL OR lower(country) = lower(p_country))
+    ORDER BY CASE WHEN p_name IS NULL THEN 0 ELSE similarity(name, p_name) END DESC, name
+    LIMIT p_limit;
+$$;
@@ -0,0 +1,113 @@
+-- One university row per (case-insensitive name, country), and a single-call
+-- upsert for shortlisting external universities.
+
+-- Normalized name used for uniqueness
+ALTER TABLE universities ADD COLUMN IF NOT EXISTS name_key TEXT
+    GENERATED ALWAYS AS (lower(btrim(name))) STORED;
+
+-- Merge existing duplicates into one survivor per (name_key, country):
+-- curated rows first, then ranked ones, then the oldest.
+CREATE TEMP TABLE university_merges AS
+SELECT id AS duplicate_id, survivor_id
+FROM (
+    SELECT id,
+           first_value(id) OVER (
+               PARTITION BY name_key, country
+               ORDER BY COALESCE(is_external, false), ranking IS NULL, created_at, id
+           ) AS survivor_id
+    FROM universities
+) ranked
+WHERE id <> survivor_id;
+
+-- Shortlist rows: one per user and survivor. Keep the user's row for the
+-- survivor if there is one (else the oldest, locked first), carrying over a
+-- lock from any row folded into it.
+CREATE TEMP TABLE shortlist_merges AS
+SELECT s.id,
+       m.survivor_id,
+       first_value(s.id) OVER (
+           PARTITION BY s.user_id, m.survivor_id
+           ORDER BY s.university_id <> m.survivor_id, s.is_locked IS NOT TRUE, s.created_at, s.id
+       ) AS keep_id,
+       bool_or(COALESCE(s.is_locked, false)) OVER (PARTITION BY s.user_id, m.survivor_id) AS any_locked
+FROM shortlisted_universities s
+JOIN (
+    SELECT duplicate_id AS university_id, survivor_id FROM university_merges
+    UNION
+    SELECT survivor_id, survivor_id FROM university_merges
+) m ON s.university_id = m.university_id;
+
+UPDATE shortlisted_universities s SET is_locked = true
+FROM shortlist_merges sm WHERE s.id = sm.keep_id AND sm.any_locked;
+DELETE FROM shortlisted_universities s
+USING shortlist_merges sm WHERE s.id = sm.id AND sm.id <> sm.keep_id;
+UPDATE shortlisted_universities s SET university_id = sm.survivor_id
+FROM shortlist_merges sm WHERE s.id = sm.keep_id AND s.university_id <> sm.survivor_id;
+
+DROP TABLE shortlist_merges;
+
+UPDATE tasks t SET university_id = m.survivor_id
+FROM university_merges m WHERE t.university_id = m.duplicate_id;
+
+-- sop_documents.university_id is ON DELETE SET NULL, so repoint before deleting
+UPDATE sop_documents d SET university_id = m.survivor_id
+FROM university_merges m WHERE d.university_id = m.duplicate_id;
+
+-- Aliases: drop a duplicate's alias when the survivor (or an earlier duplicate) has it
+DELETE FROM university_aliases a
+USING university_merges m
+WHERE a.university_id = m.duplicate_id
+  AND EXISTS (
+      SELECT 1
+      FROM university_aliases keep
+      LEFT JOIN university_merges km ON km.duplicate_id = keep.university_id
+      WHERE COALESCE(km.survivor_id, keep.university_id) = m.survivor_id
+        AND keep.alias = a.alias
+        AND (keep.university_id = m.survivor_id OR keep.id < a.id)
+  );
+UPDATE university_aliases a SET university_id = m.survivor_id
+FROM university_merges m WHERE a.university_id = m.duplicate_id;
+
+DELETE FROM universities u USING university_merges m WHERE u.id = m.duplicate_id;
+
+DROP TABLE university_merges;
+
+ALTER TABLE universities ADD CONSTRAINT universities_name_key_country_key UNIQUE (name_key, country);
+
+-- Upsert an external university and the user's shortlist row in one transaction.
+-- Returns {"shortlist": <shortlist row with "university" embedded>, "university_created": bool}.
+CREATE OR REPLACE FUNCTION shortlist_external_university(
+  p_user_id UUID,
+  p_name TEXT,
+  p_country TEXT,
+  p_category TEXT,
+  p_website TEXT DEFAULT NULL,
+  p_reasoning TEXT DEFAULT NULL
+)
+RETURNS JSONB AS $$
+DECLARE
+    v_university_id UUID;
+    v_university universities%ROWTYPE;
+    v_created BOOLEAN;
+    v_shortlist shortlisted_universities%ROWTYPE;
+BEGIN
+    INSERT INTO universities (name, country, website, is_external)
+    VALUES (btrim(p_name), p_country, p_website, true)
+    ON CONFLICT (name_key, country)
+        DO UPDATE SET website = COALESCE(universities.website, EXCLUDED.website)
+    RETURNING id, (xmax = 0) INTO v_university_id, v_created;
+
+    SELECT * INTO v_university FROM universities WHERE id = v_university_id;
+
+    INSERT INTO shortlisted_universities (user_id, university_id, category, ai_reasoning)
+    VALUES (p_user_id, v_university_id, p_category, p_reasoning)
+    ON CONFLICT (user_id, university_id)
+        DO UPDATE SET category = EXCLUDED.category, ai_reasoning = EXCLUDED.ai_reasoning
+    RETURNING * INTO v_shortlist;
+
+    RETURN jsonb_build_object(
+        'shortlist', to_jsonb(v_shortlist) || jsonb_build_object('university', to_jsonb(v_university)),
+        'university_created', v_created
+    );
+END;
+$$ LANGUAGE plpgsql;
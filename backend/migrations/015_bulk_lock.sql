@@ -0,0 +1,40 @@
+-- Lock several shortlisted universities (and create their standard tasks)
+-- in a single round trip / transaction.
+--
+-- Each id goes through lock_and_provision_university (009). Returns a JSON
+-- array with one entry per distinct id, in input order:
+--   {"university_id", "status": "locked" | "not_shortlisted",
+--    "shortlist", "university_name", "tasks_created"}
+CREATE OR REPLACE FUNCTION lock_and_provision_universities(
+  p_user_id UUID,
+  p_university_ids UUID[],
+  p_task_templates JSONB DEFAULT '[]'::jsonb
+)
+RETURNS JSONB AS $$
+DECLARE
+    v_university_id UUID;
+    v_result JSONB;
+    v_results JSONB := '[]'::jsonb;
+BEGIN
+    FOR v_university_id IN
+        SELECT id FROM unnest(p_university_ids) WITH ORDINALITY AS u(id, position)
+        GROUP BY id ORDER BY min(position)
+    LOOP
+        v_result := lock_and_provision_university(p_user_id, v_university_id, p_task_templates);
+
+        IF v_result IS NULL THEN
+            v_results := v_results || jsonb_build_array(jsonb_build_object(
+                'university_id', v_university_id,
+                'status', 'not_shortlisted'
+            ));
+        ELSE
+            v_results := v_results || jsonb_build_array(v_result || jsonb_build_object(
+                'university_id', v_university_id,
+                'status', 'locked'
+            ));
+        END IF;
+    END LOOP;
+
+    RETURN v_results;
+END;
+$$ LANGUAGE plpgsql;
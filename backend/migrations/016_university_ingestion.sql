@@ -0,0 +1,123 @@
+-- Incremental university ingestion (scripts/seed_universities.py).
+-- Rows are upserted on the (name_key, country) key from 014; content_hash
+-- lets the seed script skip unchanged rows, and rows that drop out of the
+-- sources are soft-deleted so shortlists and tasks keep their references.
+
+ALTER TABLE universities ADD COLUMN IF NOT EXISTS content_hash TEXT;
+ALTER TABLE universities ADD COLUMN IF NOT EXISTS updated_at TIMESTAMPTZ;
+ALTER TABLE universities ADD COLUMN IF NOT EXISTS deleted_at TIMESTAMPTZ;
+
+CREATE INDEX IF NOT EXISTS idx_universities_active ON universities (id) WHERE deleted_at IS NULL;
+
+-- Same as 011, skipping soft-deleted universities
+CREATE OR REPLACE FUNCTION search_universities_ranked(
+    p_query TEXT,
+    p_country TEXT DEFAULT NULL,
+    p_max_tuition INTEGER DEFAULT NULL,
+    p_program TEXT DEFAULT NULL,
+    p_limit INTEGER DEFAULT 5
+)
+RETURNS TABLE (
+    id UUID,
+    name TEXT,
+    country TEXT,
+    ranking INTEGER,
+    tuition_max INTEGER,
+    acceptance_rate DECIMAL(5,2),
+    score REAL
+)
+LANGUAGE sql
+STABLE
+AS $$
+    WITH q AS (
+        SELECT lower(trim(p_query)) AS text, websearch_to_tsquery('simple', p_query) AS ts
+    ),
+    alias_hits AS (
+        SELECT a.university_id,
+               CASE WHEN lower(a.alias) = q.text THEN 1.0 ELSE similarity(lower(a.alias), q.text) END AS score
+        FROM university_aliases a, q
+        WHERE lower(a.alias) = q.text OR lower(a.alias) % q.text
+    ),
+    name_hits AS (
+        SELECT u.id AS university_id,
+               CASE WHEN lower(u.name) = q.text THEN 1.0
+                    ELSE greatest(
+                        similarity(lower(u.name), q.text),
+                        word_similarity(q.text, lower(u.name)),
+                        ts_rank(u.search_vector, q.ts)
+                    )
+               END AS score
+        FROM universities u, q
+        WHERE lower(u.name) % q.text OR q.text <% lower(u.name) OR u.search_vector @@ q.ts
+    ),
+    hits AS (
+        SELECT university_id, max(score) AS score
+        FROM (SELECT * FROM alias_hits UNION ALL SELECT * FROM name_hits) matched
+        GROUP BY university_id
+    )
+    SELECT u.id, u.name, u.country, u.ranking, u.tuition_max, u.acceptance_rate, h.score::REAL
+    FROM hits h
+    JOIN universities u ON u.id = h.university_id
+    WHERE u.deleted_at IS NULL
+      AND (p_country IS NULL OR lower(u.country) = lower(p_country))
+      AND (p_max_tuition IS NULL OR u.tuition_max <= p_max_tuition)
+      AND (p_program IS NULL OR EXISTS (
+            SELECT 1 FROM unnest(u.programs) AS program WHERE program ILIKE '%' || p_program || '%'
+          ))
+    ORDER BY h.score DESC, u.ranking ASC NULLS LAST
+    LIMIT p_limit;
+$$;
+
+-- Any update bumps updated_at, so the catalog's table marker (app/services/catalog.py)
+-- notices changes made outside the seed script
+CREATE OR REPLACE FUNCTION update_universities_updated_at()
+RETURNS TRIGGER AS $$
+BEGIN
+  NEW.updated_at = now();
+  RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS universities_updated_at_trigger ON universities;
+CREATE TRIGGER universities_updated_at_trigger
+  BEFORE UPDATE ON universities
+  FOR EACH ROW EXECUTE FUNCTION update_universities_updated_at();
+
+-- Same as 014, but shortlisting a soft-deleted university brings it back into the catalog
+CREATE OR REPLACE FUNCTION shortlist_external_university(
+  p_user_id UUID,
+  p_name TEXT,
+  p_country TEXT,
+  p_category TEXT,
+  p_website TEXT DEFAULT NULL,
+  p_reasoning TEXT DEFAULT NULL
+)
+RETURNS JSONB AS $$
+DECLARE
+    v_university_id UUID;
+    v_university universities%ROWTYPE;
+    v_created BOOLEAN;
+    v_shortlist shortlisted_universities%ROWTYPE;
+BEGIN
+    INSERT INTO universities (name, country, website, is_external)
+    VALUES (btrim(p_name), p_country, p_website, true)
+    ON CONFLICT (name_key, country)
+        DO UPDATE SET website = COALESCE(universities.website, EXCLUDED.website),
+                      deleted_at = NULL,
+                      updated_at = now()
+    RETURNING id, (xmax = 0) INTO v_university_id, v_created;
+
+    SELECT * INTO v_university FROM universities WHERE id = v_university_id;
+
+    INSERT INTO shortlisted_universities (user_id, university_id, category, ai_reasoning)
+    VALUES (p_user_id, v_university_id, p_category, p_reasoning)
+    ON CONFLICT (user_id, university_id)
+        DO UPDATE SET category = EXCLUDED.category, ai_reasoning = EXCLUDED.ai_reasoning
+    RETURNING * INTO v_shortlist;
+
+    RETURN jsonb_build_object(
+        'shortlist', to_jsonb(v_shortlist) || jsonb_build_object('university', to_jsonb(v_university)),
+        'university_created', v_created
+    );
+END;
+$$ LANGUAGE plpgsql;
@@ -0,0 +1,118 @@
+"""
+Benchmark curated-name and country matching in the seed pipeline.
+
+Run: python scripts/bench_curated_matching.py [--names 10000] [--curated-multiplier 1]
+
+Generates Hipolabs-like names (a share of them containing or contained in a
+curated name) and times, against the original linear scans:
+
+- "curated": get_curated_data() for every name
+- "country": country_for() for every name (create_curated_only_universities)
+
+--curated-multiplier grows CURATED_DATA / COUNTRY_MAPPING with synthetic
+entries to show how each approach scales with the curated side. Results of
+both implementations are compared before timing.
+"""
+
+import argparse
+import random
+import sys
+import time
+from pathlib import Path
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import seed_universities as seed
+
+WORDS = [
+    "State", "Technical", "Community", "National", "Institute", "College", "Polytechnic",
+    "Northern", "Southern", "Eastern", "Western", "Central", "Metropolitan", "Valley", "Coast",
+]
+
+
+def naive_curated_data(name: str) -> dict | None:
+    """The original get_curated_data: every curated name, both substring directions."""
+    for curated_name, data in seed.CURATED_DATA.items():
+        if seed.normalize_name(curated_name) in seed.normalize_name(name) or seed.normalize_name(name) in seed.normalize_name(curated_name):
+            return {**data, "matched_name": curated_name}
+    return None
+
+
+def naive_country_for(name: str) -> str:
+    """The original country lookup in create_curated_only_universities."""
+    for keyword, country in seed.COUNTRY_MAPPING.items():
+        if keyword.lower() in name.lower():
+            return country
+    return "USA"
+
+
+def grow_curated(multiplier: int, rng: random.Random):
+    """Add synthetic curated universities and keywords (multiplier - 1) times over."""
+    base_curated, base_mapping = list(seed.CURATED_DATA.items()), list(seed.COUNTRY_MAPPING.items())
+    for copy in range(1, multiplier):
+        for name, data in base_curated:
+            seed.CURATED_DATA[f"{name} {rng.choice(WORDS)} Campus {copy}"] = data
+        for keyword, country in base_mapping:
+            seed.COUNTRY_MAPPING[f"{keyword} {copy}x"] = country
+    seed.get_curated_matcher.cache_clear()
+    seed.get_country_matcher.cache_clear()
+
+
+def random_names(count: int, rng: random.Random) -> list:
+    curated = list(seed.CURATED_DATA)
+    names = []
+    for i in range(count):
+        roll = rng.random()
+        if roll < 0.1:
+            names.append(f"The {rng.choice(curated)} {rng.choice(WORDS)}")  # contains a curated name
+        elif roll < 0.15:
+            names.append(rng.choice(curated).split(" ")[-1])  # contained in curated names
+        else:
+            names.append(f"{rng.choice(WORDS)} {rng.choice(WORDS)} University of Town {i}")
+    return names
+
+
+def timed(fn, names: list) -> float:
+    started = time.perf_counter()
+    for name in names:
+        fn(name)
+    return time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--names", type=int, default=10000)
+    parser.add_argument("--curated-multiplier", type=int, default=1)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    grow_curated(args.curated_multiplier, rng)
+    names = random_names(args.names, rng)
+
+    started = time.perf_counter()
+    seed.get_curated_matcher()
+    seed.get_country_matcher()
+    build_ms = (time.perf_counter() - started) * 1000
+
+    mismatches = sum(naive_curated_data(name) != seed.get_curated_data(name) for name in names)
+    mismatches += sum(naive_country_for(name) != seed.country_for(name) for name in names)
+    if mismatches:
+        print(f"Error: {mismatches} results differ from the linear scan")
+        sys.exit(1)
+
+    print(f"{len(names)} names, {len(seed.CURATED_DATA)} curated universities, "
+          f"{len(seed.COUNTRY_MAPPING)} country keywords (matchers built in {build_ms:.1f}ms)")
+    print("=" * 50)
+    for label, naive, indexed in (
+        ("curated", naive_curated_data, seed.get_curated_data),
+        ("country", naive_country_for, seed.country_for),
+    ):
+        naive_s, indexed_s = timed(naive, names), timed(indexed, names)
+        print(f"{label:8s} linear {naive_s * 1000:8.1f}ms   indexed {indexed_s * 1000:8.1f}ms   "
+              f"({naive_s / indexed_s:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
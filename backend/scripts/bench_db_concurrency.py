@@ -0,0 +1,95 @@
+"""
+Benchmark concurrent-request throughput with blocking vs offloaded DB calls.
+
+Run: python scripts/bench_db_concurrency.py [--requests 200] [--concurrency 50] [--latency-ms 40]
+
+Each simulated request performs the same number of PostgREST calls as a
+typical endpoint. A fake query whose execute() sleeps stands in for a
+PostgREST round trip, so the numbers reflect event-loop behaviour only:
+
+- "blocking":  query.execute() called directly inside an async handler
+               (the old pattern in app/api/*)
+- "offloaded": await execute(query) through app.core.database
+"""
+
+import argparse
+import asyncio
+import statistics
+import sys
+import time
+from pathlib import Path
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.core.database import execute, get_db_metrics
+
+
+class FakeQuery:
+    """Stand-in for a PostgREST request builder with fixed latency."""
+
+    def __init__(self, latency: float):
+        self.latency = latency
+
+    def execute(self):
+        time.sleep(self.latency)
+        return {"data": []}
+
+
+async def blocking_handler(latency: float, calls: int):
+    for _ in range(calls):
+        FakeQuery(latency).execute()
+
+
+async def offloaded_handler(latency: float, calls: int):
+    for _ in range(calls):
+        await execute(FakeQuery(latency))
+
+
+async def run(handler, requests: int, concurrency: int, latency: float, calls: int) -> dict:
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+
+    async def one():
+        async with semaphore:
+            started = time.perf_counter()
+            await handler(latency, calls)
+            latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(requests)))
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        "throughput_rps": requests / elapsed,
+        "p50_ms": statistics.median(latencies) * 1000,
+        "p95_ms": latencies[int(len(latencies) * 0.95) - 1] * 1000,
+        "elapsed_s": elapsed,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--latency-ms", type=float, default=40.0)
+    parser.add_argument("--calls-per-request", type=int, default=2)
+    args = parser.parse_args()
+
+    latency = args.latency_ms / 1000
+    print(f"{args.requests} requests, concurrency {args.concurrency}, "
+          f"{args.calls_per_request} DB calls/request at {args.latency_ms}ms each")
+    print("=" * 50)
+
+    for label, handler in [("blocking", blocking_handler), ("offloaded", offloaded_handler)]:
+        stats = asyncio.run(run(handler, args.requests, args.concurrency, latency, args.calls_per_request))
+        print(f"{label:>10}: {stats['throughput_rps']:8.1f} req/s | "
+              f"p50 {stats['p50_ms']:8.1f}ms | p95 {stats['p95_ms']:8.1f}ms | "
+              f"total {stats['elapsed_s']:.2f}s")
+
+    print(f"\nDB pool metrics: {get_db_metrics()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""
+Benchmark fit scoring against a large synthetic catalog.
+
+Run: python scripts/bench_fit_scoring.py [--universities 30000] [--profiles 500]
+
+Builds a random catalog (roughly 100x the seeded one by default) and random
+user profiles, then times app.services.fit_scoring:
+
+- "matrix":    building the NumPy columns (once per catalog version)
+- "score":     score_profile() over the whole catalog for one user
+- "recommend": score_profile() plus the dream/target/safe top-k selection
+"""
+
+import argparse
+import random
+import statistics
+import sys
+import time
+import uuid
+from pathlib import Path
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.services.fit_scoring import CatalogMatrix, recommend, score_profile
+
+COUNTRIES = ["USA", "UK", "Canada", "Australia", "Germany", "India"]
+
+
+def random_university(rng: random.Random) -> dict:
+    curated = rng.random() < 0.4  # the rest look like Hipolabs rows with no data
+    tuition_min = rng.randrange(0, 50000, 500)
+    return {
+        "id": str(uuid.UUID(int=rng.getrandbits(128))),
+        "name": f"University {rng.getrandbits(32):08x}",
+        "country": rng.choice(COUNTRIES),
+        "ranking": rng.randrange(1, 1500) if curated else None,
+        "tuition_min": tuition_min if curated else None,
+        "tuition_max": tuition_min + rng.randrange(0, 20000, 500) if curated else None,
+        "acceptance_rate": round(rng.uniform(3, 90), 2) if curated else None,
+        "min_gpa": round(rng.uniform(2.3, 3.9), 2) if curated else None,
+    }
+
+
+def random_profile(rng: random.Random) -> dict:
+    return {
+        "gpa": round(rng.uniform(2.5, 4.0), 2),
+        "gpa_scale": 4.0,
+        "budget_max": rng.randrange(10000, 80000, 5000),
+        "preferred_countries": rng.sample(COUNTRIES, rng.randint(1, 3)),
+    }
+
+
+def timed(fn, runs: list) -> list:
+    latencies = []
+    for args in runs:
+        started = time.perf_counter()
+        fn(*args)
+        latencies.append(time.perf_counter() - started)
+    latencies.sort()
+    return latencies
+
+
+def report(label: str, latencies: list):
+    print(f"{label:>10}: p50 {statistics.median(latencies) * 1000:7.3f}ms | "
+          f"p95 {latencies[int(len(latencies) * 0.95) - 1] * 1000:7.3f}ms | "
+          f"max {latencies[-1] * 1000:7.3f}ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--universities", type=int, default=30000)
+    parser.add_argument("--profiles", type=int, default=500)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    rows = [random_university(rng) for _ in range(args.universities)]
+    profiles = [random_profile(rng) for _ in range(args.profiles)]
+
+    print(f"{args.universities} universities, {args.profiles} profiles")
+    print("=" * 50)
+
+    started = time.perf_counter()
+    matrix = CatalogMatrix(rows, "bench")
+    print(f"{'matrix':>10}: {(time.perf_counter() - started) * 1000:7.1f}ms (once per catalog version)")
+
+    report("score", timed(score_profile, [(matrix, profile) for profile in profiles]))
+    report("recommend", timed(recommend, [(matrix, profile) for profile in profiles]))
+
+
+if __name__ == "__main__":
+    main()
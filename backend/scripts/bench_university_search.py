@@ -0,0 +1,127 @@
+"""
+Benchmark university name search: latency and recall on the seeded catalog.
+
+Run: python scripts/bench_university_search.py [--repeat 3] [--limit 5]
+
+Needs SUPABASE_URL / SUPABASE_KEY for a database seeded with
+scripts/seed_universities.py and migrated with 011_university_search.sql.
+
+Queries are generated from the curated universities:
+
+- "exact":   the full name
+- "short":   a short name from UNIVERSITY_ALIASES ("UCL", "TU Munich")
+- "keyword": the distinctive words only ("Harvard", "Toronto")
+- "typo":    the full name with two letters swapped
+
+and run through:
+
+- "ilike":   name ilike '%query%' (the old search_universities tool)
+- "ranked":  the search_universities_ranked RPC
+
+A query counts as recalled when the expected university is in the top
+`--limit` results; @1 means it came back first.
+"""
+
+import argparse
+import random
+import statistics
+import sys
+import time
+from pathlib import Path
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+sys.path.insert(0, str(Path(__file__).parent))
+
+from seed_universities import CURATED_DATA, UNIVERSITY_ALIASES, get_supabase_client
+
+GENERIC_WORDS = {"university", "of", "the", "at", "and", "college", "institute", "technology"}
+
+
+def swap_letters(name: str, rng: random.Random) -> str:
+    """Swap two adjacent letters inside the longest word."""
+    words = name.split()
+    index = max(range(len(words)), key=lambda i: len(words[i]))
+    word = words[index]
+    # Only positions where the swap actually changes the word
+    positions = [i for i in range(1, len(word) - 2) if word[i] != word[i + 1]]
+    if not positions:
+        return name
+    position = rng.choice(positions)
+    words[index] = word[:position] + word[position + 1] + word[position] + word[position + 2:]
+    return " ".join(words)
+
+
+def build_queries(seed: int) -> list:
+    """(kind, query, expected name) triples."""
+    rng = random.Random(seed)
+    queries = []
+
+    for name in CURATED_DATA:
+        queries.append(("exact", name, name))
+        queries.append(("typo", swap_letters(name, rng), name))
+
+        keyword = " ".join(word for word in name.replace(",", "").split() if word.lower() not in GENERIC_WORDS)
+        if keyword and keyword != name:
+            queries.append(("keyword", keyword, name))
+
+    for name, short_names in UNIVERSITY_ALIASES.items():
+        for short_name in short_names:
+            queries.append(("short", short_name, name))
+
+    return queries
+
+
+def search_ilike(query: str, limit: int) -> list:
+    result = get_supabase_client().table("universities").select("id, name").ilike("name", f"%{query}%").limit(limit).execute()
+    return [row["name"] for row in result.data]
+
+
+def search_ranked(query: str, limit: int) -> list:
+    result = get_supabase_client().rpc("search_universities_ranked", {"p_query": query, "p_limit": limit}).execute()
+    return [row["name"] for row in result.data]
+
+
+def run(search, queries: list, limit: int, repeat: int) -> dict:
+    latencies = []
+    hits = {}  # kind -> [total, recalled, first]
+
+    for _ in range(repeat):
+        for kind, query, expected in queries:
+            started = time.perf_counter()
+            names = search(query, limit)
+            latencies.append(time.perf_counter() - started)
+
+            counts = hits.setdefault(kind, [0, 0, 0])
+            counts[0] += 1
+            counts[1] += expected in names
+            counts[2] += bool(names) and names[0] == expected
+
+    latencies.sort()
+    return {
+        "p50_ms": statistics.median(latencies) * 1000,
+        "p95_ms": latencies[int(len(latencies) * 0.95) - 1] * 1000,
+        "recall": {kind: (recalled / total, first / total) for kind, (total, recalled, first) in hits.items()},
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--limit", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    queries = build_queries(args.seed)
+    print(f"{len(queries)} queries x {args.repeat}, top {args.limit}")
+    print("=" * 50)
+
+    for label, search in [("ilike", search_ilike), ("ranked", search_ranked)]:
+        stats = run(search, queries, args.limit, args.repeat)
+        print(f"{label:>7}: p50 {stats['p50_ms']:7.1f}ms | p95 {stats['p95_ms']:7.1f}ms")
+        for kind, (recall, first) in sorted(stats["recall"].items()):
+            print(f"         {kind:>8}: recall@{args.limit} {recall:6.1%} | @1 {first:6.1%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+"""
+Write the universities table to a memory-mapped catalog snapshot.
+
+Run: python scripts/build_catalog_snapshot.py [--output catalog.snapshot]
+
+Loads the catalog exactly as the API does (same rows, order and version) and
+writes it with app/services/catalog_snapshot.py, fit-scoring arrays included.
+Point CATALOG_SNAPSHOT_PATH at the file and every uvicorn worker maps it at
+startup instead of loading the table itself. Workers rebuild it on their own
+when the table changes (see catalog.py); run this after seeding or importing
+so they start from current data (the web service in render.yaml does it on start).
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+from pathlib import Path
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from dotenv import load_dotenv
+from supabase import create_client
+
+load_dotenv()
+
+from app.core.config import get_settings
+from app.services.catalog import catalog_order, catalog_version, fetch_rows, table_marker, write_catalog_snapshot
+from app.services.catalog_snapshot import CatalogSnapshot
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--output", default=get_settings().catalog_snapshot_path or "catalog.snapshot")
+    args = parser.parse_args()
+
+    supabase_url, supabase_key = os.getenv("SUPABASE_URL"), os.getenv("SUPABASE_KEY")
+    if not supabase_url or not supabase_key:
+        print("Error: SUPABASE_URL and SUPABASE_KEY must be set in .env")
+        sys.exit(1)
+
+    async def load(supabase):
+        # Marker first, so rows changed during the load still trigger a rebuild in the workers
+        return await table_marker(supabase), await fetch_rows(supabase)
+
+    started = time.perf_counter()
+    marker, rows = asyncio.run(load(create_client(supabase_url, supabase_key)))
+    loaded = time.perf_counter()
+    write_catalog_snapshot(args.output, rows, catalog_version(rows), marker)
+    written = time.perf_counter()
+
+    # Read it back so a bad file never reaches the workers
+    snapshot = CatalogSnapshot(args.output)
+    if snapshot.rows_at(range(snapshot.count)) != catalog_order(rows):
+        print(f"Error: {args.output} doesn't match the catalog it was written from")
+        sys.exit(1)
+
+    print(f"Wrote {args.output}: {snapshot.count} universities, {snapshot.size / 1024:.0f} KB (version {snapshot.version})")
+    print(f"Loaded in {loaded - started:.2f}s, written in {written - loaded:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
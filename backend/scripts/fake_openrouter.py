@@ -0,0 +1,104 @@
+"""
+Local fake of the OpenRouter chat-completions API for exercising the LLM gateway.
+
+Run:  uvicorn scripts.fake_openrouter:app --port 8765
+Then: OPENROUTER_BASE_URL=http://127.0.0.1:8765 uvicorn main:app
+
+Behaviour can be changed at runtime, e.g.
+    curl -X POST localhost:8765/control -H 'content-type: application/json' \\
+         -d '{"latency_ms": 3000, "failure_rate": 0.5, "failure_status": 503}'
+
+- latency_ms / jitter_ms: delay before responding (or before the first chunk)
+- failure_rate / failure_status: fraction of requests answered with an error
+- hang: never respond (to trigger call timeouts)
+GET /stats returns request counts.
+"""
+import asyncio
+import json
+import random
+import time
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+app = FastAPI(title="Fake OpenRouter")
+
+config = {
+    "latency_ms": 200,
+    "jitter_ms": 0,
+    "failure_rate": 0.0,
+    "failure_status": 503,
+    "hang": False,
+    "reply": "This is a reply from the fake OpenRouter server.",
+}
+stats = {"requests": 0, "failures": 0, "streams": 0}
+
+
+@app.post("/control")
+async def control(request: Request):
+    """Update fake server behaviour."""
+    config.update(await request.json())
+    return config
+
+
+@app.get("/stats")
+async def get_stats():
+    return stats
+
+
+def _usage() -> dict:
+    return {
+        "prompt_tokens": 1200,
+        "completion_tokens": 12,
+        "total_tokens": 1212,
+        "prompt_tokens_details": {"cached_tokens": 1024},
+    }
+
+
+@app.post("/chat/completions")
+async def chat_completions(request: Request):
+    body = await request.json()
+    stats["requests"] += 1
+
+    if config["hang"]:
+        await asyncio.sleep(3600)
+
+    delay = config["latency_ms"] + random.uniform(0, config["jitter_ms"])
+    await asyncio.sleep(delay / 1000)
+
+    if random.random() < config["failure_rate"]:
+        stats["failures"] += 1
+        return JSONResponse(
+            status_code=config["failure_status"],
+            content={"error": {"message": "Injected failure", "code": config["failure_status"]}}
+        )
+
+    base = {"id": f"fake-{stats['requests']}", "created": int(time.time()), "model": body.get("model")}
+
+    if not body.get("stream"):
+        return {
+            **base,
+            "object": "chat.completion",
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": config["reply"]},
+                "finish_reason": "stop"
+            }],
+            "usage": _usage(),
+        }
+
+    stats["streams"] += 1
+
+    async def chunks():
+        for word in config["reply"].split(" "):
+            chunk = {
+                **base,
+                "object": "chat.completion.chunk",
+                "choices": [{"index": 0, "delta": {"content": word + " "}, "finish_reason": None}]
+            }
+            yield f"data: {json.dumps(chunk)}\n\n"
+            await asyncio.sleep(0.01)
+        yield f"data: {json.dumps({**base, 'object': 'chat.completion.chunk', 'choices': [], 'usage': _usage()})}\n\n"
+        yield "data: [DONE]\n\n"
+
+    return StreamingResponse(chunks(), media_type="text/event-stream")
@@ -0,0 +1,214 @@
+"""
+Import the Hipo universities dataset into the external_universities mirror.
+
+Run: python scripts/import_hipo_dump.py [--file world_universities_and_domains.json] [--format json|ndjson|csv]
+                                        [--batch-size 500] [--copy] [--prune] [--dry-run]
+
+Without --file the dump is downloaded from the Hipo university-domains-list
+repository. Local files can be JSON (the dump itself), NDJSON or CSV (see
+scripts/university_datasets.py). Either way records are streamed and written
+batch by batch, so the dataset is never held in memory at once.
+
+Rows are upserted on (name, country) with multi-row upserts through the
+Supabase API, or with --copy by COPYing each batch into a staging table over a
+direct Postgres connection (DATABASE_URL, needs psycopg) and merging it in.
+--prune then deletes mirror rows that are no longer in the dump, and
+--dry-run only parses and batches, for benchmarking the reader. Throughput is
+printed as it goes. Schedule it (see the cron job in render.yaml) to keep the
+mirror current.
+
+Needs migrations/013_external_universities_mirror.sql.
+"""
+
+import argparse
+import os
+import sys
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Iterator
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import httpx
+from dotenv import load_dotenv
+from supabase import create_client
+
+from university_datasets import FORMATS, batched, iter_json_array, iter_records
+
+load_dotenv()
+
+DUMP_URL = "https://raw.githubusercontent.com/Hipo/university-domains-list/master/world_universities_and_domains.json"
+
+COLUMNS = ("name", "country", "alpha_two_code", "state_province", "domains", "web_pages", "imported_at")
+
+
+def iter_dump(path: str = None, fmt: str = None) -> Iterator[dict]:
+    if path:
+        yield from iter_records(path, fmt)
+        return
+
+    print(f"Downloading {DUMP_URL}...")
+    with httpx.stream("GET", DUMP_URL, timeout=60.0, follow_redirects=True) as response:
+        response.raise_for_status()
+        yield from iter_json_array(response.iter_text())
+
+
+def to_rows(universities: list, imported_at: str) -> list:
+    """Mirror rows, de-duplicated on (name, country) - the dump has repeats."""
+    rows = {}
+    for uni in universities:
+        name, country = (uni.get("name") or "").strip(), (uni.get("country") or "").strip()
+        if not name or not country:
+            continue
+        rows[(name, country)] = {
+            "name": name,
+            "country": country,
+            "alpha_two_code": uni.get("alpha_two_code") or None,
+            "state_province": uni.get("state-province", uni.get("state_province")) or None,
+            "domains": uni.get("domains") or [],
+            "web_pages": uni.get("web_pages") or [],
+            "imported_at": imported_at,
+        }
+    return list(rows.values())
+
+
+class UpsertWriter:
+    """Multi-row upserts through the Supabase API."""
+
+    def __init__(self):
+        supabase_url, supabase_key = os.getenv("SUPABASE_URL"), os.getenv("SUPABASE_KEY")
+        if not supabase_url or not supabase_key:
+            print("Error: SUPABASE_URL and SUPABASE_KEY must be set in .env")
+            sys.exit(1)
+        self.supabase = create_client(supabase_url, supabase_key)
+
+    def write(self, rows: list):
+        self.supabase.table("external_universities").upsert(rows, on_conflict="name,country").execute()
+
+    def prune(self, imported_at: str):
+        self.supabase.table("external_universities").delete().lt("imported_at", imported_at).execute()
+
+    def close(self):
+        pass
+
+
+class CopyWriter:
+    """COPY each batch into a staging table, then merge it into the mirror in the same transaction."""
+
+    def __init__(self):
+        try:
+            import psycopg
+        except ImportError:
+            print("Error: --copy needs psycopg (pip install 'psycopg[binary]')")
+            sys.exit(1)
+
+        database_url = os.getenv("DATABASE_URL")
+        if not database_url:
+            print("Error: --copy needs DATABASE_URL (the project's Postgres connection string) in .env")
+            sys.exit(1)
+
+        self.conn = psycopg.connect(database_url)
+        self.conn.execute(
+            "CREATE TEMP TABLE external_universities_import "
+            "(LIKE external_universities INCLUDING DEFAULTS) ON COMMIT DELETE ROWS"
+        )
+        self.conn.commit()
+
+    def write(self, rows: list):
+        columns = ", ".join(COLUMNS)
+        with self.conn.cursor() as cur:
+            with cur.copy(f"COPY external_universities_import ({columns}) FROM STDIN") as copy:
+                for row in rows:
+                    copy.write_row([row[column] for column in COLUMNS])
+            cur.execute(
+                f"INSERT INTO external_universities ({columns}) "
+                f"SELECT {columns} FROM external_universities_import "
+                "ON CONFLICT (name, country) DO UPDATE SET "
+                + ", ".join(f"{column} = EXCLUDED.{column}" for column in COLUMNS[2:])
+            )
+        self.conn.commit()
+
+    def prune(self, imported_at: str):
+        self.conn.execute("DELETE FROM external_universities WHERE imported_at < %s", (imported_at,))
+        self.conn.commit()
+
+    def close(self):
+        self.conn.close()
+
+
+class ImportStats:
+    """Records read, rows written and where the time went."""
+
+    def __init__(self):
+        self.records = 0
+        self.rows = 0
+        self.batches = 0
+        self.write_seconds = 0.0
+        self.started = time.perf_counter()
+
+    def elapsed(self) -> float:
+        return time.perf_counter() - self.started
+
+    def report(self):
+        elapsed = self.elapsed()
+        print(f"  {self.rows} rows in {self.batches} batches "
+              f"({self.rows / elapsed:.0f} rows/s, {self.records / elapsed:.0f} records/s read)")
+
+    def summary(self, wrote: bool):
+        elapsed = self.elapsed()
+        read_seconds = elapsed - self.write_seconds
+        print(f"Records read:   {self.records} ({self.records - self.rows} skipped or repeated in a batch)")
+        print(f"Rows {'written' if wrote else 'prepared'}:  {self.rows} in {self.batches} batches")
+        print(f"Read + parse:   {read_seconds:.2f}s ({self.records / max(read_seconds, 1e-9):.0f} records/s)")
+        if wrote:
+            print(f"Database:       {self.write_seconds:.2f}s ({self.rows / max(self.write_seconds, 1e-9):.0f} rows/s)")
+        print(f"Total:          {elapsed:.2f}s ({self.rows / max(elapsed, 1e-9):.0f} rows/s)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--file", help="Local dataset file (defaults to downloading the dump)")
+    parser.add_argument("--format", choices=FORMATS, help="Format of --file (defaults to its extension)")
+    parser.add_argument("--batch-size", type=int, default=500)
+    parser.add_argument("--copy", action="store_true", help="Load with COPY over DATABASE_URL instead of API upserts")
+    parser.add_argument("--prune", action="store_true", help="Delete mirror rows missing from the dump")
+    parser.add_argument("--dry-run", action="store_true", help="Parse and batch without writing")
+    args = parser.parse_args()
+
+    writer = None
+    if not args.dry_run:
+        writer = CopyWriter() if args.copy else UpsertWriter()
+
+    imported_at = datetime.now(timezone.utc).isoformat()
+    print(f"Importing {args.file or 'the Hipo dump'} into external_universities "
+          f"({'dry run' if args.dry_run else 'COPY' if args.copy else 'upsert'}, batches of {args.batch_size})")
+    print("=" * 50)
+
+    stats = ImportStats()
+    try:
+        for batch in batched(iter_dump(args.file, args.format), args.batch_size):
+            rows = to_rows(batch, imported_at)
+            stats.records += len(batch)
+            if writer and rows:
+                started = time.perf_counter()
+                writer.write(rows)
+                stats.write_seconds += time.perf_counter() - started
+            stats.rows += len(rows)
+            stats.batches += 1
+            stats.report()
+
+        if args.prune and writer:
+            writer.prune(imported_at)
+            print("  Pruned rows missing from the dump")
+    finally:
+        if writer:
+            writer.close()
+
+    print(f"\n{'=' * 50}")
+    stats.summary(wrote=writer is not None)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,141 @@
+"""
+Precompute university recommendations for every onboarded user.
+
+Run: python scripts/precompute_recommendations.py [--page-size 500] [--batch-size 100] [--workers N] [--full]
+
+Users are read in pages (keyset on profiles.id). Each page is split into
+batches scored in a process pool, every worker holding its own NumPy copy of
+the catalog, and the results are bulk-upserted into the recommendations table
+(migrations/012_recommendations.sql). The next page is fetched while the
+current one is being scored.
+
+Runs are incremental: a user is only rescored when user_profiles.updated_at
+differs from the stored profile_updated_at, or when the catalog has changed
+since their row was computed. --full rescores everyone.
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from dotenv import load_dotenv
+from supabase import create_client
+
+from app.core.database import execute
+from app.services.catalog import UniversityCatalog
+from app.services.fit_scoring import CatalogMatrix
+from app.services.recommendations import PROFILE_FIELDS, build_recommendation_row
+
+load_dotenv()
+
+# Set in each worker process by init_worker
+_worker_matrix = None
+
+
+def init_worker(rows: list, version: str):
+    global _worker_matrix
+    _worker_matrix = CatalogMatrix(rows, version)
+
+
+def score_batch(profiles: list) -> list:
+    """Worker: recommendation rows for a batch of user profiles."""
+    return [build_recommendation_row(_worker_matrix, profile) for profile in profiles]
+
+
+async def fetch_page(supabase, after_id: str, page_size: int) -> tuple[list, list, dict]:
+    """Next page of onboarded user ids, their profiles and their stored recommendation state."""
+    query = supabase.table("profiles").select("id").eq("onboarding_completed", True).order("id").limit(page_size)
+    if after_id:
+        query = query.gt("id", after_id)
+    page = await execute(query)
+    user_ids = [row["id"] for row in page.data or []]
+    if not user_ids:
+        return [], [], {}
+
+    profiles, stored = await asyncio.gather(
+        execute(supabase.table("user_profiles").select(PROFILE_FIELDS).in_("user_id", user_ids)),
+        execute(supabase.table("recommendations").select(
+            "user_id, profile_updated_at, catalog_version"
+        ).in_("user_id", user_ids))
+    )
+    return user_ids, profiles.data or [], {row["user_id"]: row for row in stored.data or []}
+
+
+def needs_refresh(profile: dict, stored: dict, catalog_version: str) -> bool:
+    return (
+        stored is None
+        or stored["catalog_version"] != catalog_version
+        or stored["profile_updated_at"] != profile.get("updated_at")
+    )
+
+
+async def precompute(args):
+    supabase_url, supabase_key = os.getenv("SUPABASE_URL"), os.getenv("SUPABASE_KEY")
+    if not supabase_url or not supabase_key:
+        print("Error: SUPABASE_URL and SUPABASE_KEY must be set in .env")
+        sys.exit(1)
+    supabase = create_client(supabase_url, supabase_key)
+
+    # Plain rows straight from the table: snapshot-backed rows hold an mmap and can't be sent to the pool
+    catalog = UniversityCatalog()
+    await catalog.load_database(supabase)
+    print(f"Catalog: {len(catalog.rows)} universities (version {catalog.version})")
+    print(f"Workers: {args.workers}, page size {args.page_size}, batch size {args.batch_size}")
+    print("=" * 50)
+
+    loop = asyncio.get_running_loop()
+    started = time.perf_counter()
+    seen = rescored = 0
+
+    with ProcessPoolExecutor(
+        max_workers=args.workers, initializer=init_worker, initargs=(catalog.rows, catalog.version)
+    ) as pool:
+        next_page = asyncio.create_task(fetch_page(supabase, None, args.page_size))
+        while True:
+            user_ids, profiles, stored = await next_page
+            if not user_ids:
+                break
+            # Overlap fetching the next page with scoring this one
+            next_page = asyncio.create_task(fetch_page(supabase, user_ids[-1], args.page_size))
+
+            stale = [
+                profile for profile in profiles
+                if args.full or needs_refresh(profile, stored.get(profile["user_id"]), catalog.version)
+            ]
+            batches = [stale[i:i + args.batch_size] for i in range(0, len(stale), args.batch_size)]
+            results = await asyncio.gather(*(loop.run_in_executor(pool, score_batch, batch) for batch in batches))
+            rows = [row for batch in results for row in batch]
+
+            if rows:
+                await execute(supabase.table("recommendations").upsert(rows, on_conflict="user_id"))
+
+            seen += len(user_ids)
+            rescored += len(rows)
+            elapsed = time.perf_counter() - started
+            print(f"  {seen} users checked, {rescored} rescored ({seen / elapsed:.0f} users/s)")
+
+    elapsed = time.perf_counter() - started
+    print(f"\n{'=' * 50}")
+    print(f"Done in {elapsed:.1f}s: {rescored} of {seen} onboarded users rescored, {seen - rescored} up to date.")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--page-size", type=int, default=500)
+    parser.add_argument("--batch-size", type=int, default=100)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 2)
+    parser.add_argument("--full", action="store_true", help="Rescore every user, not just changed ones")
+    args = parser.parse_args()
+
+    asyncio.run(precompute(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,36 +1,71 @@
 """
 Seed universities from real APIs into Supabase.
 
-Run: python scripts/seed_universities.py
+Run: python scripts/seed_universities.py [--batch-size 200] [--concurrency 4] [--refetch] [--dry-run]
+                                          [--source-file world_universities_and_domains.json]
 
 Data sources:
 1. Hipolabs Universities API (global, free, no key needed)
 2. Curated data with tuition/requirements (since Hipolabs only has names)
+
+Seeding is incremental. All countries are fetched concurrently over one shared
+client and every row gets a content hash; only the difference against the
+current table is written. New and changed rows are bulk-upserted on
+(name_key, country) and rows the sources no longer produce are soft-deleted
+(deleted_at), so ids referenced by shortlists and tasks survive a re-seed.
+
+Fetched sources are checkpointed to --checkpoint. An interrupted run re-uses
+them, and because unchanged rows are skipped it only writes what is left. The
+checkpoint is removed once a run completes.
+
+--source-file reads the Hipolabs records from a local JSON, NDJSON or CSV
+dataset instead of the API (streamed, keeping only the seeded countries), for
+offline and reproducible runs.
+
+Needs migrations/014_university_name_key.sql and 016_university_ingestion.sql.
 """
 
+import argparse
 import asyncio
-import httpx
+import bisect
+import functools
+import hashlib
+import json
 import os
 import sys
-import uuid
+import time
+from collections import deque
+from datetime import datetime, timezone
 from pathlib import Path
 
+import httpx
+
 # Add parent directory to path for imports
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
 from dotenv import load_dotenv
-from supabase import create_client
+from supabase import Client, create_client
+
+from app.core.database import execute
+from university_datasets import FORMATS, iter_records
 
 load_dotenv()
 
-SUPABASE_URL = os.getenv("SUPABASE_URL")
-SUPABASE_KEY = os.getenv("SUPABASE_KEY")
+_supabase = None
 
-if not SUPABASE_URL or not SUPABASE_KEY:
-    print("Error: SUPABASE_URL and SUPABASE_KEY must be set in .env")
-    sys.exit(1)
 
-supabase = create_client(SUPABASE_URL, SUPABASE_KEY)
+def get_supabase_client() -> Client:
+    """Supabase client, created on first use so the data below can be imported without credentials."""
+    global _supabase
+
+    if _supabase is None:
+        supabase_url, supabase_key = os.getenv("SUPABASE_URL"), os.getenv("SUPABASE_KEY")
+        if not supabase_url or not supabase_key:
+            print("Error: SUPABASE_URL and SUPABASE_KEY must be set in .env")
+            sys.exit(1)
+        _supabase = create_client(supabase_url, supabase_key)
+    return _supabase
+
 
 # Hipolabs API - free, no key needed
 HIPOLABS_API = "http://universities.hipolabs.com/search"
@@ -45,6 +80,70 @@ COUNTRIES = [
     "India"
 ]
 
+# Name keywords identifying each curated university's country. Keywords that
+# pick out a single curated university are also seeded as search aliases.
+COUNTRY_MAPPING = {
+    "Massachusetts": "USA", "Stanford": "USA", "Harvard": "USA", "California": "USA",
+    "Chicago": "USA", "Princeton": "USA", "Yale": "USA", "Pennsylvania": "USA",
+    "Duke": "USA", "Northwestern": "USA", "Cornell": "USA", "Columbia": "USA",
+    "New York": "USA", "Michigan": "USA", "Carnegie": "USA", "Georgia": "USA",
+    "Texas": "USA", "Illinois": "USA", "Boston": "USA", "Washington": "USA",
+    "Purdue": "USA", "Southern California": "USA", "Wisconsin": "USA",
+    "Minnesota": "USA", "Ohio": "USA", "Penn State": "USA", "Arizona": "USA",
+    "Florida": "USA", "Indiana": "USA", "Maryland": "USA", "Virginia": "USA",
+    "Rice": "USA",
+    "Oxford": "UK", "Cambridge": "UK", "Imperial": "UK", "University College London": "UK",
+    "London School": "UK", "Edinburgh": "UK", "King's College": "UK", "Manchester": "UK",
+    "Warwick": "UK", "Bristol": "UK", "Glasgow": "UK", "Durham": "UK",
+    "Birmingham": "UK", "Leeds": "UK", "Southampton": "UK",
+    "Toronto": "Canada", "McGill": "Canada", "British Columbia": "Canada",
+    "Waterloo": "Canada", "Alberta": "Canada", "Western": "Canada", "Queen's": "Canada",
+    "Montreal": "Canada", "McMaster": "Canada", "Calgary": "Canada", "Ottawa": "Canada",
+    "Simon Fraser": "Canada",
+    "Melbourne": "Australia", "Sydney": "Australia", "Australian National": "Australia",
+    "Queensland": "Australia", "Monash": "Australia", "New South Wales": "Australia",
+    "Western Australia": "Australia", "Adelaide": "Australia", "Technology Sydney": "Australia",
+    "RMIT": "Australia",
+    "Technical University of Munich": "Germany", "Ludwig": "Germany", "Heidelberg": "Germany",
+    "Humboldt": "Germany", "Free University": "Germany", "RWTH": "Germany",
+    "Technical University of Berlin": "Germany", "Freiburg": "Germany", "Tübingen": "Germany",
+    "Bonn": "Germany",
+    "IIT": "India", "Indian Institute": "India", "Delhi University": "India",
+    "Jawaharlal": "India", "IIM": "India", "BITS": "India", "Vellore": "India",
+    "Manipal": "India", "SRM": "India", "Amity": "India", "Lovely": "India",
+}
+
+# Common short names that don't follow from the full name, for search
+UNIVERSITY_ALIASES = {
+    "Massachusetts Institute of Technology": ["MIT"],
+    "California Institute of Technology": ["Caltech"],
+    "University of California, Berkeley": ["UC Berkeley", "Berkeley"],
+    "University of California, Los Angeles": ["UCLA"],
+    "University of California San Diego": ["UCSD", "UC San Diego"],
+    "University of Pennsylvania": ["UPenn", "Penn"],
+    "University of Michigan-Ann Arbor": ["UMich", "University of Michigan"],
+    "University of Texas at Austin": ["UT Austin"],
+    "University of Illinois Urbana-Champaign": ["UIUC"],
+    "University of Southern California": ["USC"],
+    "Georgia Institute of Technology": ["Georgia Tech"],
+    "Carnegie Mellon University": ["CMU"],
+    "New York University": ["NYU"],
+    "Penn State University": ["Pennsylvania State University"],
+    "University College London": ["UCL"],
+    "London School of Economics": ["LSE"],
+    "Imperial College London": ["Imperial"],
+    "King's College London": ["KCL", "Kings College London"],
+    "University of British Columbia": ["UBC"],
+    "Australian National University": ["ANU"],
+    "University of New South Wales": ["UNSW"],
+    "University of Technology Sydney": ["UTS"],
+    "Technical University of Munich": ["TU Munich", "TUM", "TU Muenchen"],
+    "Ludwig Maximilian University of Munich": ["LMU Munich", "LMU"],
+    "Technical University of Berlin": ["TU Berlin"],
+    "Free University of Berlin": ["FU Berlin"],
+    "Humboldt University of Berlin": ["HU Berlin"],
+}
+
 # Curated tuition and requirements data for top universities
 CURATED_DATA = {
     # USA
@@ -969,22 +1068,99 @@ CURATED_DATA = {
     },
 }
 
+# Map Hipolabs country names to ours
+COUNTRY_NAMES = {
+    "United States": "USA",
+    "United Kingdom": "UK",
+    "Canada": "Canada",
+    "Australia": "Australia",
+    "Germany": "Germany",
+    "India": "India"
+}
 
-async def fetch_hipolabs_universities(country: str, retries: int = 3) -> list:
-    """Fetch universities from Hipolabs API for a given country with retry logic."""
+# Additional (uncurated) universities kept per country
+HIPOLABS_PER_COUNTRY = 30
+
+# Rows owned by this script; anything else (e.g. shortlisted external universities) is never soft-deleted
+SEEDED_SOURCES = ("curated", "hipolabs")
+
+# Columns covered by content_hash
+CONTENT_FIELDS = (
+    "name", "country", "city", "ranking", "tuition_min", "tuition_max", "acceptance_rate",
+    "min_gpa", "programs", "website", "data_source", "is_external",
+)
+
+DEFAULT_CHECKPOINT = Path(__file__).parent / ".seed_checkpoint.json"
+
+PAGE_SIZE = 1000
+
+
+async def fetch_hipolabs_universities(client: httpx.AsyncClient, country: str, retries: int = 3) -> list | None:
+    """Fetch universities from Hipolabs API for a given country with retry logic; None if every attempt failed."""
     for attempt in range(retries):
-        async with httpx.AsyncClient(timeout=60.0) as client:
-            try:
-                print(f"  Attempt {attempt + 1}/{retries}...")
-                response = await client.get(HIPOLABS_API, params={"country": country})
-                response.raise_for_status()
-                return response.json()
-            except Exception as e:
-                print(f"  Error: {e}")
-                if attempt < retries - 1:
-                    await asyncio.sleep(2)  # Wait before retry
-                continue
-    return []
+        try:
+            response = await client.get(HIPOLABS_API, params={"country": country})
+            response.raise_for_status()
+            return response.json()
+        except Exception as e:
+            print(f"  {country}: attempt {attempt + 1}/{retries} failed: {e}")
+            if attempt < retries - 1:
+                await asyncio.sleep(2 * (attempt + 1))  # Back off before retrying
+    return None
+
+
+def load_checkpoint(path: Path) -> dict:
+    if path.exists():
+        return json.loads(path.read_text(encoding="utf-8"))
+    return {"sources": {}}
+
+
+def save_checkpoint(path: Path, checkpoint: dict):
+    tmp = path.with_suffix(".tmp")
+    tmp.write_text(json.dumps(checkpoint), encoding="utf-8")
+    tmp.replace(path)
+
+
+async def fetch_sources(checkpoint: dict, checkpoint_path: Path) -> set:
+    """
+    Fetch every country not already in the checkpoint, concurrently over one client.
+    Returns the countries that could not be fetched.
+    """
+    sources = checkpoint["sources"]
+    missing = [country for country in COUNTRIES if country not in sources]
+    for country in COUNTRIES:
+        if country in sources:
+            print(f"  {country}: {len(sources[country])} universities (checkpoint)")
+    if not missing:
+        return set()
+
+    async with httpx.AsyncClient(timeout=60.0, limits=httpx.Limits(max_connections=len(missing))) as client:
+        async def fetch(country: str):
+            universities = await fetch_hipolabs_universities(client, country)
+            if universities is not None:
+                sources[country] = universities
+                save_checkpoint(checkpoint_path, checkpoint)
+                print(f"  {country}: {len(universities)} universities")
+            return country, universities
+
+        results = await asyncio.gather(*(fetch(country) for country in missing))
+
+    return {country for country, universities in results if universities is None}
+
+
+def load_local_sources(path: str, fmt: str = None) -> tuple[dict, set]:
+    """
+    Hipolabs-format records for COUNTRIES from a local dataset file, streamed.
+    Returns the sources and the countries the file has no records for.
+    """
+    sources = {country: [] for country in COUNTRIES}
+    for uni in iter_records(path, fmt):
+        if uni.get("country") in sources:
+            sources[uni["country"]].append(uni)
+
+    for country, universities in sources.items():
+        print(f"  {country}: {len(universities)} universities ({path})")
+    return sources, {country for country, universities in sources.items() if not universities}
 
 
 def normalize_name(name: str) -> str:
@@ -992,60 +1168,133 @@ def normalize_name(name: str) -> str:
     return name.lower().strip()
 
 
+def name_key(name: str) -> str:
+    """Python side of the universities.name_key column (lower(btrim(name)))."""
+    return name.strip(" ").lower()
+
+
+class KeywordMatcher:
+    """
+    Aho-Corasick automaton over a list of keywords, built once.
+
+    One pass over a text finds every keyword it contains, however many
+    keywords there are. Keywords are identified by their position in the list.
+    """
+
+    def __init__(self, keywords: list):
+        self.keywords = keywords
+        self._goto = [{}]
+        self._fail = [0]
+        self._output = [()]
+
+        for index, keyword in enumerate(keywords):
+            node = 0
+            for char in keyword:
+                if char not in self._goto[node]:
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._output.append(())
+                    self._goto[node][char] = len(self._goto) - 1
+                node = self._goto[node][char]
+            self._output[node] += (index,)
+
+        # Breadth-first: a fail link points at the longest proper suffix that is also a
+        # keyword prefix (depth-1 nodes fail to the root)
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for char, child in self._goto[node].items():
+                queue.append(child)
+                fallback = self._fail[node]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                self._fail[child] = self._goto[fallback].get(char, 0)
+                self._output[child] += self._output[self._fail[child]]
+
+    def matches(self, text: str) -> set:
+        """Indexes of every keyword that occurs in text."""
+        found = set()
+        node = 0
+        for char in text:
+            while node and char not in self._goto[node]:
+                node = self._fail[node]
+            node = self._goto[node].get(char, 0)
+            if self._output[node]:
+                found.update(self._output[node])
+        return found
+
+    def first(self, text: str) -> int | None:
+        """Lowest index of a keyword that occurs in text (i.e. the first in list order)."""
+        return min(self.matches(text), default=None)
+
+
+class CuratedMatcher:
+    """
+    Finds the curated entry for a university name: the first curated name (in
+    CURATED_DATA order) that occurs in the name, or that contains it.
+
+    "Curated name in name" is the keyword automaton. "Name in curated name" is
+    a single find() over every curated name joined with a separator the names
+    can't contain: the first hit is in the earliest curated name containing it.
+    """
+
+    SEPARATOR = "\x00"
+
+    def __init__(self, curated_names: list):
+        self.names = curated_names
+        normalized = [normalize_name(name) for name in curated_names]
+        self._keywords = KeywordMatcher(normalized)
+        self._joined = self.SEPARATOR.join(normalized)
+        self._starts = []
+        offset = 0
+        for name in normalized:
+            self._starts.append(offset)
+            offset += len(name) + len(self.SEPARATOR)
+
+    def match(self, name: str) -> str | None:
+        normalized = normalize_name(name)
+        contained = self._keywords.first(normalized)
+        position = self._joined.find(normalized)
+        container = bisect.bisect_right(self._starts, position) - 1 if position >= 0 else None
+
+        candidates = [index for index in (contained, container) if index is not None]
+        return self.names[min(candidates)] if candidates else None
+
+
+@functools.cache
+def get_curated_matcher() -> CuratedMatcher:
+    return CuratedMatcher(list(CURATED_DATA))
+
+
+@functools.cache
+def get_country_matcher() -> tuple[KeywordMatcher, tuple]:
+    """Matcher over the COUNTRY_MAPPING keywords, plus the country for each keyword index."""
+    return KeywordMatcher([keyword.lower() for keyword in COUNTRY_MAPPING]), tuple(COUNTRY_MAPPING.values())
+
+
 def get_curated_data(name: str) -> dict | None:
     """Get curated data for a university if available."""
-    for curated_name, data in CURATED_DATA.items():
-        if normalize_name(curated_name) in normalize_name(name) or normalize_name(name) in normalize_name(curated_name):
-            return {**data, "matched_name": curated_name}
-    return None
+    curated_name = get_curated_matcher().match(name)
+    if curated_name is None:
+        return None
+    return {**CURATED_DATA[curated_name], "matched_name": curated_name}
+
+
+def country_for(name: str, default: str = "USA") -> str:
+    """Country of the first COUNTRY_MAPPING keyword found in the name."""
+    matcher, countries = get_country_matcher()
+    index = matcher.first(name.lower())
+    return default if index is None else countries[index]
 
 
 def create_curated_only_universities() -> list:
     """Create university records from curated data that might not be in Hipolabs."""
-    # Group curated data by country
-    country_mapping = {
-        "Massachusetts": "USA", "Stanford": "USA", "Harvard": "USA", "California": "USA",
-        "Chicago": "USA", "Princeton": "USA", "Yale": "USA", "Pennsylvania": "USA",
-        "Duke": "USA", "Northwestern": "USA", "Cornell": "USA", "Columbia": "USA",
-        "New York": "USA", "Michigan": "USA", "Carnegie": "USA", "Georgia": "USA",
-        "Texas": "USA", "Illinois": "USA", "Boston": "USA", "Washington": "USA",
-        "Purdue": "USA", "Southern California": "USA", "Wisconsin": "USA",
-        "Minnesota": "USA", "Ohio": "USA", "Penn State": "USA", "Arizona": "USA",
-        "Florida": "USA", "Indiana": "USA", "Maryland": "USA", "Virginia": "USA",
-        "Rice": "USA",
-        "Oxford": "UK", "Cambridge": "UK", "Imperial": "UK", "University College London": "UK",
-        "London School": "UK", "Edinburgh": "UK", "King's College": "UK", "Manchester": "UK",
-        "Warwick": "UK", "Bristol": "UK", "Glasgow": "UK", "Durham": "UK",
-        "Birmingham": "UK", "Leeds": "UK", "Southampton": "UK",
-        "Toronto": "Canada", "McGill": "Canada", "British Columbia": "Canada",
-        "Waterloo": "Canada", "Alberta": "Canada", "Western": "Canada", "Queen's": "Canada",
-        "Montreal": "Canada", "McMaster": "Canada", "Calgary": "Canada", "Ottawa": "Canada",
-        "Simon Fraser": "Canada",
-        "Melbourne": "Australia", "Sydney": "Australia", "Australian National": "Australia",
-        "Queensland": "Australia", "Monash": "Australia", "New South Wales": "Australia",
-        "Western Australia": "Australia", "Adelaide": "Australia", "Technology Sydney": "Australia",
-        "RMIT": "Australia",
-        "Technical University of Munich": "Germany", "Ludwig": "Germany", "Heidelberg": "Germany",
-        "Humboldt": "Germany", "Free University": "Germany", "RWTH": "Germany",
-        "Technical University of Berlin": "Germany", "Freiburg": "Germany", "Tübingen": "Germany",
-        "Bonn": "Germany",
-        "IIT": "India", "Indian Institute": "India", "Delhi University": "India",
-        "Jawaharlal": "India", "IIM": "India", "BITS": "India", "Vellore": "India",
-        "Manipal": "India", "SRM": "India", "Amity": "India", "Lovely": "India",
-    }
 
     universities = []
     for name, data in CURATED_DATA.items():
-        country = "USA"
-        for keyword, c in country_mapping.items():
-            if keyword.lower() in name.lower():
-                country = c
-                break
-
         universities.append({
-            "id": str(uuid.uuid4()),
             "name": name,
-            "country": country,
+            "country": country_for(name),
             "city": data.get("city"),
             "ranking": data.get("ranking"),
             "tuition_min": data.get("tuition_min"),
@@ -1055,59 +1304,39 @@ def create_curated_only_universities() -> list:
             "programs": data.get("programs", []),
             "website": None,
             "data_source": "curated",
+            "is_external": False,
         })
 
     return universities
 
 
-async def seed_universities():
-    """Main function to seed universities."""
-    print("Starting university seeding...")
-    print("=" * 50)
-
+def build_universities(sources: dict) -> list:
+    """Desired table contents: curated universities first, then up to HIPOLABS_PER_COUNTRY more per country."""
     all_universities = []
     seen_names = set()
 
     # First, add all curated universities (high quality data)
-    print("\nAdding curated universities...")
-    curated_unis = create_curated_only_universities()
-    for uni in curated_unis:
+    for uni in create_curated_only_universities():
         if normalize_name(uni["name"]) not in seen_names:
             seen_names.add(normalize_name(uni["name"]))
             all_universities.append(uni)
-    print(f"  Added {len(curated_unis)} curated universities")
 
-    # Then fetch from Hipolabs and add universities not already in curated
+    # Then add Hipolabs universities not already in curated, in COUNTRIES order
     for country in COUNTRIES:
-        print(f"\nFetching additional universities from {country}...")
-        universities = await fetch_hipolabs_universities(country)
-        print(f"  Found {len(universities)} universities from API")
-
-        # Map country names
-        country_map = {
-            "United States": "USA",
-            "United Kingdom": "UK",
-            "Canada": "Canada",
-            "Australia": "Australia",
-            "Germany": "Germany",
-            "India": "India"
-        }
-
         added = 0
-        for uni in universities:
-            name = uni.get("name", "")
+        for uni in sources.get(country, []):
+            name = (uni.get("name") or "").strip()
             if not name or normalize_name(name) in seen_names:
                 continue
 
             # Skip if already have curated version
-            curated = get_curated_data(name)
-            if curated:
+            if get_curated_data(name):
                 continue
 
-            uni_data = {
-                "id": str(uuid.uuid4()),
+            seen_names.add(normalize_name(name))
+            all_universities.append({
                 "name": name,
-                "country": country_map.get(country, country),
+                "country": COUNTRY_NAMES.get(country, country),
                 "city": None,
                 "ranking": None,
                 "tuition_min": None,
@@ -1115,57 +1344,239 @@ async def seed_universities():
                 "acceptance_rate": None,
                 "min_gpa": None,
                 "programs": [],
-                "website": uni.get("web_pages", [None])[0],
+                "website": (uni.get("web_pages") or [None])[0],
                 "data_source": "hipolabs",
-            }
-
-            seen_names.add(normalize_name(name))
-            all_universities.append(uni_data)
+                "is_external": False,
+            })
             added += 1
 
             # Limit additional universities per country
-            if added >= 30:
+            if added >= HIPOLABS_PER_COUNTRY:
                 break
 
-        print(f"  Added {added} additional universities from {country}")
+    return all_universities
+
+
+def content_hash(row: dict) -> str:
+    content = {field: row.get(field) for field in CONTENT_FIELDS}
+    return hashlib.sha1(json.dumps(content, sort_keys=True, default=str).encode()).hexdigest()
+
+
+async def load_existing(supabase: Client) -> dict:
+    """(name_key, country) -> current row for every university in the table, deleted or not."""
+    rows = []
+    while True:
+        page = await execute(supabase.table("universities").select(
+            "id, name, name_key, country, content_hash, data_source, deleted_at"
+        ).order("id").range(len(rows), len(rows) + PAGE_SIZE - 1))
+        rows.extend(page.data or [])
+        if len(page.data or []) < PAGE_SIZE:
+            break
+    return {(row["name_key"], row["country"]): row for row in rows}
+
+
+def diff_universities(desired: list, existing: dict, failed_countries: set) -> tuple[list, list, list]:
+    """
+    Split the desired rows into inserts and updates (changed content or previously
+    soft-deleted), and list the ids of seeded rows to soft-delete. Hipolabs rows of
+    countries that failed to fetch are left alone rather than deleted.
+    """
+    inserts, updates = [], []
+    desired_keys = set()
+
+    for row in desired:
+        key = (name_key(row["name"]), row["country"])
+        desired_keys.add(key)
+        row["content_hash"] = content_hash(row)
+
+        current = existing.get(key)
+        if current is None:
+            inserts.append(row)
+        elif current["content_hash"] != row["content_hash"] or current["deleted_at"]:
+            updates.append(row)
+
+    failed = {COUNTRY_NAMES.get(country, country) for country in failed_countries}
+    deletes = [
+        current["id"] for key, current in existing.items()
+        if key not in desired_keys
+        and current["deleted_at"] is None
+        and current["data_source"] in SEEDED_SOURCES
+        and not (current["data_source"] == "hipolabs" and current["country"] in failed)
+    ]
+    return inserts, updates, deletes
+
+
+class Progress:
+    """Rows written so far and the rate, printed as batches finish."""
+
+    def __init__(self, total: int):
+        self.total = total
+        self.done = 0
+        self.started = time.perf_counter()
+
+    def add(self, count: int, label: str):
+        self.done += count
+        elapsed = time.perf_counter() - self.started
+        print(f"  {label}: {self.done}/{self.total} rows ({self.done / elapsed:.0f} rows/s)")
+
+    def rate(self) -> float:
+        return self.done / max(time.perf_counter() - self.started, 1e-9)
+
+
+async def apply_changes(supabase: Client, rows: list, deletes: list, batch_size: int, concurrency: int) -> list:
+    """Bulk-upsert rows and soft-delete ids in concurrent batches; returns the upserted rows (with ids)."""
+    now = datetime.now(timezone.utc).isoformat()
+    progress = Progress(len(rows) + len(deletes))
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def upsert(batch: list) -> list:
+        async with semaphore:
+            result = await execute(supabase.table("universities").upsert(
+                [{**row, "updated_at": now, "deleted_at": None} for row in batch],
+                on_conflict="name_key,country"
+            ))
+        progress.add(len(batch), "upserted")
+        return result.data or []
+
+    async def soft_delete(ids: list):
+        async with semaphore:
+            await execute(supabase.table("universities").update({
+                "deleted_at": now, "updated_at": now
+            }).in_("id", ids).is_("deleted_at", "null"))
+        progress.add(len(ids), "soft-deleted")
+
+    upserted = await asyncio.gather(*(
+        upsert(rows[i:i + batch_size]) for i in range(0, len(rows), batch_size)
+    ))
+    await asyncio.gather(*(
+        soft_delete(deletes[i:i + batch_size]) for i in range(0, len(deletes), batch_size)
+    ))
+
+    if progress.total:
+        print(f"  {progress.total} rows written at {progress.rate():.0f} rows/s")
+    return [row for batch in upserted for row in batch]
+
+
+def build_university_aliases(universities: list) -> list:
+    """
+    Search aliases for the curated universities: explicit short names plus
+    COUNTRY_MAPPING keywords that identify exactly one university.
+    """
+    curated = [uni for uni in universities if uni["data_source"] == "curated"]
+    aliases = {}
+
+    keywords = list(COUNTRY_MAPPING)
+    matcher, _ = get_country_matcher()
+    matches = {}
+    for uni in curated:
+        for index in matcher.matches(uni["name"].lower()):
+            matches.setdefault(index, []).append(uni)
+    for index, unis in sorted(matches.items()):
+        keyword = keywords[index]
+        if len(unis) == 1 and keyword.lower() != unis[0]["name"].lower():
+            aliases[(unis[0]["id"], keyword)] = "country_mapping"
+
+    ids_by_name = {uni["name"]: uni["id"] for uni in curated}
+    for name, short_names in UNIVERSITY_ALIASES.items():
+        if name in ids_by_name:
+            for alias in short_names:
+                aliases[(ids_by_name[name], alias)] = "curated"
+
+    return [
+        {"university_id": university_id, "alias": alias, "source": source}
+        for (university_id, alias), source in aliases.items()
+    ]
+
+
+async def seed_universities(args):
+    """Main function to seed universities."""
+    supabase = get_supabase_client()
+    checkpoint_path = Path(args.checkpoint)
+    if args.refetch and checkpoint_path.exists():
+        checkpoint_path.unlink()
+
+    print("Starting university seeding...")
+    print("=" * 50)
+
+    print("\nFetching sources...")
+    if args.source_file:
+        (sources, failed_countries), existing = await asyncio.gather(
+            asyncio.to_thread(load_local_sources, args.source_file, args.format),
+            load_existing(supabase)
+        )
+    else:
+        checkpoint = load_checkpoint(checkpoint_path)
+        failed_countries, existing = await asyncio.gather(
+            fetch_sources(checkpoint, checkpoint_path),
+            load_existing(supabase)
+        )
+        sources = checkpoint["sources"]
+    if failed_countries:
+        print(f"  Could not fetch {', '.join(sorted(failed_countries))}; their existing rows are kept")
+
+    desired = build_universities(sources)
+    inserts, updates, deletes = diff_universities(desired, existing, failed_countries)
 
     print(f"\n{'=' * 50}")
-    print(f"Total universities to insert: {len(all_universities)}")
+    print(f"{len(desired)} universities from sources, {len(existing)} in the table")
+    print(f"  {len(inserts)} new, {len(updates)} changed, {len(deletes)} to soft-delete, "
+          f"{len(desired) - len(inserts) - len(updates)} unchanged")
+
+    if args.dry_run:
+        return
 
-    # Clear existing universities
-    print("\nClearing existing universities...")
+    print("\nApplying changes...")
+    upserted = await apply_changes(supabase, inserts + updates, deletes, args.batch_size, args.concurrency)
+
+    # Aliases for ranked search; ids come from the table, so unchanged universities keep theirs
+    print("\nUpserting search aliases...")
+    ids = {key: row["id"] for key, row in existing.items()}
+    ids.update({(row["name_key"], row["country"]): row["id"] for row in upserted})
+    curated = [
+        {**uni, "id": ids[(name_key(uni["name"]), uni["country"])]}
+        for uni in desired if (name_key(uni["name"]), uni["country"]) in ids
+    ]
+    aliases = build_university_aliases(curated)
     try:
-        supabase.table("universities").delete().neq("id", "00000000-0000-0000-0000-000000000000").execute()
-        print("  Cleared existing data")
+        await execute(supabase.table("university_aliases").upsert(aliases, on_conflict="university_id,alias"))
+        print(f"  Upserted {len(aliases)} aliases")
     except Exception as e:
-        print(f"  Warning: Could not clear existing data: {e}")
-
-    # Insert in batches
-    print("\nInserting universities...")
-    batch_size = 50
-    inserted = 0
+        print(f"  Warning: Could not upsert aliases (run migrations/011_university_search.sql): {e}")
 
-    for i in range(0, len(all_universities), batch_size):
-        batch = all_universities[i:i + batch_size]
-        try:
-            result = supabase.table("universities").insert(batch).execute()
-            inserted += len(batch)
-            print(f"  Inserted batch {i // batch_size + 1}: {len(batch)} universities")
-        except Exception as e:
-            print(f"  Error inserting batch: {e}")
+    if not args.source_file and not failed_countries and checkpoint_path.exists():
+        checkpoint_path.unlink()
 
     print(f"\n{'=' * 50}")
-    print(f"Seeding complete! Inserted {inserted} universities.")
+    print("Seeding complete!")
 
     # Verify and show breakdown
     print("\nVerifying by country...")
-    for country in ["USA", "UK", "Canada", "Australia", "Germany", "India"]:
-        count = supabase.table("universities").select("id", count="exact").eq("country", country).execute()
+    counts = await asyncio.gather(*(
+        execute(supabase.table("universities").select("id", count="exact").eq(
+            "country", country
+        ).is_("deleted_at", "null").limit(1))
+        for country in COUNTRY_NAMES.values()
+    ))
+    for country, count in zip(COUNTRY_NAMES.values(), counts):
         print(f"  {country}: {count.count} universities")
 
-    total = supabase.table("universities").select("id", count="exact").execute()
+    total = await execute(supabase.table("universities").select("id", count="exact").is_("deleted_at", "null").limit(1))
     print(f"\nTotal in database: {total.count} universities")
 
 
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--batch-size", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=4, help="Batches written in parallel")
+    parser.add_argument("--checkpoint", default=str(DEFAULT_CHECKPOINT), help="Fetched-sources checkpoint file")
+    parser.add_argument("--refetch", action="store_true", help="Ignore the checkpoint and fetch every source again")
+    parser.add_argument("--dry-run", action="store_true", help="Print the diff without writing")
+    parser.add_argument("--source-file", help="Local Hipolabs dataset (JSON, NDJSON or CSV) instead of the API")
+    parser.add_argument("--format", choices=FORMATS, help="Format of --source-file (defaults to its extension)")
+    args = parser.parse_args()
+
+    asyncio.run(seed_universities(args))
+
+
 if __name__ == "__main__":
-    asyncio.run(seed_universities())
+    main()
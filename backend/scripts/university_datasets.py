@@ -0,0 +1,142 @@
+"""
+Streaming readers for university dataset files (Hipo format), shared by the
+seed and import scripts.
+
+Supported formats, picked from the file extension or given explicitly:
+
+- json:   one top-level array of objects (the Hipo world_universities_and_domains.json)
+- ndjson: one object per line (.ndjson / .jsonl)
+- csv:    a header row; list columns (domains, web_pages) hold a JSON array or
+          ";"-separated values
+
+Records are yielded one at a time, so a file never has to be held in memory;
+the JSON reader decodes the array incrementally from fixed-size chunks.
+"""
+
+import csv
+import json
+from pathlib import Path
+from typing import Iterable, Iterator
+
+FORMATS = ("json", "ndjson", "csv")
+
+SUFFIX_FORMATS = {".json": "json", ".ndjson": "ndjson", ".jsonl": "ndjson", ".csv": "csv"}
+
+LIST_COLUMNS = ("domains", "web_pages")
+
+CHUNK_SIZE = 64 * 1024
+
+_WHITESPACE = " \t\n\r"
+_DELIMITERS = _WHITESPACE + ",]"
+
+
+def detect_format(path: str) -> str:
+    fmt = SUFFIX_FORMATS.get(Path(path).suffix.lower())
+    if fmt is None:
+        raise ValueError(f"Can't tell the format of {path}; pass one of {', '.join(FORMATS)}")
+    return fmt
+
+
+def read_chunks(path: str, size: int = CHUNK_SIZE) -> Iterator[str]:
+    with open(path, encoding="utf-8") as f:
+        while chunk := f.read(size):
+            yield chunk
+
+
+def iter_json_array(chunks: Iterable[str]) -> Iterator[dict]:
+    """Elements of a top-level JSON array, decoded incrementally from text chunks."""
+    decoder = json.JSONDecoder()
+    chunks = iter(chunks)
+    buffer, pos, exhausted = "", 0, False
+
+    def fill() -> bool:
+        nonlocal buffer, pos, exhausted
+        chunk = next(chunks, None)
+        if chunk is None:
+            exhausted = True
+            return False
+        buffer = buffer[pos:] + chunk
+        pos = 0
+        return True
+
+    def skip(chars: str) -> str:
+        """Advance past `chars`, reading more input as needed; returns the next char ('' at the end)."""
+        nonlocal pos
+        while True:
+            while pos < len(buffer) and buffer[pos] in chars:
+                pos += 1
+            if pos < len(buffer) or not fill():
+                return buffer[pos:pos + 1]
+
+    if skip(_WHITESPACE) != "[":
+        raise ValueError("Expected a JSON array")
+    pos += 1
+    if skip(_WHITESPACE) == "]":
+        return
+
+    while True:
+        while True:
+            try:
+                element, end = decoder.raw_decode(buffer, pos)
+                # Only a delimiter proves the value is complete ("12" may continue as "12.5" in the next chunk)
+                if exhausted or (end < len(buffer) and buffer[end] in _DELIMITERS):
+                    break
+            except json.JSONDecodeError:
+                if exhausted:
+                    raise
+            fill()
+
+        pos = end
+        yield element
+
+        char = skip(_WHITESPACE)
+        if char == "]":
+            return
+        if char != ",":
+            raise ValueError("Expected ',' or ']' after an array element" if char else "Unterminated JSON array")
+        pos += 1
+        skip(_WHITESPACE)
+
+
+def iter_ndjson(path: str) -> Iterator[dict]:
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+
+def parse_list(value: str | None) -> list:
+    if not value:
+        return []
+    if value.lstrip().startswith("["):
+        return json.loads(value)
+    return [item.strip() for item in value.split(";") if item.strip()]
+
+
+def iter_csv(path: str) -> Iterator[dict]:
+    with open(path, encoding="utf-8", newline="") as f:
+        for row in csv.DictReader(f):
+            yield {key: parse_list(value) if key in LIST_COLUMNS else value for key, value in row.items()}
+
+
+def iter_records(path: str, fmt: str = None) -> Iterator[dict]:
+    """Stream the records of a dataset file."""
+    fmt = fmt or detect_format(path)
+    if fmt == "json":
+        return iter_json_array(read_chunks(path))
+    if fmt == "ndjson":
+        return iter_ndjson(path)
+    if fmt == "csv":
+        return iter_csv(path)
+    raise ValueError(f"Unknown format {fmt!r}; expected one of {', '.join(FORMATS)}")
+
+
+def batched(records: Iterable, size: int) -> Iterator[list]:
+    batch = []
+    for record in records:
+        batch.append(record)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
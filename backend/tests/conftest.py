@@ -0,0 +1,42 @@
+"""
+Shared fixtures. Run from backend/: pip install -r requirements-dev.txt && pytest
+
+Tests never touch real services: LLM calls go to scripts/fake_openrouter.py
+in-process, and database access is faked per test.
+"""
+import os
+
+os.environ.setdefault("SUPABASE_URL", "https://test.supabase.co")
+os.environ.setdefault("SUPABASE_KEY", "test-key")
+os.environ.setdefault("OPENROUTER_API_KEY", "test-key")
+os.environ.setdefault("LLM_RETRY_BASE_DELAY", "0.01")
+os.environ.setdefault("LLM_RETRY_MAX_DELAY", "0.02")
+
+import httpx
+import pytest
+from openai import AsyncOpenAI
+
+from app.core import llm_gateway
+from scripts import fake_openrouter
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+
+@pytest.fixture
+def fake_llm(monkeypatch):
+    """Route the gateway's LLM client to the fake OpenRouter app; yields its config dict."""
+    defaults = dict(fake_openrouter.config)
+    fake_openrouter.config.update(latency_ms=0, failure_rate=0.0, hang=False)
+    client = AsyncOpenAI(
+        api_key="test-key",
+        base_url="http://fake-openrouter",
+        max_retries=0,
+        http_client=httpx.AsyncClient(transport=httpx.ASGITransport(app=fake_openrouter.app)),
+    )
+    monkeypatch.setattr(llm_gateway, "get_llm_client", lambda: client)
+    yield fake_openrouter.config
+    fake_openrouter.config.clear()
+    fake_openrouter.config.update(defaults)
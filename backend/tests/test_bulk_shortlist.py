@@ -0,0 +1,80 @@
+from types import SimpleNamespace
+
+import pytest
+from fastapi import BackgroundTasks
+
+from app.api import universities
+from app.schemas import BulkShortlistRequest, ShortlistRequest
+
+pytestmark = pytest.mark.anyio
+
+IN_CATALOG = "00000000-0000-0000-0000-000000000001"
+CREATED_SINCE = "00000000-0000-0000-0000-000000000002"
+UNKNOWN = "00000000-0000-0000-0000-000000000003"
+
+
+class FakeQuery:
+    def __init__(self, supabase, table):
+        self.supabase = supabase
+        self.table = table
+        self.filters = {}
+
+    def __getattr__(self, name):
+        return lambda *args, **kwargs: self
+
+    def in_(self, column, values):
+        self.filters[column] = values
+        return self
+
+    def upsert(self, rows, **kwargs):
+        self.supabase.upserted = rows
+        return self
+
+    def execute(self):
+        if self.table == "universities":
+            data = [{"id": uid} for uid in self.filters["id"] if uid in self.supabase.universities]
+        else:
+            data = [{**row, "id": "row"} for row in self.supabase.upserted]
+        return SimpleNamespace(data=data)
+
+
+class FakeSupabase:
+    def __init__(self, universities):
+        self.universities = universities
+        self.upserted = []
+
+    def table(self, name):
+        return FakeQuery(self, name)
+
+
+async def test_universities_missing_from_the_catalog_are_still_shortlisted(monkeypatch):
+    async def guard_bulk_shortlist(supabase, user_id):
+        return None
+
+    async def shortlist_fit_scores(supabase, user_id, university_ids):
+        return {IN_CATALOG: 80}
+
+    invalidated = []
+    monkeypatch.setattr(universities, "guard_bulk_shortlist", guard_bulk_shortlist)
+    monkeypatch.setattr(universities, "shortlist_fit_scores", shortlist_fit_scores)
+    monkeypatch.setattr(universities, "get_catalog", lambda: SimpleNamespace(invalidate=lambda: invalidated.append(True)))
+    supabase = FakeSupabase({IN_CATALOG, CREATED_SINCE})
+    background_tasks = BackgroundTasks()
+
+    response = await universities.bulk_add_to_shortlist(
+        BulkShortlistRequest(items=[
+            ShortlistRequest(university_id=uid, category="target") for uid in (IN_CATALOG, CREATED_SINCE, UNKNOWN, "mit")
+        ]),
+        background_tasks,
+        user_id="user-1",
+        supabase=supabase
+    )
+
+    assert [(result["university_id"], result["status"]) for result in response["results"]] == [
+        (IN_CATALOG, "shortlisted"), (CREATED_SINCE, "shortlisted"), (UNKNOWN, "not_found"), ("mit", "not_found"),
+    ]
+    assert [(row["university_id"], row["fit_score"]) for row in supabase.upserted] == [
+        (IN_CATALOG, 80), (CREATED_SINCE, None),
+    ]
+    assert invalidated
+    assert [task.args[2] for task in background_tasks.tasks] == [CREATED_SINCE]
@@ -0,0 +1,154 @@
+import numpy as np
+import pytest
+
+from app.services import catalog as catalog_module
+from app.services import catalog_snapshot
+from app.services.catalog import SORT_COLUMNS, UniversityCatalog, catalog_version, write_catalog_snapshot
+from app.services.catalog_snapshot import CatalogSnapshot, load_snapshot, snapshot_lock, write_snapshot
+from app.services.fit_scoring import MATRIX_ARRAYS, CatalogMatrix, score_profile
+
+pytestmark = pytest.mark.anyio
+
+UNIVERSITIES = [
+    {"id": "mit", "name": "Massachusetts Institute of Technology", "country": "USA", "ranking": 1,
+     "tuition_min": 55000, "tuition_max": 60000, "acceptance_rate": 4.5, "min_gpa": 3.9,
+     "programs": ["Computer Science", "Engineering"], "is_external": False, "extra": {"campus": "Cambridge"}},
+    {"id": "tum", "name": "Technische Universität München", "country": "Germany", "ranking": 37,
+     "tuition_min": None, "tuition_max": 3000, "acceptance_rate": 8, "min_gpa": None,
+     "programs": ["Engineering"], "is_external": False, "extra": None},
+    {"id": "toronto", "name": "University of Toronto", "country": "Canada", "ranking": 21,
+     "tuition_min": 40000, "tuition_max": 45000, "acceptance_rate": None, "min_gpa": 3.5,
+     "programs": [], "is_external": None, "extra": [1, 2]},
+    {"id": "delft", "name": "Delft University of Technology", "country": "Netherlands", "ranking": None,
+     "tuition_min": 18000, "tuition_max": None, "acceptance_rate": 65.25, "min_gpa": 3.0,
+     "programs": None, "is_external": True, "extra": None},
+    {"id": "ucl", "name": "University College London", "country": "UK", "ranking": 9,
+     "tuition_min": 30000, "tuition_max": 38000, "acceptance_rate": 63, "min_gpa": 3.6,
+     "programs": ["Law", "Economics"], "is_external": False, "extra": None},
+]
+
+
+@pytest.fixture
+def path(tmp_path):
+    return str(tmp_path / "catalog.snapshot")
+
+
+@pytest.fixture
+def catalogs(path):
+    """The same rows served from memory and from a snapshot."""
+    in_memory = UniversityCatalog()
+    in_memory.build(UNIVERSITIES)
+    write_catalog_snapshot(path, UNIVERSITIES, "v1")
+    mapped = UniversityCatalog()
+    mapped.load_snapshot(load_snapshot(path))
+    return in_memory, mapped
+
+
+def test_rows_round_trip(path):
+    write_snapshot(path, UNIVERSITIES, "v1", marker={"count": 5})
+    snapshot = CatalogSnapshot(path)
+
+    assert (snapshot.version, snapshot.count, snapshot.marker) == ("v1", 5, {"count": 5})
+    assert snapshot.rows_at(range(5)) == UNIVERSITIES
+    assert [snapshot.row(position) for position in (4, 0, 2)] == [UNIVERSITIES[4], UNIVERSITIES[0], UNIVERSITIES[2]]
+    assert snapshot.column("name") == [row["name"] for row in UNIVERSITIES]
+    assert isinstance(snapshot.row(0)["ranking"], int) and isinstance(snapshot.row(0)["min_gpa"], float)
+
+
+def test_decoded_rows_are_bounded(monkeypatch, path):
+    monkeypatch.setattr(catalog_snapshot, "ROW_CACHE_SIZE", 2)
+    write_snapshot(path, UNIVERSITIES, "v1")
+    snapshot = CatalogSnapshot(path)
+
+    assert snapshot.rows_at(range(5)) == UNIVERSITIES
+    assert len(snapshot._rows) == 0
+    assert [snapshot.row(position)["id"] for position in (0, 1, 2, 1)] == ["mit", "tum", "toronto", "tum"]
+    assert list(snapshot._rows) == [2, 1]
+
+
+def test_queries_match_the_in_memory_catalog(catalogs):
+    in_memory, mapped = catalogs
+
+    for sort in SORT_COLUMNS:
+        for filters in [{}, {"country": "usa"}, {"program": "engineering"}, {"max_tuition": 40000}]:
+            for descending in (False, True):
+                query = dict(sort=sort, descending=descending, **filters)
+                assert mapped.query(**query) == in_memory.query(**query)
+                assert mapped.query(offset=1, limit=2, **query) == in_memory.query(offset=1, limit=2, **query)
+
+
+def test_matrix_maps_the_stored_arrays(catalogs):
+    in_memory, mapped = catalogs
+    computed, stored = CatalogMatrix(in_memory.rows), CatalogMatrix(mapped.rows)
+
+    for name in MATRIX_ARRAYS:
+        assert not getattr(stored, name).flags.writeable, name
+        assert np.array_equal(getattr(stored, name), getattr(computed, name)), name
+
+    profile = {"gpa": 3.7, "budget_max": 40000, "preferred_countries": ["USA", "UK"]}
+    for name, values in score_profile(stored, profile).items():
+        assert np.allclose(values, score_profile(computed, profile)[name]), name
+
+
+class FakeTable:
+    """Stands in for the table marker and row loads of catalog.py."""
+
+    def __init__(self, rows):
+        self.rows = rows
+        self.loads = 0
+
+    async def marker(self, supabase):
+        return {"count": len(self.rows), "created_at": None, "updated_at": None}
+
+    async def fetch(self, supabase):
+        self.loads += 1
+        return list(self.rows)
+
+
+@pytest.fixture
+def table(monkeypatch, path):
+    table = FakeTable(UNIVERSITIES[:3])
+    monkeypatch.setattr(catalog_module.get_settings(), "catalog_snapshot_path", path)
+    monkeypatch.setattr(catalog_module, "table_marker", table.marker)
+    monkeypatch.setattr(catalog_module, "fetch_rows", table.fetch)
+    return table
+
+
+async def test_refresh_builds_the_snapshot_and_reuses_it(table):
+    catalog = UniversityCatalog()
+
+    assert await catalog.refresh(None)
+    assert catalog.stats()["source"] == "snapshot" and len(catalog.rows) == 3
+    assert not await catalog.refresh(None)
+    assert table.loads == 1
+
+
+async def test_refresh_rebuilds_when_the_table_changes(table):
+    catalog = UniversityCatalog()
+    await catalog.refresh(None)
+
+    table.rows = UNIVERSITIES
+    assert await catalog.refresh(None)
+    assert catalog.stats()["source"] == "snapshot"
+    assert catalog.version == catalog_version(UNIVERSITIES) and len(catalog.rows) == 5
+
+
+async def test_refresh_maps_a_snapshot_written_by_another_worker(table, path):
+    catalog = UniversityCatalog()
+    await catalog.refresh(None)
+
+    table.rows = UNIVERSITIES
+    write_catalog_snapshot(path, UNIVERSITIES, "v2", await table.marker(None))
+    assert await catalog.refresh(None)
+    assert (catalog.version, catalog.stats()["source"], table.loads) == ("v2", "snapshot", 1)
+
+
+async def test_refresh_keeps_serving_while_another_worker_rebuilds(table, path):
+    catalog = UniversityCatalog()
+    await catalog.refresh(None)
+
+    table.rows = UNIVERSITIES
+    with snapshot_lock(path) as acquired:
+        assert acquired
+        assert not await catalog.refresh(None)
+    assert (len(catalog.rows), catalog.stats()["source"], table.loads) == (3, "snapshot", 1)
@@ -0,0 +1,90 @@
+import asyncio
+import json
+from types import SimpleNamespace
+
+import pytest
+
+from app.services.ai_counsellor import AICounsellor
+from app.services.intent_router import Route
+
+pytestmark = pytest.mark.anyio
+
+
+def chunk(content=None, tool_calls=None):
+    return SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=content, tool_calls=tool_calls))])
+
+
+def tool_call_chunk(index: int, call_id: str, name: str, args: dict):
+    fragment = SimpleNamespace(
+        index=index, id=call_id, function=SimpleNamespace(name=name, arguments=json.dumps(args))
+    )
+    return chunk(tool_calls=[fragment])
+
+
+class ScriptedLLM:
+    """Streams one scripted list of chunks per call."""
+
+    def __init__(self, *rounds):
+        self.rounds = list(rounds)
+
+    async def stream(self, **params):
+        for item in self.rounds.pop(0):
+            yield item
+
+
+def counsellor_for(llm, monkeypatch) -> AICounsellor:
+    counsellor = AICounsellor(supabase=object(), llm=llm)
+
+    async def route_message(user_id, message):
+        return Route("planning", "test-model"), None
+
+    async def build_messages(user_id, message, conversation_id=None):
+        return [{"role": "user", "content": message}]
+
+    monkeypatch.setattr(counsellor, "route_message", route_message)
+    monkeypatch.setattr(counsellor, "build_messages", build_messages)
+    return counsellor
+
+
+async def collect(counsellor, events: list):
+    async for event in counsellor.chat_stream("user-1", "shortlist MIT and CMU"):
+        events.append(event)
+
+
+TOOL_ROUND = [
+    tool_call_chunk(0, "call-1", "shortlist_university", {"university_name": "MIT", "category": "dream"}),
+    tool_call_chunk(1, "call-2", "shortlist_university", {"university_name": "CMU", "category": "target"}),
+]
+
+
+async def test_tool_round_results_stream_then_done(monkeypatch):
+    counsellor = counsellor_for(ScriptedLLM(TOOL_ROUND, [chunk("Done.")]), monkeypatch)
+
+    async def run_tool_calls(user_id, calls, on_result=None):
+        results = [f"ok {args['university_name']}" for _, args in calls]
+        for index in reversed(range(len(calls))):
+            on_result(index, results[index])
+        return results
+
+    monkeypatch.setattr(counsellor, "run_tool_calls", run_tool_calls)
+    events = []
+    await asyncio.wait_for(collect(counsellor, events), 2)
+
+    assert [event["event"] for event in events] == ["tool_start", "tool_start", "tool_end", "tool_end", "token", "done"]
+    assert [event["data"]["id"] for event in events[2:4]] == ["call-2", "call-1"]
+    assert [action["result"] for action in events[-1]["data"]["actions"]] == ["ok MIT", "ok CMU"]
+
+
+async def test_tool_round_error_ends_the_stream(monkeypatch):
+    counsellor = counsellor_for(ScriptedLLM(TOOL_ROUND), monkeypatch)
+
+    async def run_tool_calls(user_id, calls, on_result=None):
+        on_result(0, "ok MIT")
+        raise RuntimeError("catalog unavailable")
+
+    monkeypatch.setattr(counsellor, "run_tool_calls", run_tool_calls)
+    events = []
+    with pytest.raises(RuntimeError, match="catalog unavailable"):
+        await asyncio.wait_for(collect(counsellor, events), 2)
+
+    assert [event["event"] for event in events] == ["tool_start", "tool_start", "tool_end"]
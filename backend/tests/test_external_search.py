@@ -0,0 +1,58 @@
+import asyncio
+from types import SimpleNamespace
+
+import httpx
+import pytest
+
+from app.services import external_search
+from app.services.external_search import ExternalSearchCache
+
+pytestmark = pytest.mark.anyio
+
+MIRROR_ROW = {"name": "Mirror University", "country": "Chile", "web_pages": ["https://mirror.example"]}
+
+
+class MirrorQuery:
+    def execute(self):
+        return SimpleNamespace(data=[MIRROR_ROW])
+
+
+SUPABASE = SimpleNamespace(rpc=lambda name, params: MirrorQuery())
+
+
+def hipo_returning(monkeypatch, **response):
+    client = httpx.AsyncClient(transport=httpx.MockTransport(lambda request: httpx.Response(200, **response)))
+    monkeypatch.setattr(external_search, "_http_client", client)
+
+
+@pytest.mark.parametrize("response", [
+    {"text": "<html>Service Unavailable</html>"},
+    {"json": {"error": "rate limited"}},
+    {"json": ["not a university"]},
+])
+async def test_malformed_upstream_falls_back_to_mirror(monkeypatch, response):
+    hipo_returning(monkeypatch, **response)
+    cache = ExternalSearchCache()
+
+    results = await cache.search(SUPABASE, "mirror", None, 5)
+
+    assert [uni["name"] for uni in results] == ["Mirror University"]
+    assert cache.counts["upstream_errors"] == 1
+    assert not cache.upstream_available()
+
+
+async def test_malformed_refresh_keeps_serving_stale(monkeypatch):
+    hipo_returning(monkeypatch, json=[{"name": "Live University", "country": "Chile"}])
+    cache = ExternalSearchCache()
+    first = await cache.search(SUPABASE, "live", None, 5)
+
+    # Age the entry into the stale window, then break the upstream
+    key = ("live", "", 5)
+    results, fetched_at = cache._entries[key]
+    cache._entries[key] = (results, fetched_at - external_search.get_settings().hipo_cache_ttl - 1)
+    hipo_returning(monkeypatch, text="not json")
+
+    assert await cache.search(SUPABASE, "live", None, 5) == first
+    await asyncio.gather(*cache._refreshing.values())
+    assert cache._entries[key][0] == first
+    assert cache.counts["upstream_errors"] == 1
@@ -0,0 +1,121 @@
+import asyncio
+import time
+
+import pytest
+
+from app.core.llm_gateway import CircuitBreaker, LLMGateway, LLMUnavailableError
+
+pytestmark = pytest.mark.anyio
+
+MESSAGES = [{"role": "user", "content": "hi"}]
+
+
+def open_breaker(breaker: CircuitBreaker):
+    """Open the breaker with its cooldown already over, so the next call is the half-open probe."""
+    breaker.state = "open"
+    breaker.opened_at = time.monotonic() - breaker.reset_timeout - 1
+
+
+def test_breaker_opens_after_threshold():
+    breaker = CircuitBreaker(failure_threshold=3, reset_timeout=30)
+    for _ in range(2):
+        breaker.before_call()
+        breaker.record_failure()
+    assert breaker.state == "closed"
+
+    breaker.before_call()
+    breaker.record_failure()
+    assert breaker.state == "open"
+    with pytest.raises(LLMUnavailableError) as error:
+        breaker.before_call()
+    assert error.value.retry_after > 0
+
+
+def test_breaker_lets_one_probe_through_when_half_open():
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=30)
+    open_breaker(breaker)
+
+    breaker.before_call()
+    assert breaker.state == "half_open"
+    with pytest.raises(LLMUnavailableError, match="probing"):
+        breaker.before_call()
+
+    breaker.record_success()
+    assert breaker.state == "closed"
+    breaker.before_call()
+
+
+def test_failed_probe_reopens():
+    breaker = CircuitBreaker(failure_threshold=5, reset_timeout=30)
+    open_breaker(breaker)
+    breaker.before_call()
+    breaker.record_failure()
+    assert breaker.state == "open"
+    assert not breaker.probe_in_flight
+
+
+def test_cancelled_call_does_not_count_as_failure_when_closed():
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=30)
+    breaker.before_call()
+    breaker.record_cancelled()
+    assert breaker.state == "closed"
+    assert breaker.failures == 0
+
+
+async def test_complete_through_fake_provider(fake_llm):
+    gateway = LLMGateway()
+    response = await gateway.complete(model="test", messages=MESSAGES)
+    assert response.choices[0].message.content == fake_llm["reply"]
+    assert gateway.breaker.state == "closed"
+
+
+async def test_retries_then_opens_on_provider_errors(fake_llm):
+    fake_llm.update(failure_rate=1.0, failure_status=503)
+    gateway = LLMGateway()
+    gateway.breaker = CircuitBreaker(failure_threshold=2, reset_timeout=30)
+
+    with pytest.raises(Exception):
+        await gateway.complete(model="test", messages=MESSAGES)
+    assert gateway.retries >= 1
+    assert gateway.breaker.state == "open"
+    with pytest.raises(LLMUnavailableError):
+        await gateway.complete(model="test", messages=MESSAGES)
+
+
+async def test_cancelled_half_open_probe_reopens_breaker(fake_llm):
+    fake_llm.update(hang=True)
+    gateway = LLMGateway()
+    gateway.breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0.05)
+    open_breaker(gateway.breaker)
+
+    probe = asyncio.ensure_future(gateway.complete(model="test", messages=MESSAGES))
+    await asyncio.sleep(0.05)
+    assert gateway.breaker.probe_in_flight
+    probe.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await probe
+
+    assert gateway.breaker.state == "open"
+    assert not gateway.breaker.probe_in_flight
+
+    # Once the cooldown passes a new probe goes through and closes the breaker
+    fake_llm.update(hang=False)
+    await asyncio.sleep(0.06)
+    await gateway.complete(model="test", messages=MESSAGES)
+    assert gateway.breaker.state == "closed"
+
+
+async def test_cancelled_stream_probe_reopens_breaker(fake_llm):
+    fake_llm.update(hang=True)
+    gateway = LLMGateway()
+    gateway.breaker = CircuitBreaker(failure_threshold=1, reset_timeout=30)
+    open_breaker(gateway.breaker)
+
+    async def consume():
+        async for _ in gateway.stream(model="test", messages=MESSAGES):
+            pass
+
+    with pytest.raises(asyncio.TimeoutError):
+        await asyncio.wait_for(consume(), 0.05)
+    assert gateway.breaker.state == "open"
+    assert not gateway.breaker.probe_in_flight
@@ -0,0 +1,136 @@
+"""
+Duplicate merge in migrations/014_university_name_key.sql.
+
+Needs a scratch Postgres: set TEST_DATABASE_URL (and pip install 'psycopg[binary]').
+Everything runs in a throwaway schema inside one transaction that is rolled back.
+"""
+import os
+from pathlib import Path
+
+import pytest
+
+psycopg = pytest.importorskip("psycopg")
+
+DATABASE_URL = os.getenv("TEST_DATABASE_URL")
+MIGRATION = Path(__file__).parent.parent / "migrations" / "014_university_name_key.sql"
+
+pytestmark = pytest.mark.skipif(not DATABASE_URL, reason="TEST_DATABASE_URL is not set")
+
+# Just the tables and columns the migration touches
+SCHEMA = """
+CREATE SCHEMA migration_014_test;
+SET LOCAL search_path TO migration_014_test, public;
+
+CREATE TABLE universities (
+  id UUID PRIMARY KEY,
+  name TEXT NOT NULL,
+  country TEXT,
+  website TEXT,
+  ranking INTEGER,
+  is_external BOOLEAN DEFAULT false,
+  created_at TIMESTAMPTZ DEFAULT now()
+);
+CREATE TABLE shortlisted_universities (
+  id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
+  user_id UUID,
+  university_id UUID REFERENCES universities(id) ON DELETE CASCADE,
+  category TEXT,
+  is_locked BOOLEAN DEFAULT false,
+  ai_reasoning TEXT,
+  fit_score INTEGER,
+  created_at TIMESTAMPTZ DEFAULT now(),
+  UNIQUE(user_id, university_id)
+);
+CREATE TABLE tasks (
+  id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
+  user_id UUID,
+  title TEXT,
+  university_id UUID REFERENCES universities(id)
+);
+CREATE TABLE sop_documents (
+  id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
+  user_id UUID,
+  university_id UUID REFERENCES universities(id) ON DELETE SET NULL,
+  content TEXT NOT NULL DEFAULT ''
+);
+CREATE TABLE university_aliases (
+  id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
+  university_id UUID REFERENCES universities(id) ON DELETE CASCADE,
+  alias TEXT NOT NULL,
+  UNIQUE(university_id, alias)
+);
+"""
+
+SURVIVOR = "00000000-0000-0000-0000-000000000001"
+DUPLICATE = "00000000-0000-0000-0000-000000000002"
+DUPLICATE_2 = "00000000-0000-0000-0000-000000000003"
+OTHER = "00000000-0000-0000-0000-000000000004"
+USER_1 = "10000000-0000-0000-0000-000000000001"
+USER_2 = "10000000-0000-0000-0000-000000000002"
+
+FIXTURES = f"""
+INSERT INTO universities (id, name, country, ranking, is_external, created_at) VALUES
+  ('{SURVIVOR}', 'Massachusetts Institute of Technology', 'USA', 1, false, '2024-01-02'),
+  ('{DUPLICATE}', 'massachusetts institute of technology ', 'USA', NULL, true, '2024-01-01'),
+  ('{DUPLICATE_2}', 'MASSACHUSETTS INSTITUTE OF TECHNOLOGY', 'USA', NULL, true, '2024-01-03'),
+  ('{OTHER}', 'Massachusetts Institute of Technology', 'UK', NULL, true, '2024-01-01');
+
+-- User 1 has the survivor (unlocked) and a locked duplicate
+INSERT INTO shortlisted_universities (user_id, university_id, category, is_locked, created_at) VALUES
+  ('{USER_1}', '{SURVIVOR}', 'dream', false, '2024-02-01'),
+  ('{USER_1}', '{DUPLICATE}', 'target', true, '2024-02-02');
+-- User 2 has both duplicates but not the survivor
+INSERT INTO shortlisted_universities (user_id, university_id, category, is_locked, created_at) VALUES
+  ('{USER_2}', '{DUPLICATE}', 'safe', false, '2024-02-01'),
+  ('{USER_2}', '{DUPLICATE_2}', 'target', true, '2024-02-02');
+
+INSERT INTO tasks (user_id, title, university_id) VALUES ('{USER_1}', 'Write SOP', '{DUPLICATE}');
+INSERT INTO sop_documents (user_id, university_id) VALUES ('{USER_1}', '{DUPLICATE_2}');
+INSERT INTO university_aliases (university_id, alias) VALUES
+  ('{SURVIVOR}', 'MIT'),
+  ('{DUPLICATE}', 'MIT'),
+  ('{DUPLICATE}', 'M.I.T.'),
+  ('{DUPLICATE_2}', 'M.I.T.');
+"""
+
+
+@pytest.fixture
+def cursor():
+    with psycopg.connect(DATABASE_URL) as conn:
+        with conn.cursor() as cur:
+            cur.execute(SCHEMA)
+            cur.execute(FIXTURES)
+            cur.execute(MIGRATION.read_text())
+            yield cur
+        conn.rollback()
+
+
+def rows(cursor, sql: str) -> list:
+    cursor.execute(sql)
+    return [tuple(str(value) if value is not None else None for value in row) for row in cursor.fetchall()]
+
+
+def test_duplicates_are_deleted(cursor):
+    assert rows(cursor, "SELECT id, country FROM universities ORDER BY id") == [(SURVIVOR, "USA"), (OTHER, "UK")]
+
+
+def test_shortlist_keeps_one_row_per_user_and_the_lock(cursor):
+    assert rows(cursor, """
+        SELECT user_id, university_id, category, is_locked
+        FROM shortlisted_universities ORDER BY user_id
+    """) == [
+        (USER_1, SURVIVOR, "dream", "True"),
+        (USER_2, SURVIVOR, "target", "True"),
+    ]
+
+
+def test_tasks_and_sops_follow_the_survivor(cursor):
+    assert rows(cursor, "SELECT university_id FROM tasks") == [(SURVIVOR,)]
+    assert rows(cursor, "SELECT university_id FROM sop_documents") == [(SURVIVOR,)]
+
+
+def test_aliases_are_merged_without_repeats(cursor):
+    assert rows(cursor, "SELECT university_id, alias FROM university_aliases ORDER BY alias") == [
+        (SURVIVOR, "M.I.T."),
+        (SURVIVOR, "MIT"),
+    ]
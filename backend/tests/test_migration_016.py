@@ -0,0 +1,57 @@
+"""
+updated_at trigger and shortlist_external_university in migrations/016_university_ingestion.sql.
+
+Needs a scratch Postgres like test_migration_014.py (TEST_DATABASE_URL); 014 is applied first.
+"""
+import os
+from pathlib import Path
+
+import pytest
+
+psycopg = pytest.importorskip("psycopg")
+
+from test_migration_014 import SCHEMA
+
+DATABASE_URL = os.getenv("TEST_DATABASE_URL")
+MIGRATIONS = Path(__file__).parent.parent / "migrations"
+
+pytestmark = pytest.mark.skipif(not DATABASE_URL, reason="TEST_DATABASE_URL is not set")
+
+UNIVERSITY = "00000000-0000-0000-0000-000000000001"
+USER = "10000000-0000-0000-0000-000000000001"
+
+
+@pytest.fixture
+def cursor():
+    with psycopg.connect(DATABASE_URL) as conn:
+        with conn.cursor() as cur:
+            cur.execute(SCHEMA)
+            cur.execute("ALTER TABLE universities ALTER COLUMN id SET DEFAULT gen_random_uuid()")
+            cur.execute((MIGRATIONS / "014_university_name_key.sql").read_text())
+            # search_universities_ranked needs pg_trgm, which a scratch server may not have
+            cur.execute("SET LOCAL check_function_bodies = off")
+            cur.execute((MIGRATIONS / "016_university_ingestion.sql").read_text())
+            cur.execute(f"""
+                INSERT INTO universities (id, name, country, is_external, deleted_at)
+                VALUES ('{UNIVERSITY}', 'Trinity College', 'Ireland', true, now())
+            """)
+            yield cur
+        conn.rollback()
+
+
+def test_updates_bump_updated_at(cursor):
+    cursor.execute(f"UPDATE universities SET website = 'https://tcd.ie' WHERE id = '{UNIVERSITY}'")
+    cursor.execute(f"SELECT updated_at IS NOT NULL FROM universities WHERE id = '{UNIVERSITY}'")
+    assert cursor.fetchone() == (True,)
+
+
+def test_shortlisting_restores_a_soft_deleted_university(cursor):
+    cursor.execute(
+        "SELECT shortlist_external_university(%s, %s, %s, %s)", (USER, " trinity college", "Ireland", "target")
+    )
+    result = cursor.fetchone()[0]
+
+    assert result["university_created"] is False
+    assert result["shortlist"]["university_id"] == UNIVERSITY
+    assert result["shortlist"]["university"]["deleted_at"] is None
+    assert result["shortlist"]["university"]["updated_at"] is not None
@@ -0,0 +1,41 @@
+from types import SimpleNamespace
+
+import pytest
+
+from app.services import ai_counsellor, recommendations
+from app.services.ai_counsellor import AICounsellor
+from app.services.context_cache import get_context_cache
+
+pytestmark = pytest.mark.anyio
+
+
+class FailingQuery:
+    def __getattr__(self, name):
+        return lambda *args, **kwargs: self
+
+    def execute(self):
+        raise RuntimeError('relation "recommendations" does not exist')
+
+
+async def test_chat_context_without_recommendations(monkeypatch):
+    counsellor = AICounsellor(supabase=object(), llm=object())
+
+    async def get_user_context(user_id):
+        return {"profile": {}, "user_profile": {"gpa": 3.5}, "shortlist": []}
+
+    async def get_recommendations(supabase, user_id):
+        raise RuntimeError("recommendations unavailable")
+
+    monkeypatch.setattr(counsellor, "get_user_context", get_user_context)
+    monkeypatch.setattr(ai_counsellor, "get_recommendations", get_recommendations)
+
+    formatted = await counsellor.get_formatted_context("user-without-recommendations")
+    assert formatted["recommendations"] == "None available"
+    assert formatted["shortlist"] == "None yet"
+    # Not cached, so the next message tries again
+    assert await get_context_cache().get("user-without-recommendations") is None
+
+
+async def test_invalidate_recommendations_failure_is_not_raised():
+    supabase = SimpleNamespace(table=lambda name: FailingQuery())
+    await recommendations.invalidate_recommendations(supabase, "user-1")
@@ -0,0 +1,102 @@
+import time
+
+import httpx
+import pytest
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import rsa
+from fastapi import HTTPException
+from fastapi.security import HTTPAuthorizationCredentials
+from jose import jwk, jwt
+
+from app.core import security
+
+pytestmark = pytest.mark.anyio
+
+PRIVATE_KEY = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+PRIVATE_PEM = PRIVATE_KEY.private_bytes(
+    serialization.Encoding.PEM, serialization.PrivateFormat.PKCS8, serialization.NoEncryption()
+)
+PUBLIC_PEM = PRIVATE_KEY.public_key().public_bytes(
+    serialization.Encoding.PEM, serialization.PublicFormat.SubjectPublicKeyInfo
+)
+PUBLIC_JWK = {**jwk.construct(PUBLIC_PEM, "RS256").to_dict(), "kid": "key-1"}
+
+
+def token_for(user_id: str, kid: str = "key-1") -> str:
+    claims = {"sub": user_id, "aud": "authenticated", "exp": int(time.time()) + 3600}
+    return jwt.encode(claims, PRIVATE_PEM, algorithm="RS256", headers={"kid": kid})
+
+
+class JWKSEndpoint:
+    """Mock JWKS endpoint counting fetches."""
+
+    def __init__(self, status: int = 200):
+        self.status = status
+        self.fetches = 0
+
+    def __call__(self, request: httpx.Request) -> httpx.Response:
+        self.fetches += 1
+        if self.status != 200:
+            return httpx.Response(self.status)
+        return httpx.Response(200, json={"keys": [PUBLIC_JWK]})
+
+
+@pytest.fixture
+def auth(monkeypatch):
+    """Fresh JWKS and token caches; yields (endpoint, remote verification calls)."""
+    endpoint, remote_calls = JWKSEndpoint(), []
+    monkeypatch.setattr(security, "_jwks", {"keys": [], "fetched_at": 0.0, "attempted_at": 0.0})
+    monkeypatch.setattr(security, "_token_cache", security.TokenCache(100))
+    monkeypatch.setattr(security, "_jwks_client", httpx.AsyncClient(transport=httpx.MockTransport(endpoint)))
+
+    def verify_token_remotely(supabase, token):
+        remote_calls.append(token)
+        return jwt.get_unverified_claims(token)["sub"]
+
+    monkeypatch.setattr(security, "verify_token_remotely", verify_token_remotely)
+    yield endpoint, remote_calls
+
+
+async def current_user(token: str) -> str:
+    credentials = HTTPAuthorizationCredentials(scheme="Bearer", credentials=token)
+    return await security.get_current_user(credentials, supabase=None)
+
+
+async def test_verifies_locally_with_jwks(auth):
+    endpoint, remote_calls = auth
+    assert await current_user(token_for("user-1")) == "user-1"
+    assert await current_user(token_for("user-2")) == "user-2"
+    assert endpoint.fetches == 1
+    assert remote_calls == []
+
+
+async def test_jwks_outage_falls_back_to_remote_verification(auth):
+    endpoint, remote_calls = auth
+    endpoint.status = 503
+
+    assert await current_user(token_for("user-1")) == "user-1"
+    assert len(remote_calls) == 1
+
+
+async def test_unknown_kid_refreshes_are_rate_limited(auth):
+    endpoint, remote_calls = auth
+    assert await current_user(token_for("user-1")) == "user-1"
+
+    for attempt in range(5):
+        with pytest.raises(HTTPException) as error:
+            await current_user(token_for(f"attacker-{attempt}", kid="unknown"))
+        assert error.value.status_code == 401
+
+    assert endpoint.fetches == 1
+    assert remote_calls == []
+
+
+async def test_forged_signature_is_rejected(auth):
+    other_key = rsa.generate_private_key(public_exponent=65537, key_size=2048).private_bytes(
+        serialization.Encoding.PEM, serialization.PrivateFormat.PKCS8, serialization.NoEncryption()
+    )
+    claims = {"sub": "user-1", "aud": "authenticated", "exp": int(time.time()) + 3600}
+    forged = jwt.encode(claims, other_key, algorithm="RS256", headers={"kid": "key-1"})
+
+    with pytest.raises(HTTPException):
+        await current_user(forged)
@@ -0,0 +1,31 @@
+from types import SimpleNamespace
+
+import pytest
+
+from app.services import shortlist
+
+pytestmark = pytest.mark.anyio
+
+
+async def test_store_fit_score_invalidates_the_context_after_writing(monkeypatch):
+    events = []
+
+    async def shortlist_fit_score(supabase, user_id, university_id):
+        return 72
+
+    async def execute(query):
+        events.append("update")
+
+    async def invalidate(user_id):
+        events.append(f"invalidate {user_id}")
+
+    class FakeQuery:
+        def __getattr__(self, name):
+            return lambda *args, **kwargs: self
+
+    monkeypatch.setattr(shortlist, "shortlist_fit_score", shortlist_fit_score)
+    monkeypatch.setattr(shortlist, "execute", execute)
+    monkeypatch.setattr(shortlist, "get_context_cache", lambda: SimpleNamespace(invalidate=invalidate))
+
+    await shortlist.store_fit_score(SimpleNamespace(table=lambda name: FakeQuery()), "user-1", "uni-1")
+    assert events == ["update", "invalidate user-1"]
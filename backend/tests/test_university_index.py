@@ -0,0 +1,130 @@
+from types import SimpleNamespace
+
+import pytest
+
+from app.services import university_index
+from app.services.ai_counsellor import AICounsellor
+from app.services.university_index import UniversityIndex
+
+pytestmark = pytest.mark.anyio
+
+
+async def test_name_lookup_failure_becomes_a_tool_error(monkeypatch):
+    counsellor = AICounsellor(supabase=object(), llm=object())
+    executed = []
+
+    async def resolve_university_names(calls):
+        raise RuntimeError("catalog unavailable")
+
+    async def execute_function(user_id, name, args):
+        executed.append(name)
+        return f"ran {name}"
+
+    monkeypatch.setattr(counsellor, "resolve_university_names", resolve_university_names)
+    monkeypatch.setattr(counsellor, "execute_function", execute_function)
+    reported = {}
+
+    results = await counsellor.run_tool_calls("user-1", [
+        ("shortlist_university", {"university_name": "MIT", "category": "dream"}),
+        ("search_universities", {"country": "Germany"}),
+    ], on_result=reported.__setitem__)
+
+    assert results == ["Error: catalog unavailable", "ran search_universities"]
+    assert executed == ["search_universities"]
+    assert reported == {0: results[0], 1: results[1]}
+
+UNIVERSITIES = [
+    {"id": "mit", "name": "Massachusetts Institute of Technology", "country": "USA", "ranking": 1},
+    {"id": "upenn", "name": "University of Pennsylvania", "country": "USA", "ranking": 12},
+    {"id": "psu", "name": "Penn State University", "country": "USA", "ranking": 80},
+    {"id": "tum", "name": "Technical University of Munich", "country": "Germany", "ranking": 37},
+    {"id": "gatech", "name": "Georgia Institute of Technology", "country": "USA", "ranking": 33},
+    {"id": "toronto", "name": "University of Toronto", "country": "Canada", "ranking": 21},
+    {"id": "toronto-metro", "name": "Toronto Metropolitan University", "country": "Canada", "ranking": None},
+    {"id": "trinity-ie", "name": "Trinity College", "country": "Ireland", "ranking": None},
+    {"id": "trinity-us", "name": "Trinity College", "country": "USA", "ranking": None},
+]
+ALIASES = [
+    {"university_id": "tum", "alias": "TU Munich"},
+    {"university_id": "gatech", "alias": "Georgia Tech"},
+    {"university_id": "upenn", "alias": "UPenn"},
+]
+
+
+@pytest.fixture
+def index():
+    index = UniversityIndex()
+    index.build(UNIVERSITIES, "v1", ALIASES)
+    return index
+
+
+@pytest.mark.parametrize("name, expected", [
+    ("Massachusetts Institute of Technology", "mit"),
+    ("massachusetts institute of technology", "mit"),
+    ("MIT", "mit"),
+    ("TU Munich", "tum"),
+    ("Georgia Tech", "gatech"),
+    ("UPenn", "upenn"),
+])
+def test_resolves_exact_names_aliases_and_acronyms(index, name, expected):
+    assert index.resolve(name)["id"] == expected
+
+
+@pytest.mark.parametrize("name", ["Penn", "Toronto", "Pennsylvania", "Massachusets Institute of Technology"])
+def test_loose_matches_are_not_resolved(index, name):
+    assert index.resolve(name) is None
+    assert index.candidates(name)
+
+
+def test_loose_match_candidates_put_ranked_first(index):
+    assert [uni["id"] for uni in index.candidates("Technology")] == ["mit", "gatech"]
+    assert [uni["id"] for uni in index.candidates("Metropolitan")] == ["toronto-metro"]
+    assert [uni["id"] for uni in index.candidates("Penn")] == ["psu"]
+
+
+def test_duplicate_exact_names_are_ambiguous(index):
+    assert index.resolve("Trinity College") is None
+    assert {uni["id"] for uni in index.candidates("Trinity College")} == {"trinity-ie", "trinity-us"}
+
+
+def test_unknown_name(index):
+    assert index.resolve("Hogwarts") is None
+    assert index.candidates("Hogwarts") == []
+
+
+class FakeQuery:
+    def __init__(self, data):
+        self.data = data
+
+    def __getattr__(self, name):
+        return lambda *args, **kwargs: self
+
+    def execute(self):
+        return self
+
+
+async def test_ensure_fresh_loads_aliases(monkeypatch):
+    catalog = SimpleNamespace(rows=UNIVERSITIES, version="v2")
+
+    async def ensure_loaded(supabase):
+        return catalog
+
+    monkeypatch.setattr(university_index, "get_catalog", lambda: SimpleNamespace(ensure_loaded=ensure_loaded))
+    supabase = SimpleNamespace(table=lambda name: FakeQuery(ALIASES))
+
+    index = await UniversityIndex().ensure_fresh(supabase)
+    assert index.version == "v2"
+    assert index.resolve("TU Munich")["id"] == "tum"
+
+
+async def test_create_task_with_an_ambiguous_name_asks_instead_of_unlinking(monkeypatch, index):
+    monkeypatch.setattr("app.services.ai_counsellor.get_university_index", lambda: index)
+    inserted = []
+    counsellor = AICounsellor(supabase=SimpleNamespace(table=lambda name: inserted.append(name)), llm=object())
+
+    result = await counsellor.execute_function("user-1", "create_task", {
+        "title": "Write SOP", "university_name": "Trinity College"
+    })
+
+    assert result.startswith("'Trinity College' doesn't identify one university")
+    assert inserted == []